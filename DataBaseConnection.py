@@ -15,5 +15,19 @@ class DatabaseConnection:
         self.cursor = self.connection.cursor(dictionary=True)
 
 
-# Default connection using centralized configuration
-db_connection = DatabaseConnection(**DatabaseConfig.get_connection_params())
\ No newline at end of file
+_default_connection = None
+
+
+def __getattr__(name):
+    """
+    Default connection using centralized configuration, opened on first use
+
+    Opening it at import time made every importer - including each spawn
+    worker re-running main.py's imports - connect to MySQL.
+    """
+    global _default_connection
+    if name != 'db_connection':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _default_connection is None:
+        _default_connection = DatabaseConnection(**DatabaseConfig.get_connection_params())
+    return _default_connection
@@ -0,0 +1,259 @@
+"""
+Batch VCF import - headless parse -> PharmGKB lookup -> import for a lab drop
+
+Imports every VCF in a directory (or listed in a manifest) into its
+patient's profile without the GUI. Files are parsed and looked up in a
+pool of worker processes; database writes happen one file at a time in
+this process, each in its own transaction, with the same semantics as
+the upload dialog (re-import diff by default, --full to re-upsert). The
+diff only adds and updates; --prune also deletes a patient's stored VCF
+variants missing from the new file, for drops of re-issued VCFs.
+
+A file maps to a patient through the manifest (CSV: file,user_id, paths
+relative to the manifest), or directly when the file name starts with a
+numeric user_id (e.g. 1042.vcf.gz, 1042_reissue.vcf). One row per file
+is appended to the report as soon as the file finishes, and files the
+report already lists as imported are skipped, so an interrupted run is
+resumed by starting it again with the same arguments.
+
+Usage:
+    python batch_import.py /data/lab_drop --workers 4
+    python batch_import.py /data/lab_drop/manifest.csv --report /data/reports/drop.csv
+    python batch_import.py /data/reissued --prune
+"""
+import argparse
+import csv
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import PharmGKBConfig
+from services.vcf_import_service import VariantDiff, VCFImportService
+from services.vcf_pipeline import process_vcf
+
+VCF_SUFFIXES = ('.vcf', '.vcf.gz', '.vcf.bgz')
+REPORT_FIELDS = ['file', 'user_id', 'status', 'variants', 'added', 'changed', 'removed',
+                 'interactions', 'diplotypes', 'seconds', 'error']
+
+
+def find_vcf_files(source: str) -> Dict[str, Optional[int]]:
+    """
+    Map each input file to a user_id from the manifest or its file name
+
+    Files with no mapping get None. Paths are absolute.
+    """
+    if os.path.isdir(source):
+        directory = source
+        paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                 if name.lower().endswith(VCF_SUFFIXES)]
+        manifest = {}
+    else:
+        directory = os.path.dirname(os.path.abspath(source))
+        manifest = VCFImportService.load_sample_manifest(source)
+        paths = [os.path.join(directory, name) for name in manifest]
+
+    files = {}
+    for path in paths:
+        name = os.path.relpath(path, directory)
+        user_id = manifest.get(name)
+        if user_id is None:
+            match = re.match(r'(\d+)', os.path.basename(path))
+            user_id = int(match.group(1)) if match else None
+        files[os.path.abspath(path)] = user_id
+    return files
+
+
+def load_completed(report_path: str) -> Set[str]:
+    """Files an earlier run of the same report already imported"""
+    if not os.path.exists(report_path):
+        return set()
+    with open(report_path, 'r', newline='') as f:
+        return {row['file'] for row in csv.DictReader(f) if row.get('status') == 'imported'}
+
+
+def _init_worker(rate_limit: float, burst: float):
+    """Worker process: take this worker's share of the PharmGKB rate limit"""
+    PharmGKBConfig.RATE_LIMIT = rate_limit
+    PharmGKBConfig.RATE_BURST = burst
+
+
+def _process_file(task: Tuple[str, bool, Optional[Dict]]) -> Dict:
+    """Worker process: parse and look up one file (no database access)"""
+    path, panel_only, stored_genotypes = task
+    result = process_vcf(path, panel_only=panel_only, stored_genotypes=stored_genotypes)
+    # The importer re-diffs against fresh rows; don't ship the diff back
+    result.pop('diff', None)
+    return result
+
+
+def import_result(import_service: VCFImportService, user_id: int, result: Dict, full: bool,
+                  prune: bool = False) -> Dict:
+    """
+    Write one processed file to the database in its own transaction; returns report counts
+
+    prune deletes stored VCF variants missing from the file (diff mode only).
+    """
+    # Importing now would store the variants without their interactions, and the
+    # re-import diff would never look them up again; leave the file for a re-run
+    if result.get('failed_lookups'):
+        raise RuntimeError(f"PharmGKB lookup failed for {len(result['failed_lookups'])} variants "
+                           f"(rate limited or unavailable) - not imported, run again to retry")
+
+    variants = result['variants']
+    interactions = result['interactions']
+    try:
+        if full:
+            added = import_service.save_variants(user_id, variants)
+            changed = removed = 0
+        else:
+            # Diff again at write time: an earlier file in this run may
+            # have been for the same patient
+            diff = VariantDiff(import_service.load_stored_genotypes(user_id), prune=prune)
+            for variant in variants:
+                diff.add(variant)
+            diff.finish()
+            delta = {variant.rsid for variant in diff.added + diff.changed}
+            interactions = [i for i in interactions if i['variant'] in delta]
+            added, changed, removed = import_service.apply_diff(user_id, diff)
+
+        saved = import_service.save_interactions(user_id, interactions) if interactions else 0
+        import_service.db_connection.connection.commit()
+    except Exception:
+        import_service.db_connection.connection.rollback()
+        raise
+
+    return {
+        'variants': len(variants),
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'interactions': saved,
+        'diplotypes': '; '.join(f"{call.gene} {call.diplotype} ({call.phenotype})"
+                                for call in result['diplotypes'].values()),
+    }
+
+
+def run_batch(db_connection, files: Dict[str, Optional[int]], report_path: str, workers: int,
+              panel_only: bool = False, full: bool = False, prune: bool = False) -> Dict[str, int]:
+    """
+    Process and import files, appending one report row per file
+
+    Returns {status: count} for this run. prune is ignored for panel-only
+    imports, which never see the stored rows outside the panel regions.
+    """
+    prune = prune and not panel_only
+    import_service = VCFImportService(db_connection)
+    completed = load_completed(report_path)
+    existing = import_service.resolve_sample_user_ids(
+        [path for path, user_id in files.items() if user_id is not None],
+        {path: user_id for path, user_id in files.items() if user_id is not None}
+    )
+    counts: Dict[str, int] = {}
+
+    new_report = not os.path.exists(report_path)
+    with open(report_path, 'a', newline='') as report_file:
+        report = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+        if new_report:
+            report.writeheader()
+
+        def record(path: str, status: str, **values):
+            row = {'file': path, 'user_id': files[path] or '', 'status': status, **values}
+            report.writerow(row)
+            report_file.flush()
+            counts[status] = counts.get(status, 0) + 1
+            print(f"[{status}] {os.path.basename(path)}" + (f" - {values['error']}" if values.get('error') else ""))
+
+        queue: List[str] = []
+        for path in files:
+            if path in completed:
+                counts['already imported'] = counts.get('already imported', 0) + 1
+            elif path not in existing:
+                record(path, 'skipped', error="no matching patient user_id")
+            else:
+                queue.append(path)
+
+        print(f"{len(queue)} files to import with {workers} workers "
+              f"({counts.get('already imported', 0)} already imported)")
+
+        # spawn like the parallel parser; at most two files per worker in flight.
+        # Each worker has its own session, so the rate limit is split between them
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'), initializer=_init_worker,
+                                 initargs=(PharmGKBConfig.RATE_LIMIT / workers,
+                                           max(PharmGKBConfig.RATE_BURST / workers, 1))) as pool:
+            tasks = iter(queue)
+            pending = {}
+
+            def submit_next() -> bool:
+                path = next(tasks, None)
+                if path is None:
+                    return False
+                stored = None if full else import_service.load_stored_genotypes(existing[path])
+                try:
+                    pending[pool.submit(_process_file, (path, panel_only, stored))] = (path, time.perf_counter())
+                except BrokenProcessPool:
+                    # A worker died (killed, out of memory); the pool takes no more work.
+                    # Files in flight fail through their futures, the rest are recorded here
+                    for path in [path, *tasks]:
+                        record(path, 'failed', error="worker process terminated abruptly - run again to retry")
+                    return False
+                return True
+
+            for _ in range(workers * 2):
+                if not submit_next():
+                    break
+
+            try:
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path, started = pending.pop(future)
+                        try:
+                            values = import_result(import_service, existing[path], future.result(), full, prune)
+                        except Exception as e:
+                            record(path, 'failed', seconds=f"{time.perf_counter() - started:.1f}", error=str(e))
+                        else:
+                            record(path, 'imported', seconds=f"{time.perf_counter() - started:.1f}", **values)
+                        submit_next()
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                print("Interrupted - run again with the same arguments to resume")
+                raise
+
+    return counts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('source', help="directory of VCFs, or manifest CSV (file,user_id)")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="files parsed and looked up in parallel")
+    arg_parser.add_argument('--report', help="per-file result CSV (default: batch_import_report.csv next to the input)")
+    arg_parser.add_argument('--panel-only', action='store_true', help="import pharmacogene panel regions only")
+    arg_parser.add_argument('--full', action='store_true',
+                            help="re-query and re-import every variant instead of only changes")
+    arg_parser.add_argument('--prune', action='store_true',
+                            help="delete stored VCF variants missing from the new file (re-issued VCFs only)")
+    args = arg_parser.parse_args()
+    if args.prune and (args.full or args.panel_only):
+        arg_parser.error("--prune cannot be combined with --full or --panel-only")
+
+    source_dir = args.source if os.path.isdir(args.source) else os.path.dirname(os.path.abspath(args.source))
+    report_path = args.report or os.path.join(source_dir, 'batch_import_report.csv')
+
+    files = find_vcf_files(args.source)
+    if not files:
+        print(f"No VCF files found in {args.source}")
+        return
+
+    from DataBaseConnection import db_connection
+    counts = run_batch(db_connection, files, report_path, max(args.workers, 1), args.panel_only, args.full,
+                       args.prune)
+    print(f"\nDone! {', '.join(f'{count} {status}' for status, count in counts.items())}. Report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
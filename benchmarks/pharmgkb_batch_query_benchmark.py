@@ -0,0 +1,83 @@
+"""
+PharmGKB batch query benchmark - requests per panel with gene-level deduplication
+
+Runs PharmGKBClient.batch_query() on a realistic pharmacogene panel
+(several variants per gene, a few rsIDs repeated by multi-allelic
+splitting) against the local PharmGKB stub (pharmgkb_stub). It also
+runs the previous per-variant loop - query_gene_drug_interactions() for
+every variant - and reports the requests that reached the stub for each,
+with response caching disabled so every query is visible. It checks that
+both return the same interactions.
+
+Usage:
+    python -m benchmarks.pharmgkb_batch_query_benchmark --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from ui.utils.pharmgkb_api import PharmGKBClient
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import PharmGKBSession
+
+# gene -> rsIDs typically reported for it on a clinical PGx panel
+PANEL = {
+    'CYP2D6': ['rs3892097', 'rs1065852', 'rs16947', 'rs1135840', 'rs28371725', 'rs5030655', 'rs35742686'],
+    'CYP2C19': ['rs4244285', 'rs4986893', 'rs12248560', 'rs28399504'],
+    'CYP2C9': ['rs1799853', 'rs1057910', 'rs28371686'],
+    'SLCO1B1': ['rs4149056', 'rs2306283'],
+    'TPMT': ['rs1142345', 'rs1800460', 'rs1800462'],
+    'DPYD': ['rs3918290', 'rs67376798', 'rs55886062', 'rs75017182'],
+    'VKORC1': ['rs9923231'],
+    'CYP3A5': ['rs776746', 'rs10264272'],
+    'UGT1A1': ['rs887829', 'rs4148323'],
+}
+
+
+def panel_variants():
+    variants = [{'gene': gene, 'rsid': rsid} for gene, rsids in PANEL.items() for rsid in rsids]
+    # Multi-allelic sites split into one record per ALT share their rsID
+    variants += [{'gene': 'CYP2D6', 'rsid': 'rs1065852'}, {'gene': 'CYP2C19', 'rsid': 'rs12248560'},
+                 {'gene': 'Unknown', 'rsid': 'rs999999'}]
+    return variants
+
+
+def per_variant_loop(client: PharmGKBClient, variants):
+    """The previous batch_query(): every variant queried on its own"""
+    interactions = []
+    for variant in variants:
+        if variant.get('gene', 'Unknown') != 'Unknown':
+            interactions.extend(client.query_gene_drug_interactions(variant['gene'], variant.get('rsid', '')))
+    return interactions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--latency', type=float, default=0.05, help="stub response delay in seconds")
+    args = arg_parser.parse_args()
+
+    stub = PharmGKBStub(latency=args.latency).start()
+    PharmGKBClient.BASE_URL = stub.url
+    # ttl 0: every entry is already expired, so nothing is served from the cache
+    client = PharmGKBClient(cache=PharmGKBCache(':memory:', ttl_hours=0), session=PharmGKBSession())
+    variants = panel_variants()
+
+    results = {}
+    for label, run in (("per-variant loop", per_variant_loop), ("batch_query", PharmGKBClient.batch_query)):
+        before = stub.served['requests']
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[label] = run(client, variants)
+        elapsed = time.perf_counter() - start
+        print(f"[{label}] {len(variants)} variants, {stub.served['requests'] - before} requests, "
+              f"{len(results[label])} interactions, {elapsed:.2f}s")
+
+    same = results["per-variant loop"] == results["batch_query"]
+    print("Interactions identical" if same else "Interactions DIFFER")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+PharmGKB cache benchmark - network round trips per patient with the response cache
+
+Serves variantAnnotation responses from the local PharmGKB stub (with a
+configurable latency standing in for the real API), points
+PharmGKBService at it, and looks up the variants of several patients who
+share the common pharmacogene rsIDs. Reports the requests that reached
+the stub and the wall time per patient, with a fresh on-disk cache.
+
+Usage:
+    python -m benchmarks.pharmgkb_cache_benchmark --patients 5 --latency 0.2
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from services.pharmgkb_service import PharmGKBService
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import PharmGKBSession
+
+COMMON_RSIDS = ['rs4244285', 'rs4986893', 'rs12248560', 'rs1799853', 'rs1057910', 'rs3892097',
+                'rs1065852', 'rs16947', 'rs4149056', 'rs2306283', 'rs1142345', 'rs1800460',
+                'rs3918290', 'rs67376798', 'rs9923231', 'rs28371725']
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--patients', type=int, default=5)
+    arg_parser.add_argument('--latency', type=float, default=0.2, help="stub response delay in seconds")
+    args = arg_parser.parse_args()
+
+    stub = PharmGKBStub(latency=args.latency).start()
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        PharmGKBService.BASE_URL = stub.data_url
+        PharmGKBService.cache = PharmGKBCache(os.path.join(tmp, 'cache.sqlite3'))
+        PharmGKBService.session = PharmGKBSession()
+
+        for patient in range(1, args.patients + 1):
+            # Most variants are shared, one or two are private to the patient
+            rsids = rng.sample(COMMON_RSIDS, 12) + [f"rs{rng.randint(10**6, 10**8)}" for _ in range(2)]
+            before = stub.served['requests']
+            start = time.perf_counter()
+            for rsid in rsids:
+                PharmGKBService.get_variant_annotations(rsid)
+            elapsed = time.perf_counter() - start
+            print(f"[patient {patient}] {len(rsids)} lookups, {stub.served['requests'] - before} network requests, "
+                  f"{elapsed:.2f}s")
+
+        stats = PharmGKBService.cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+PharmGKB concurrency benchmark - VCF processing time against lookup concurrency
+
+Writes a synthetic VCF of distinct rsIDs, serves variantAnnotation
+responses from the local PharmGKB stub (pharmgkb_stub) with an
+injected latency, and runs process_vcf() at each concurrency level with a
+fresh response cache. Checks that every level returns the interactions in
+the same (file) order as the sequential run. The session is unthrottled
+unless --rate-limit is given; with the default PHARMGKB_RATE_LIMIT of 2
+every level takes about variants / 2 seconds.
+
+Usage:
+    python -m benchmarks.pharmgkb_concurrency_benchmark --variants 200 --latency 0.1 --concurrency 1 4 8 16
+    python -m benchmarks.pharmgkb_concurrency_benchmark --variants 30 --latency 0.5 --concurrency 1 2 8 --rate-limit 2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from services.pharmgkb_service import PharmGKBService
+from services.vcf_pipeline import process_vcf
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import PharmGKBSession
+
+
+def write_vcf(path: str, n_variants: int):
+    with open(path, 'w') as f:
+        f.write("##fileformat=VCFv4.2\n##reference=GRCh38\n")
+        f.write("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE\n")
+        for i in range(n_variants):
+            f.write(f"chr10\t{94700000 + i * 10}\trs{1000000 + i}\tA\tG\t50\tPASS\t.\tGT\t0/1\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--variants', type=int, default=200)
+    arg_parser.add_argument('--latency', type=float, default=0.1, help="stub response delay in seconds")
+    arg_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    arg_parser.add_argument('--rate-limit', type=float, default=0,
+                            help="client requests/second, burst 1, as PHARMGKB_RATE_LIMIT (0 = unthrottled)")
+    args = arg_parser.parse_args()
+
+    stub = PharmGKBStub(latency=args.latency).start()
+    PharmGKBService.BASE_URL = stub.data_url
+    PharmGKBService.session = PharmGKBSession(pool_size=max(args.concurrency), rate_limit=args.rate_limit,
+                                              burst=1 if args.rate_limit else None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vcf_path = os.path.join(tmp, 'patient.vcf')
+        write_vcf(vcf_path, args.variants)
+
+        baseline = None
+        for concurrency in args.concurrency:
+            PharmGKBService.cache = PharmGKBCache(os.path.join(tmp, f'cache_{concurrency}.sqlite3'))
+            before = stub.served['requests']
+            start = time.perf_counter()
+            result = process_vcf(vcf_path, lookup_concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+
+            order = [(entry['variant'], entry['description']) for entry in result['interactions']]
+            if baseline is None:
+                baseline = order
+            status = "same order" if order == baseline else "ORDER DIFFERS"
+            print(f"[concurrency {concurrency:>2}] {stub.served['requests'] - before} requests, "
+                  f"{len(order)} interactions, {elapsed:.2f}s ({status})")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+End-to-end import benchmark - VCF -> PharmGKB lookup -> import against the local stub
+
+Writes one VCF per patient (the variants of samplefiles/sample.vcf, a
+pool of rsIDs shared between patients and a few private ones) and runs
+each through process_vcf() and batch_import.import_result() - the path
+of the upload dialog and the batch importer - with lookups answered by
+the local PharmGKB stub (pharmgkb_stub) and rows written to an
+in-memory stand-in for the MySQL connection, so only the application's
+own costs and the simulated API are measured.
+
+Each scenario configures the stub, starts from a fresh response cache
+and database, imports every patient once, then re-imports re-issued
+files with --reissued new variants each (the re-import diff path):
+- steady: latency with jitter
+- flaky: a share of 503 errors, retried by the session
+- throttled: a server-side rate limit, paced by the client token bucket
+- outage: every request fails, until the circuit breaker opens
+It reports per pass the patients imported, PharmGKB requests (with 429s
+and 503s), session retries, failed lookups, interactions, and the time
+spent processing (validate, parse, look up) and importing.
+
+Usage:
+    python -m benchmarks.pharmgkb_end_to_end_benchmark --patients 6 --variants 40 --latency 0.1
+    python -m benchmarks.pharmgkb_end_to_end_benchmark --scenarios steady flaky --error-rate 0.1
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, List
+
+from batch_import import import_result
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from services.pharmgkb_service import PharmGKBService
+from services.vcf_import_service import VCFImportService
+from services.vcf_pipeline import process_vcf
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import CircuitBreaker, PharmGKBSession
+
+SAMPLE_VCF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samplefiles', 'sample.vcf')
+SCENARIOS = ('steady', 'flaky', 'throttled', 'outage')
+
+
+class _MemoryCursor:
+    """The statements VCFImportService issues, applied to MemoryDatabase"""
+
+    def __init__(self, db: 'MemoryDatabase'):
+        self.db = db
+        self._rows: List[Dict] = []
+
+    def execute(self, statement: str, params=()):
+        statement = ' '.join(statement.split())
+        self.db.statements += 1
+        self._rows = []
+        if statement.startswith('SELECT user_id FROM patientsinfo'):
+            self._rows = [{'user_id': user_id} for user_id in params if user_id in self.db.patients]
+        elif statement.startswith('SELECT variant, genotype, test_result FROM final_genetic_info'):
+            rows = self.db.genetic_info.get(params[0], {})
+            self._rows = [{'variant': variant, 'genotype': genotype, 'test_result': None}
+                          for variant, genotype in rows.items()]
+        elif statement.startswith('INSERT INTO final_genetic_info'):
+            user_id, _, variant, genotype = params[:4]
+            self.db.pending.append(lambda: self.db.genetic_info.setdefault(user_id, {}).__setitem__(variant, genotype))
+        elif statement.startswith('UPDATE final_genetic_info'):
+            genotype, _, user_id, variant = params
+            self.db.pending.append(lambda: self.db.genetic_info.setdefault(user_id, {}).__setitem__(variant, genotype))
+        elif statement.startswith('DELETE FROM final_genetic_info'):
+            user_id, variant = params
+            self.db.pending.append(lambda: self.db.genetic_info.get(user_id, {}).pop(variant, None))
+        elif statement.startswith('INSERT INTO drug_review'):
+            self.db.pending.append(lambda: setattr(self.db, 'drug_review_rows', self.db.drug_review_rows + 1))
+        else:
+            raise ValueError(f"MemoryDatabase does not support: {statement[:60]}")
+
+    def executemany(self, statement: str, seq_params: Iterable):
+        for params in seq_params:
+            self.execute(statement, params)
+
+    def fetchall(self) -> List[Dict]:
+        return self._rows
+
+
+class MemoryDatabase:
+    """
+    In-memory stand-in for DataBaseConnection's cursor/connection pair
+
+    Keeps final_genetic_info genotypes per patient and counts drug_review
+    upserts; writes only take effect on commit(), like a transaction.
+    """
+
+    def __init__(self, user_ids: Iterable[int]):
+        self.patients = set(user_ids)
+        self.genetic_info: Dict[int, Dict[str, str]] = {}
+        self.drug_review_rows = 0
+        self.statements = 0
+        self.pending = []
+        self.cursor = _MemoryCursor(self)
+        self.connection = self
+
+    def commit(self):
+        for write in self.pending:
+            write()
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+
+def write_patient_vcf(path: str, patient: int, shared: int, private: int, reissued: int = 0):
+    """sample.vcf's records plus shared, private and (for a re-issue) new rsIDs"""
+    with open(SAMPLE_VCF, 'r') as f:
+        sample = f.read().rstrip('\n')
+    rsids = ([f"rs{1000000 + i}" for i in range(shared)] +
+             [f"rs{2000000 + patient * 10000 + i}" for i in range(private)] +
+             [f"rs{3000000 + patient * 10000 + i}" for i in range(reissued)])
+    with open(path, 'w') as f:
+        f.write(sample + '\n')
+        for i, rsid in enumerate(rsids):
+            f.write(f"10\t{94700000 + i * 10}\t{rsid}\tA\tG\t50\tPASS\tGENE=CYP2C19;RSID={rsid}\n")
+
+
+def configure(stub: PharmGKBStub, scenario: str, args) -> PharmGKBSession:
+    """Set the stub's behaviour for a scenario; returns the client session to use"""
+    stub.rate_limit = args.server_limit if scenario == 'throttled' else 0
+    stub.error_rate = {'flaky': args.error_rate, 'outage': 1.0}.get(scenario, 0.0)
+    # A bucket allows rate + burst requests in any one second; keep that under the server's window
+    rate_limit = args.server_limit * 0.95 if scenario == 'throttled' else 0
+    return PharmGKBSession(pool_size=args.concurrency, timeout=5, rate_limit=rate_limit, burst=1,
+                           max_retries=5, backoff=0.1, breaker=CircuitBreaker(threshold=5, cooldown=60))
+
+
+def import_pass(label: str, stub: PharmGKBStub, db: MemoryDatabase, paths: Dict[int, str], args):
+    import_service = VCFImportService(db)
+    session = PharmGKBService.session
+    before = dict(stub.served)
+    before_retries = session.retries
+    counts = {'imported': 0, 'failed': 0}
+    lookups_failed = interactions = 0
+    processing = importing = 0.0
+
+    for user_id, path in paths.items():
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = process_vcf(path, stored_genotypes=import_service.load_stored_genotypes(user_id),
+                                 lookup_concurrency=args.concurrency)
+        processed = time.perf_counter()
+        lookups_failed += len(result['failed_lookups'])
+        try:
+            values = import_result(import_service, user_id, result, full=False)
+        except RuntimeError:
+            counts['failed'] += 1
+        else:
+            counts['imported'] += 1
+            interactions += values['interactions']
+        processing += processed - start
+        importing += time.perf_counter() - processed
+
+    served = {key: stub.served[key] - before[key] for key in stub.served}
+    print(f"[{label}] {counts['imported']}/{len(paths)} imported, {served['requests']} requests "
+          f"({served['throttled']} 429, {served['errors']} 503, {session.retries - before_retries} retries), "
+          f"{lookups_failed} failed lookups, {interactions} interactions, "
+          f"process {processing:.2f}s + import {importing * 1000:.1f}ms")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--patients', type=int, default=6)
+    arg_parser.add_argument('--variants', type=int, default=40, help="synthetic variants per patient")
+    arg_parser.add_argument('--shared', type=float, default=0.75, help="share of those common to all patients")
+    arg_parser.add_argument('--reissued', type=int, default=3, help="new variants per patient in the re-issue")
+    arg_parser.add_argument('--latency', type=float, default=0.1, help="stub response delay in seconds")
+    arg_parser.add_argument('--jitter', type=float, default=0.05, help="extra random stub delay, up to")
+    arg_parser.add_argument('--error-rate', type=float, default=0.05, help="share of 503s in the flaky scenario")
+    arg_parser.add_argument('--server-limit', type=float, default=20,
+                            help="stub requests/second before 429s in the throttled scenario")
+    arg_parser.add_argument('--concurrency', type=int, default=8)
+    arg_parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    args = arg_parser.parse_args()
+
+    shared = int(args.variants * args.shared)
+    user_ids = range(1001, 1001 + args.patients)
+    stub = PharmGKBStub(latency=args.latency, jitter=args.jitter, seed=1).start()
+    PharmGKBService.BASE_URL = stub.data_url
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = {user_id: os.path.join(tmp, f"{user_id}.vcf") for user_id in user_ids}
+        reissue = {user_id: os.path.join(tmp, f"{user_id}_reissue.vcf") for user_id in user_ids}
+        for user_id in user_ids:
+            write_patient_vcf(first[user_id], user_id, shared, args.variants - shared)
+            write_patient_vcf(reissue[user_id], user_id, shared, args.variants - shared, args.reissued)
+
+        for scenario in args.scenarios:
+            # Let the stub's rate window empty between scenarios
+            time.sleep(1)
+            PharmGKBService.session = configure(stub, scenario, args)
+            PharmGKBService.cache = PharmGKBCache(os.path.join(tmp, f'cache_{scenario}.sqlite3'))
+            db = MemoryDatabase(user_ids)
+            import_pass(f"{scenario}, first import", stub, db, first, args)
+            import_pass(f"{scenario}, re-import", stub, db, reissue, args)
+            print(f"  session: {PharmGKBService.session.stats()}")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
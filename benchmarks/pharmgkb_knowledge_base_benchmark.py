@@ -0,0 +1,83 @@
+"""
+Offline knowledge base benchmark - build time and lookup latency
+
+Writes synthetic clinical_annotations.tsv / var_drug_ann.tsv /
+drugLabels.tsv files at roughly PharmGKB's download sizes, builds the
+knowledge base from them, then times get_variant_annotations() for
+annotated and unknown rsIDs and get_gene_label_interactions().
+
+Usage:
+    python -m benchmarks.pharmgkb_knowledge_base_benchmark --annotations 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from services.pharmgkb_knowledge_base import PharmGKBKnowledgeBase
+
+DRUGS = ['clopidogrel', 'warfarin', 'simvastatin', 'codeine', 'tamoxifen', 'omeprazole', 'citalopram',
+         'fluorouracil', 'mercaptopurine', 'abacavir', 'tacrolimus', 'efavirenz']
+GENES = ['CYP2C19', 'CYP2C9', 'CYP2D6', 'SLCO1B1', 'TPMT', 'DPYD', 'VKORC1', 'CYP3A5', 'HLA-B', 'UGT1A1']
+
+
+def write_downloads(directory: str, n_annotations: int, seed: int = 9):
+    """Synthetic bulk files with n_annotations rows each of clinical and variant annotations"""
+    rng = random.Random(seed)
+    with open(os.path.join(directory, 'clinical_annotations.tsv'), 'w') as f:
+        f.write('Clinical Annotation ID\tVariant/Haplotypes\tGene\tLevel of Evidence\tPhenotype Category\t'
+                'Drug(s)\tPhenotype(s)\tURL\n')
+        for i in range(n_annotations):
+            f.write(f"{i}\trs{rng.randint(1, n_annotations * 10)}\t{rng.choice(GENES)}\t"
+                    f"{rng.choice(['1A', '1B', '2A', '2B', '3', '4'])}\tToxicity\t"
+                    f"{';'.join(rng.sample(DRUGS, rng.randint(1, 2)))}\tAdverse reaction\t"
+                    f"https://www.pharmgkb.org/clinicalAnnotation/{i}\n")
+    with open(os.path.join(directory, 'var_drug_ann.tsv'), 'w') as f:
+        f.write('Variant Annotation ID\tVariant/Haplotypes\tGene\tDrug(s)\tSignificance\tSentence\n')
+        for i in range(n_annotations):
+            drug = rng.choice(DRUGS)
+            f.write(f"{i}\trs{rng.randint(1, n_annotations * 10)}\t{rng.choice(GENES)}\t{drug}\t"
+                    f"{rng.choice(['yes', 'no', 'not stated'])}\tAllele A is associated with response to {drug}.\n")
+    with open(os.path.join(directory, 'drugLabels.tsv'), 'w') as f:
+        f.write('PharmGKB ID\tName\tChemicals\tGenes\n')
+        for i in range(1000):
+            f.write(f"PA{i}\tLabel {i}\t{rng.choice(DRUGS)}\t{';'.join(rng.sample(GENES, 2))}\n")
+
+
+def per_call_us(fn, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--annotations', type=int, default=100_000)
+    arg_parser.add_argument('--lookups', type=int, default=50_000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Generating synthetic PharmGKB downloads...")
+        write_downloads(tmp, args.annotations)
+        path = os.path.join(tmp, 'kb.sqlite3')
+
+        start = time.perf_counter()
+        counts = PharmGKBKnowledgeBase.build(path, [tmp])
+        print(f"Built {counts['variant_annotations']:,} annotations, {counts['gene_labels']:,} label pairs "
+              f"in {time.perf_counter() - start:.2f}s ({os.path.getsize(path) / 2**20:.1f} MB)")
+
+        kb = PharmGKBKnowledgeBase(path)
+        rng = random.Random(2)
+        annotated = [f"rs{rng.randint(1, args.annotations * 10)}" for _ in range(args.lookups)]
+        unknown = [f"rs{args.annotations * 10 + i}" for i in range(args.lookups)]
+        genes = [rng.choice(GENES) for _ in range(args.lookups)]
+
+        print(f"get_variant_annotations (random rsIDs): {per_call_us(kb.get_variant_annotations, annotated):.1f} us/call")
+        print(f"get_variant_annotations (unknown rsIDs): {per_call_us(kb.get_variant_annotations, unknown):.1f} us/call")
+        print(f"get_gene_label_interactions: {per_call_us(kb.get_gene_label_interactions, genes):.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+PharmGKB outage benchmark - circuit breaker and negative caching
+
+Outage: points PharmGKBService at a local socket that accepts connections
+but never answers (a hung API), and runs process_vcf() on a synthetic
+VCF with and without the circuit breaker. It reports the wall time,
+failed lookups and when the "lookup degraded" status fired. The default
+timeout is shortened to --timeout to keep the run short.
+
+Negative caching: serves 404s for a share of the rsIDs from the local PharmGKB stub
+(pharmgkb_stub), and processes the same VCF twice with one
+cache. It reports the requests of each run.
+
+Usage:
+    python -m benchmarks.pharmgkb_outage_benchmark --variants 40 --timeout 1
+"""
+import argparse
+import contextlib
+import io
+import os
+import socket
+import tempfile
+import time
+
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from benchmarks.pharmgkb_concurrency_benchmark import write_vcf
+from services.pharmgkb_service import PharmGKBService
+from services.vcf_pipeline import process_vcf
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import CircuitBreaker, PharmGKBSession
+
+
+def outage(vcf_path: str, tmp: str, args):
+    blackhole = socket.socket()
+    blackhole.bind(('127.0.0.1', 0))
+    blackhole.listen(1024)
+    PharmGKBService.BASE_URL = f"http://127.0.0.1:{blackhole.getsockname()[1]}/v1/data"
+
+    for label, breaker in (("no breaker", None), ("circuit breaker", CircuitBreaker(threshold=5, cooldown=60))):
+        PharmGKBService.session = PharmGKBSession(timeout=args.timeout, max_retries=2, backoff=0.1, breaker=breaker)
+        PharmGKBService.cache = PharmGKBCache(os.path.join(tmp, f'outage_{label[0]}.sqlite3'))
+        start = time.perf_counter()
+        degraded_at = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = process_vcf(vcf_path, lookup_concurrency=args.concurrency,
+                                 degraded=lambda message: degraded_at.append(time.perf_counter() - start))
+        elapsed = time.perf_counter() - start
+        status = f"degraded status after {degraded_at[0]:.1f}s" if degraded_at else "no degraded status"
+        print(f"[outage, {label}] {len(result['failed_lookups'])} failed lookups, {elapsed:.1f}s, {status}")
+    blackhole.close()
+
+
+def negative_cache(vcf_path: str, tmp: str, args):
+    missing = {f"rs{1000000 + i}" for i in range(0, args.variants, 3)}
+    stub = PharmGKBStub(latency=0.05, missing=missing).start()
+    PharmGKBService.BASE_URL = stub.data_url
+    PharmGKBService.session = PharmGKBSession(pool_size=args.concurrency)
+    PharmGKBService.cache = PharmGKBCache(os.path.join(tmp, 'negative.sqlite3'))
+
+    for run in (1, 2):
+        before = stub.served['requests']
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = process_vcf(vcf_path, lookup_concurrency=args.concurrency)
+        print(f"[no-data rsIDs, run {run}] {stub.served['requests'] - before} requests "
+              f"({len(missing)} rsIDs without annotations), {len(result['failed_lookups'])} failed lookups")
+    print(f"Cache: {PharmGKBService.cache.stats()}")
+    stub.shutdown()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--variants', type=int, default=40)
+    arg_parser.add_argument('--timeout', type=float, default=1.0, help="request timeout in seconds")
+    arg_parser.add_argument('--concurrency', type=int, default=8)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vcf_path = os.path.join(tmp, 'patient.vcf')
+        write_vcf(vcf_path, args.variants)
+        outage(vcf_path, tmp, args)
+        negative_cache(vcf_path, tmp, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+PharmGKB rate limit benchmark - throughput and lost lookups against a rate-limited API
+
+Serves variantAnnotation responses from the local PharmGKB
+stub (pharmgkb_stub), which answers 429 (Retry-After: 1) beyond
+--server-limit requests per second. It runs process_vcf() on a synthetic
+VCF with concurrent lookups, each time with a fresh response cache:
+- no client limit and no retries (the previous behaviour)
+- retries with backoff only
+- the client token bucket at the server's limit plus retries
+It reports requests, 429s, failed lookups, interactions and wall time.
+
+Usage:
+    python -m benchmarks.pharmgkb_rate_limit_benchmark --variants 200 --server-limit 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from benchmarks.pharmgkb_concurrency_benchmark import write_vcf
+from services.pharmgkb_service import PharmGKBService
+from services.vcf_pipeline import process_vcf
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import PharmGKBSession
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--variants', type=int, default=200)
+    arg_parser.add_argument('--server-limit', type=float, default=20, help="stub requests/second before 429s")
+    arg_parser.add_argument('--latency', type=float, default=0.05, help="stub response delay in seconds")
+    arg_parser.add_argument('--concurrency', type=int, default=8)
+    args = arg_parser.parse_args()
+
+    stub = PharmGKBStub(latency=args.latency, rate_limit=args.server_limit).start()
+    PharmGKBService.BASE_URL = stub.data_url
+    configurations = [
+        ("no limit, no retries", dict(max_retries=0)),
+        ("retries only", dict(max_retries=8, backoff=0.25)),
+        # A bucket allows rate + burst requests in any one second; keep that under the server's window
+        (f"token bucket {args.server_limit * 0.95:g}/s + retries",
+         dict(rate_limit=args.server_limit * 0.95, burst=1, max_retries=8, backoff=0.25)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vcf_path = os.path.join(tmp, 'patient.vcf')
+        write_vcf(vcf_path, args.variants)
+
+        for index, (label, options) in enumerate(configurations):
+            # Let the stub's window empty between runs
+            time.sleep(1)
+            PharmGKBService.session = PharmGKBSession(**options)
+            PharmGKBService.cache = PharmGKBCache(os.path.join(tmp, f'cache_{index}.sqlite3'))
+            before = dict(stub.served)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = process_vcf(vcf_path, lookup_concurrency=args.concurrency)
+            elapsed = time.perf_counter() - start
+            print(f"[{label}] {stub.served['requests'] - before['requests']} requests, "
+                  f"{stub.served['throttled'] - before['throttled']} throttled, "
+                  f"{len(result['failed_lookups'])} failed lookups, {len(result['interactions'])} interactions, "
+                  f"{elapsed:.2f}s ({args.variants / elapsed:.1f} lookups/s)")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
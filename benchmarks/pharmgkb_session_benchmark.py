@@ -0,0 +1,59 @@
+"""
+PharmGKB session benchmark - per-lookup latency with and without connection reuse
+
+Serves variantAnnotation responses from the local PharmGKB
+stub (pharmgkb_stub), charging --handshake seconds per new connection
+(the TCP + TLS setup of a WAN link) and --latency per request. It looks
+up the same variants through PharmGKBService twice, each time with a
+fresh response cache:
+- with a connection per request (the previous requests.get behaviour)
+- with the shared keep-alive PharmGKBSession
+It reports the connections opened and the mean time per lookup.
+
+Usage:
+    python -m benchmarks.pharmgkb_session_benchmark --lookups 50 --latency 0.05 --handshake 0.15
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.pharmgkb_stub import PharmGKBStub
+from services.pharmgkb_service import PharmGKBService
+from ui.utils.pharmgkb_cache import PharmGKBCache
+from ui.utils.pharmgkb_http import PharmGKBSession
+
+
+def run(label: str, session: PharmGKBSession, rsids, stub: PharmGKBStub, cache_path: str):
+    PharmGKBService.session = session
+    PharmGKBService.cache = PharmGKBCache(cache_path)
+    before = stub.served['connections']
+    start = time.perf_counter()
+    for rsid in rsids:
+        PharmGKBService.get_variant_annotations(rsid)
+    elapsed = time.perf_counter() - start
+    stats = session.stats()
+    print(f"[{label}] {len(rsids)} lookups, {stub.served['connections'] - before} connections opened "
+          f"({stats['reused']} reused), {elapsed / len(rsids) * 1000:.0f} ms/lookup")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--lookups', type=int, default=50)
+    arg_parser.add_argument('--latency', type=float, default=0.05, help="stub response delay in seconds")
+    arg_parser.add_argument('--handshake', type=float, default=0.15, help="delay per new connection in seconds")
+    args = arg_parser.parse_args()
+
+    stub = PharmGKBStub(latency=args.latency, connect_latency=args.handshake).start()
+    PharmGKBService.BASE_URL = stub.data_url
+    rsids = [f"rs{1000000 + i}" for i in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run("connection per request", PharmGKBSession(headers={'Connection': 'close'}), rsids, stub,
+            os.path.join(tmp, 'cold.sqlite3'))
+        run("keep-alive session", PharmGKBSession(), rsids, stub, os.path.join(tmp, 'pooled.sqlite3'))
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+PharmGKB stub server - local stand-in for api.pharmgkb.org
+
+Answers the four endpoints the app calls, from fixture files of canned
+responses (samplefiles/pharmgkb/api_responses.json by default):
+    /v1/data/variantAnnotation?location.fingerprint=<rsID>   PharmGKBService
+    /v1/data/label?relatedGenes.symbol=<gene>                PharmGKBService
+    /v1/genes?query=<gene>                                   PharmGKBClient
+    /v1/variants?query=<rsID>                                PharmGKBClient
+Keys missing from the fixtures get a generated record (or a 404 with
+--no-synthesize), so synthetic VCFs of any size can be looked up.
+
+Latency, per-connection handshake cost, a server-side rate limit (429
+with Retry-After: 1, like the real API) and a share of 503 errors are
+configurable, and can be changed on a running stub. Every benchmark of
+the lookup layer runs against it; run it standalone to point the app or
+batch_import.py at it through PHARMGKB_API_URL.
+
+Usage:
+    python -m benchmarks.pharmgkb_stub --port 8765 --latency 0.2 --rate-limit 2 --error-rate 0.05
+    PHARMGKB_API_URL=http://127.0.0.1:8765/v1 python batch_import.py /data/lab_drop
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'samplefiles', 'pharmgkb', 'api_responses.json')
+
+# Request path -> (fixture section, query parameter holding the key)
+ENDPOINTS = {
+    '/v1/data/variantAnnotation': ('variantAnnotation', 'location.fingerprint'),
+    '/v1/data/label': ('label', 'relatedGenes.symbol'),
+    '/v1/genes': ('genes', 'query'),
+    '/v1/variants': ('variants', 'query'),
+}
+
+
+def load_fixtures(paths: Iterable[str]) -> Dict[str, Dict[str, List[Dict]]]:
+    """Merge fixture files into {section: {key: records}}; later files win per key"""
+    fixtures = {section: {} for section, _ in ENDPOINTS.values()}
+    for path in paths:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        for section in fixtures:
+            fixtures[section].update(data.get(section, {}))
+    return fixtures
+
+
+def synthesized_record(key: str) -> Dict:
+    """Generated record for a key the fixtures don't cover, readable by every endpoint's client"""
+    return {
+        'score': 3,
+        'sentence': f'Genotype of {key} is associated with altered response.',
+        'relatedChemicals': [{'name': 'clopidogrel', 'url': 'https://www.pharmgkb.org/chemical/PA449053'}],
+        # Shape of the /genes and /variants search results read by PharmGKBClient
+        'relatedDrugs': [{'name': 'clopidogrel', 'summary': f'Consider alternatives for {key}.'}],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        stub = self.server.stub
+        stub._count('connections')
+        time.sleep(stub.connect_latency)
+        super().setup()
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        status, body = stub.respond(url.path, parse_qs(url.query))
+
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class PharmGKBStub:
+    """
+    Local PharmGKB API on a background thread
+
+    Connections are kept alive (HTTP/1.1). connect_latency is added once
+    per new connection, standing in for the TCP + TLS handshake, and
+    latency (plus up to jitter) per answered request. With a rate_limit,
+    requests beyond that many in the last second get a 429 before any
+    latency. A request passing the limit fails with a 503 with probability
+    error_rate. Variants in missing get a 404 (no annotations), as does
+    any other key the fixtures lack when synthesize is off.
+
+    served counts 'requests', 'connections', 'throttled' (429), 'errors'
+    (503), 'not_found' (404) and requests per fixture section.
+    """
+
+    def __init__(self, fixtures: Optional[Dict[str, Dict[str, List[Dict]]]] = None, latency: float = 0.0,
+                 jitter: float = 0.0, connect_latency: float = 0.0, rate_limit: float = 0,
+                 error_rate: float = 0.0, missing: Iterable[str] = (), synthesize: bool = True,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            fixtures: {section: {key: records}} (default: the bundled api_responses.json)
+            latency: Seconds per answered request
+            jitter: Extra seconds per request, uniform in [0, jitter]
+            connect_latency: Seconds per new connection
+            rate_limit: Requests per second before 429s (0 = unlimited)
+            error_rate: Share of requests answered 503
+            missing: Keys answered 404 whatever the fixtures say
+            synthesize: Generate records for keys the fixtures lack (else 404)
+            seed: Seed for jitter and error injection, for repeatable runs
+        """
+        self.fixtures = fixtures if fixtures is not None else load_fixtures([DEFAULT_FIXTURES])
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_latency = connect_latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.missing = set(missing)
+        self.synthesize = synthesize
+        self.served = {'requests': 0, 'connections': 0, 'throttled': 0, 'errors': 0, 'not_found': 0,
+                       **{section: 0 for section, _ in ENDPOINTS.values()}}
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> 'PharmGKBStub':
+        """Serve on host:port (0 = a free port) from a daemon thread"""
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'PharmGKBStub':
+        return self.start() if self._server is None else self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_port
+
+    @property
+    def url(self) -> str:
+        """API root, the value for PHARMGKB_API_URL / PharmGKBClient.BASE_URL"""
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    @property
+    def data_url(self) -> str:
+        """Data endpoint root, the value for PharmGKBService.BASE_URL"""
+        return f"{self.url}/data"
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.served[counter] += 1
+
+    def respond(self, path: str, query: Dict[str, List[str]]):
+        """(status, JSON body or None) for one request; sleeps for the configured latency"""
+        with self._lock:
+            self.served['requests'] += 1
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 1:
+                self._recent.popleft()
+            if self.rate_limit > 0 and len(self._recent) >= self.rate_limit:
+                self.served['throttled'] += 1
+                return 429, None
+            self._recent.append(now)
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+        time.sleep(delay)
+        if failed:
+            self._count('errors')
+            return 503, None
+
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            self._count('not_found')
+            return 404, None
+        section, parameter = endpoint
+        self._count(section)
+
+        key = query.get(parameter, [''])[0]
+        records = self.fixtures[section].get(key) if key not in self.missing else None
+        if records is None and self.synthesize and key and key not in self.missing:
+            records = [synthesized_record(key)]
+        if records is None:
+            self._count('not_found')
+            return 404, None
+        return 200, {'data': records}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--fixtures', nargs='+', default=[DEFAULT_FIXTURES],
+                            help="response fixture JSON files (later files win per key)")
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="seconds per request")
+    arg_parser.add_argument('--jitter', type=float, default=0.0, help="extra random seconds per request, up to")
+    arg_parser.add_argument('--connect-latency', type=float, default=0.0, help="seconds per new connection")
+    arg_parser.add_argument('--rate-limit', type=float, default=0, help="requests/second before 429s (0 = none)")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 503")
+    arg_parser.add_argument('--no-synthesize', action='store_true', help="404 for keys missing from the fixtures")
+    args = arg_parser.parse_args()
+
+    stub = PharmGKBStub(load_fixtures(args.fixtures), latency=args.latency, jitter=args.jitter,
+                        connect_latency=args.connect_latency, rate_limit=args.rate_limit,
+                        error_rate=args.error_rate, synthesize=not args.no_synthesize)
+    stub.start(args.host, args.port)
+    print(f"PharmGKB stub listening on http://{args.host}:{stub.port}/v1 - "
+          f"set PHARMGKB_API_URL to point the app at it. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.shutdown()
+        print(f"Served: {stub.served}")
+
+
+if __name__ == "__main__":
+    main()
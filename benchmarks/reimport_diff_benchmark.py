@@ -0,0 +1,71 @@
+"""
+Re-import benchmark - diffing a re-issued VCF against stored genotypes
+
+Parses a synthetic VCF, stores it as a patient's existing genotypes, then
+"re-issues" it with a small share of genotypes changed and variants
+dropped. Times the one-pass VariantDiff over the re-issued records and
+compares the PharmGKB lookups and row writes a diff import needs against
+a full re-import, using the ~0.5s per lookup noted in the integration
+guide.
+
+Usage:
+    python -m benchmarks.reimport_diff_benchmark --records 100000 --changed 0.01
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from services.vcf_import_service import VariantDiff
+from ui.utils.variant_normalizer import normalize_variants
+from ui.utils.vcf_parser import VCFParser
+
+SECONDS_PER_LOOKUP = 0.5
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=100_000)
+    arg_parser.add_argument('--changed', type=float, default=0.01,
+                            help="share of variants with a different genotype in the re-issue")
+    arg_parser.add_argument('--removed', type=float, default=0.005,
+                            help="share of stored variants missing from the re-issue")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patient.vcf')
+        print("Generating synthetic VCF...")
+        write_synthetic_vcf(path, args.records)
+        variants = list(normalize_variants(VCFParser(path).iter_variants_mmap()))
+
+    stored = {}
+    reissued = []
+    for variant in variants:
+        roll = rng.random()
+        if roll < args.changed:
+            stored[variant.key] = ('0/0', True)
+        else:
+            stored.setdefault(variant.key, (variant.genotype, True))
+        if roll > 1 - args.removed:
+            continue
+        reissued.append(variant)
+
+    start = time.perf_counter()
+    diff = VariantDiff(stored, prune=True)
+    lookups = sum(diff.add(variant) for variant in reissued)
+    diff.finish()
+    elapsed = time.perf_counter() - start
+
+    full = len({variant.rsid for variant in reissued})
+    print(f"Diffed {len(reissued):,} records against {len(stored):,} stored in {elapsed:.3f}s: {diff.summary()}")
+    print(f"PharmGKB lookups: full re-import {full:,} (~{full * SECONDS_PER_LOOKUP / 60:,.0f} min), "
+          f"diff {lookups:,} (~{lookups * SECONDS_PER_LOOKUP:,.0f} s)")
+    print(f"Row writes: full re-import {len(reissued):,}, "
+          f"diff {len(diff.added) + len(diff.changed) + len(diff.removed):,}")
+
+
+if __name__ == "__main__":
+    main()
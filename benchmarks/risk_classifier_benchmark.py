@@ -0,0 +1,85 @@
+"""
+Risk classifier benchmark - keyword risk levels per second, previous scans vs compiled rules
+
+Generates PharmGKB-style summaries and VCF impact strings (most repeated,
+as when a gene's drugs fan out to every variant of the gene), then times:
+- the previous _determine_risk_level() any()-scans
+- RiskClassifier.classify() per item
+- RiskClassifier.classify_many() over the whole list
+It checks that all three agree on every item.
+
+Usage:
+    python -m benchmarks.risk_classifier_benchmark --items 200000
+"""
+import argparse
+import random
+import time
+
+from ui.utils.risk_classifier import RiskClassifier
+
+PHRASES = ['Patients with this genotype', 'may have', 'an increased risk of myopathy', 'reduced clearance of',
+           'consider an alternative drug', 'use with caution', 'no evidence of altered response',
+           'minimal effect on exposure', 'contraindicated in poor metabolizers', 'avoid use', 'high risk of toxicity',
+           'significant association with', 'moderate decrease in activity', 'enhanced response to',
+           'as compared to', 'the reference allele', 'low risk', 'dose adjustment is recommended',
+           'decreased function allele', 'loss of function', 'loss-of-function']
+IMPACTS = [None, None, '', 'HIGH', 'MODERATE', 'LOW', 'MODIFIER', 'loss of function', 'decreased function',
+           'increased function', 'Increased risk of myopathy', 'missense_variant']
+
+
+def legacy_risk_level(drug_info, impact=None):
+    """The previous PharmGKBClient._determine_risk_level(), verbatim"""
+    if impact:
+        impact_lower = impact.lower()
+        if any(word in impact_lower for word in ['loss of function', 'contraindicated', 'avoid']):
+            return 'High'
+        elif any(word in impact_lower for word in ['decreased', 'reduced', 'impaired', 'myopathy', 'increased risk']):
+            return 'Moderate'
+        elif any(word in impact_lower for word in ['increased', 'enhanced']):
+            return 'Low'
+
+    summary = drug_info.get('summary', '').lower()
+
+    if any(word in summary for word in ['contraindicated', 'avoid', 'high risk', 'significant']):
+        return 'High'
+    elif any(word in summary for word in ['moderate', 'consider', 'caution']):
+        return 'Moderate'
+    elif any(word in summary for word in ['minimal', 'no evidence', 'low risk']):
+        return 'Low'
+    else:
+        return 'Unknown'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--items', type=int, default=200_000)
+    arg_parser.add_argument('--distinct', type=int, default=2_000, help="distinct summaries")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(4)
+    pool = [' '.join(rng.sample(PHRASES, rng.randint(2, 6))).capitalize() + '.' for _ in range(args.distinct)]
+    summaries = [rng.choice(pool) for _ in range(args.items)]
+    impacts = [rng.choice(IMPACTS) for _ in range(args.items)]
+    classifier = RiskClassifier.load_default()
+
+    start = time.perf_counter()
+    legacy = [legacy_risk_level({'summary': s}, i) for s, i in zip(summaries, impacts)]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [classifier.classify(s, i) for s, i in zip(summaries, impacts)]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classifier.classify_many(summaries, impacts)
+    batch_s = time.perf_counter() - start
+
+    for label, seconds in (("previous any() scans", legacy_s), ("classify()", single_s),
+                           ("classify_many()", batch_s)):
+        print(f"{label:>22}: {args.items / seconds:>12,.0f} items/s ({seconds:.3f}s)")
+    agree = legacy == single == batch
+    print("All classifications identical" if agree else "Classifications DIFFER")
+
+
+if __name__ == "__main__":
+    main()
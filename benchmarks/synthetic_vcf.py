@@ -0,0 +1,87 @@
+"""Synthetic VCF generator shared by the benchmark scripts"""
+import random
+
+# (chrom, pos, gene) of a handful of well-known pharmacogenomic sites
+PHARMACOGENE_SITES = [
+    ('1', 97450058, 'DPYD'),
+    ('6', 18130918, 'TPMT'),
+    ('10', 94761900, 'CYP2C19'),
+    ('10', 94781859, 'CYP2C19'),
+    ('10', 94981296, 'CYP2C9'),
+    ('12', 21178615, 'SLCO1B1'),
+    ('16', 31096368, 'VKORC1'),
+    ('22', 42130692, 'CYP2D6'),
+]
+
+CHROMOSOMES = [str(c) for c in range(1, 23)]
+CHROM_LENGTH = 150_000_000
+BASES = 'ACGT'
+GENOTYPES = ['0/0', '0/1', '1/1', '0|1', '1|0']
+
+
+def _variant_line(rng, chrom, pos, rsid, info, n_samples):
+    ref = rng.choice(BASES)
+    alt = rng.choice(BASES.replace(ref, ''))
+    sample_cols = "\t".join(
+        f"{rng.choice(GENOTYPES)}:{rng.randint(5, 40)}" for _ in range(n_samples)
+    )
+    return f"{chrom}\t{pos}\t{rsid}\t{ref}\t{alt}\t{rng.randint(20, 99)}\tPASS\t{info}\tGT:DP\t{sample_cols}\n"
+
+
+def write_synthetic_vcf(path: str, n_records: int, n_samples: int = 1,
+                        records_per_gene: int = 25, seed: int = 42) -> str:
+    """
+    Write a coordinate-sorted, whole-genome-like VCF to path
+
+    n_records background variants are spread evenly across chromosomes
+    1-22. Each pharmacogene site additionally gets a cluster of
+    records_per_gene annotated records around it, so panel-based filters
+    have something realistic to find. Returns the path.
+    """
+    rng = random.Random(seed)
+    samples = [f"SAMPLE{i + 1:03d}" for i in range(n_samples)]
+    per_chrom = max(n_records // len(CHROMOSOMES), 1)
+    mean_gap = max(CHROM_LENGTH // per_chrom, 2)
+
+    with open(path, 'w') as f:
+        f.write("##fileformat=VCFv4.2\n")
+        f.write("##reference=GRCh38\n")
+        f.write("##source=PharmacoGenomics_Synthetic_VCF\n")
+        f.write('##INFO=<ID=GENE,Number=1,Type=String,Description="Gene name">\n')
+        f.write('##INFO=<ID=IMPACT,Number=1,Type=String,Description="Clinical impact">\n')
+        f.write('##INFO=<ID=DP,Number=1,Type=Integer,Description="Total depth">\n')
+        f.write('##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n')
+        f.write('##FORMAT=<ID=DP,Number=1,Type=Integer,Description="Read depth">\n')
+        f.write("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\t" + "\t".join(samples) + "\n")
+
+        written = 0
+        for chrom_number, chrom in enumerate(CHROMOSOMES):
+            target = n_records - written if chrom_number == len(CHROMOSOMES) - 1 else per_chrom
+
+            # Gene clusters for this chromosome, as (pos, rsid, info) in order
+            gene_records = []
+            for site_chrom, site_pos, gene in PHARMACOGENE_SITES:
+                if site_chrom != chrom:
+                    continue
+                for k in range(records_per_gene):
+                    offset = (k - records_per_gene // 2) * 97
+                    rsid = f"rs{site_pos}" if offset == 0 else '.'
+                    info = f"GENE={gene};IMPACT=Reduced function;DP={rng.randint(10, 60)}"
+                    gene_records.append((site_pos + offset, rsid, info))
+            gene_records.sort()
+
+            pos = 0
+            g = 0
+            for _ in range(target):
+                pos += rng.randint(1, 2 * mean_gap)
+                while g < len(gene_records) and gene_records[g][0] <= pos:
+                    gene_pos, rsid, info = gene_records[g]
+                    f.write(_variant_line(rng, chrom, gene_pos, rsid, info, n_samples))
+                    g += 1
+                f.write(_variant_line(rng, chrom, pos, '.', f"DP={rng.randint(10, 60)}", n_samples))
+            written += target
+
+            for gene_pos, rsid, info in gene_records[g:]:
+                f.write(_variant_line(rng, chrom, gene_pos, rsid, info, n_samples))
+
+    return path
@@ -0,0 +1,66 @@
+"""
+Memory benchmark - dict records vs slotted Variant records
+
+Parses the same synthetic VCF lines into 1M records twice: once as the
+nine-key dicts VCFParser used to build, once as Variant records with
+interned chrom/gene/genotype/impact. Reports traced bytes per record.
+
+Usage:
+    python -m benchmarks.variant_memory_benchmark --records 1000000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from ui.utils.vcf_parser import VCFParser
+
+
+def as_dict(variant):
+    """Rebuild the pre-Variant dict record from freshly split (non-interned) strings"""
+    return {
+        'chrom': ''.join(variant.chrom),
+        'pos': str(variant.pos),
+        'ref': variant.ref,
+        'alt': variant.alt,
+        'rsid': variant.rsid,
+        'gene': ''.join(variant.gene),
+        'genotype': ''.join(variant.genotype) if variant.genotype else None,
+        'qual': variant.qual,
+        'impact': ''.join(variant.impact)
+    }
+
+
+def measure(label: str, vcf_path: str, convert):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = [convert(v) for v in VCFParser(vcf_path).iter_variants()]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"[{label:7}] {len(records):,} records: {current / (1024 * 1024):8.1f} MB "
+          f"({current / len(records):.0f} bytes/record, {elapsed:.1f}s traced)")
+    del records
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vcf_path = os.path.join(tmp, 'synthetic.vcf')
+        print(f"Generating {args.records:,}-record synthetic VCF...")
+        write_synthetic_vcf(vcf_path, args.records)
+
+        measure('dict', vcf_path, as_dict)
+        measure('Variant', vcf_path, lambda v: v)
+
+
+if __name__ == "__main__":
+    main()
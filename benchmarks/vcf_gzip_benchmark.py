@@ -0,0 +1,53 @@
+"""
+Throughput benchmark - plain vs gzip-compressed VCF input
+
+Writes the same synthetic VCF uncompressed and gzip-compressed, then
+streams both through VCFParser.iter_variants() and reports records/sec
+and MB/sec of uncompressed text.
+
+Usage:
+    python -m benchmarks.vcf_gzip_benchmark --records 1000000
+"""
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from ui.utils.vcf_parser import VCFParser
+
+
+def time_parse(path: str):
+    """Stream every record from path, return (records, seconds)"""
+    start = time.perf_counter()
+    count = sum(1 for _ in VCFParser(path).iter_variants())
+    return count, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = os.path.join(tmp, 'synthetic.vcf')
+        gz_path = plain_path + '.gz'
+
+        print(f"Generating {args.records:,}-record synthetic VCF...")
+        write_synthetic_vcf(plain_path, args.records)
+        with open(plain_path, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+
+        text_mb = os.path.getsize(plain_path) / (1024 * 1024)
+        print(f"Uncompressed: {text_mb:.1f} MB, gzip: {os.path.getsize(gz_path) / (1024 * 1024):.1f} MB")
+
+        for label, path in (('plain', plain_path), ('gzip', gz_path)):
+            count, elapsed = time_parse(path)
+            print(f"[{label:5}] {count:,} records in {elapsed:.2f}s - "
+                  f"{count / elapsed:,.0f} records/s, {text_mb / elapsed:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Memory benchmark - VCFParser.parse() vs streaming VCFParser.iter_variants()
+
+Generates a synthetic multi-million-line VCF and reports peak RSS sampled
+while each mode consumes the file. Each mode runs in its own subprocess so
+one mode's heap cannot hide the other's. The 'iter' mode measures the
+parser alone and discards every record; 'pipeline' keeps the normalized
+Variant records the way process_vcf() does for the Genomics table,
+diplotype calls and the save, so its RSS grows with the file. The
+'columnar' mode keeps every record too, but as VariantBatch chunks.
+
+Usage:
+    python -m benchmarks.vcf_memory_benchmark --records 3000000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, falls back to peak RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, vcf_path: str, sample_every: int):
+    """Consume the file in one mode and print RSS samples"""
+    from ui.utils.variant_normalizer import normalize_variants
+    from ui.utils.vcf_parser import VCFParser
+
+    parser = VCFParser(vcf_path)
+    start_rss = _rss_mb()
+    samples = []
+    start = time.perf_counter()
+    count = 0
+
+    if mode == 'parse':
+        variants = parser.parse()
+        count = len(variants)
+        samples.append((count, _rss_mb()))
+    elif mode == 'columnar':
+        batches = []
+        for batch in parser.iter_batches():
+            batches.append(batch)
+            count += len(batch)
+            if count % sample_every < len(batch):
+                samples.append((count, _rss_mb()))
+        samples.append((count, _rss_mb()))
+    elif mode == 'pipeline':
+        variants = []
+        for variant in normalize_variants(parser.iter_variants()):
+            variants.append(variant)
+            if len(variants) % sample_every == 0:
+                samples.append((len(variants), _rss_mb()))
+        count = len(variants)
+        samples.append((count, _rss_mb()))
+    else:
+        for count, _variant in enumerate(parser.iter_variants(), start=1):
+            if count % sample_every == 0:
+                samples.append((count, _rss_mb()))
+
+    elapsed = time.perf_counter() - start
+    peak = max(rss for _, rss in samples) if samples else _rss_mb()
+    print(f"[{mode}] records={count:,} time={elapsed:.1f}s "
+          f"start_rss={start_rss:.1f}MB peak_rss={peak:.1f}MB")
+    for n, rss in samples:
+        print(f"[{mode}]   after {n:>10,} records: {rss:8.1f} MB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=3_000_000)
+    arg_parser.add_argument('--sample-every', type=int, default=500_000)
+    arg_parser.add_argument('--mode', choices=['parse', 'iter', 'pipeline', 'columnar'])
+    arg_parser.add_argument('--vcf', help="Reuse an existing VCF instead of generating one")
+    args = arg_parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.vcf, args.sample_every)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vcf_path = args.vcf or os.path.join(tmp, 'synthetic.vcf')
+        if not args.vcf:
+            print(f"Generating {args.records:,}-record synthetic VCF...")
+            write_synthetic_vcf(vcf_path, args.records)
+        print(f"File size: {os.path.getsize(vcf_path) / (1024 * 1024):.1f} MB")
+
+        for mode in ('iter', 'pipeline', 'parse', 'columnar'):
+            subprocess.run([
+                sys.executable, '-m', 'benchmarks.vcf_memory_benchmark',
+                '--mode', mode, '--vcf', vcf_path,
+                '--sample-every', str(args.sample_every)
+            ], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Normalization benchmark - cost of the normalization stage and its effect on lookup keys
+
+Rewrites a synthetic VCF the way different pipelines emit the same sites:
+'chr'-prefixed chromosome names, a share of multi-allelic records, and
+indels padded with extra shared bases. Streams the original and the
+rewritten file through the parser with and without normalize_variants(),
+reporting throughput and how many distinct (key, ref, alt) lookups each
+produces. After normalization both files should agree.
+
+Usage:
+    python -m benchmarks.vcf_normalize_benchmark --records 500000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from ui.utils.variant_normalizer import normalize_variants
+from ui.utils.vcf_parser import VCFParser
+
+
+def rewrite_vcf(src_path: str, dest_path: str, multiallelic: float = 0.1, padded: float = 0.1,
+                seed: int = 3) -> str:
+    """Copy src_path with chr-prefixed names, merged multi-allelic ALTs and padded alleles"""
+    rng = random.Random(seed)
+    with open(src_path) as src, open(dest_path, 'w') as dest:
+        for line in src:
+            if line.startswith('#'):
+                dest.write(line)
+                continue
+
+            fields = line.rstrip('\n').split('\t')
+            fields[0] = f"chr{fields[0]}"
+            ref, alt = fields[3], fields[4]
+            roll = rng.random()
+            if roll < multiallelic:
+                # Same site plus a second ALT no sample carries
+                other = next(base for base in 'ACGT' if base not in (ref, alt))
+                fields[4] = f"{alt},{other}"
+            elif roll < multiallelic + padded:
+                # Same SNV written with a shared trailing base
+                fields[3], fields[4] = ref + 'T', alt + 'T'
+            dest.write('\t'.join(fields) + '\n')
+    return dest_path
+
+
+def scan(path: str, normalize: bool):
+    """Stream path, return (records, distinct lookup keys, seconds)"""
+    start = time.perf_counter()
+    variants = VCFParser(path).iter_variants_mmap()
+    if normalize:
+        variants = normalize_variants(variants)
+    keys = set()
+    records = 0
+    for variant in variants:
+        records += 1
+        keys.add((variant.chrom, variant.rsid, variant.ref, variant.alt))
+    return records, keys, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=500_000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original = os.path.join(tmp, 'original.vcf')
+        rewritten = os.path.join(tmp, 'rewritten.vcf')
+        print("Generating synthetic VCFs...")
+        write_synthetic_vcf(original, args.records)
+        rewrite_vcf(original, rewritten)
+
+        results = {}
+        for label, path in (('original', original), ('rewritten', rewritten)):
+            for normalize in (False, True):
+                records, keys, elapsed = scan(path, normalize)
+                results[label, normalize] = keys
+                mode = "normalized" if normalize else "raw"
+                print(f"[{label:9} {mode:10}] {records:,} records in {elapsed:.2f}s - "
+                      f"{records / elapsed:,.0f} records/s, {len(keys):,} distinct lookup keys")
+
+        shared_raw = len(results['original', False] & results['rewritten', False])
+        shared_norm = len(results['original', True] & results['rewritten', True])
+        print(f"Keys shared between the two files: raw {shared_raw:,}, normalized {shared_norm:,} "
+              f"of {len(results['original', True]):,}")
+
+
+if __name__ == "__main__":
+    main()
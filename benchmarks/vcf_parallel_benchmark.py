@@ -0,0 +1,58 @@
+"""
+Scaling benchmark - sequential vs process-pool VCF parsing
+
+Writes a synthetic VCF (plain and BGZF), then parses it with
+VCFParser.iter_variants() and with iter_variants_parallel() at each worker
+count, reporting wall time and speedup over the sequential parse. Results
+are checked against the sequential records.
+
+Usage:
+    python -m benchmarks.vcf_parallel_benchmark --records 1000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from ui.utils.bgzf import bgzip_file
+from ui.utils.vcf_parser import VCFParser
+
+
+def time_parse(records_iter):
+    """Drain an iterator of records, return (records list, seconds)"""
+    start = time.perf_counter()
+    records = list(records_iter)
+    return records, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=1_000_000)
+    arg_parser.add_argument('--samples', type=int, default=1)
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = arg_parser.parse_args()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = os.path.join(tmp, 'synthetic.vcf')
+        print(f"Generating {args.records:,}-record synthetic VCF...")
+        write_synthetic_vcf(plain_path, args.records, n_samples=args.samples)
+        bgzf_path = bgzip_file(plain_path)
+
+        multi_sample = args.samples > 1
+        for label, path in (('plain', plain_path), ('bgzf', bgzf_path)):
+            baseline, sequential = time_parse(VCFParser(path, multi_sample=multi_sample).iter_variants())
+            print(f"[{label:5}] sequential: {len(baseline):,} records in {sequential:.2f}s")
+
+            for workers in args.workers:
+                parser = VCFParser(path, multi_sample=multi_sample)
+                records, elapsed = time_parse(parser.iter_variants_parallel(workers))
+                status = "ok" if records == baseline else "MISMATCH"
+                print(f"[{label:5}] {workers} workers: {elapsed:.2f}s - "
+                      f"{sequential / elapsed:.2f}x ({status})")
+                del records
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Validation benchmark - time to reject a malformed VCF vs a full parse
+
+Writes a synthetic VCF, then copies of it with a defect near the top: a
+truncated record, a non-numeric POS and an invalid ALT. Reports how long
+the validation pre-pass takes on the good and each bad file, against
+the time a full parse of the file takes.
+
+Usage:
+    python -m benchmarks.vcf_validation_benchmark --records 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_vcf import write_synthetic_vcf
+from ui.utils.vcf_parser import VCFParser
+from ui.utils.vcf_validator import VCFValidator
+
+DEFECTS = {
+    'truncated record': lambda fields: fields[:6],
+    'non-numeric POS': lambda fields: [fields[0], 'chr1:100'] + fields[2:],
+    'invalid ALT': lambda fields: fields[:4] + ['rs12345'] + fields[5:],
+}
+
+
+def corrupt_copy(src_path: str, dest_path: str, defect, record_number: int = 50) -> str:
+    """Copy src_path applying defect to the record_number-th record"""
+    records = 0
+    with open(src_path) as src, open(dest_path, 'w') as dest:
+        for line in src:
+            if not line.startswith('#'):
+                records += 1
+                if records == record_number:
+                    line = '\t'.join(defect(line.rstrip('\n').split('\t'))) + '\n'
+            dest.write(line)
+    return dest_path
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--records', type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    validator = VCFValidator()
+    with tempfile.TemporaryDirectory() as tmp:
+        good = os.path.join(tmp, 'good.vcf')
+        print("Generating synthetic VCF...")
+        write_synthetic_vcf(good, args.records)
+
+        start = time.perf_counter()
+        records = sum(1 for _ in VCFParser(good).iter_variants_mmap())
+        print(f"Full parse: {records:,} records in {time.perf_counter() - start:.2f}s")
+
+        files = [('valid', good)] + [
+            (label, corrupt_copy(good, os.path.join(tmp, f'bad{i}.vcf'), defect))
+            for i, (label, defect) in enumerate(DEFECTS.items())
+        ]
+        for label, path in files:
+            start = time.perf_counter()
+            report = validator.validate(path)
+            elapsed = (time.perf_counter() - start) * 1000
+            outcome = "ok" if report.ok else f"rejected ({report.errors[0]})"
+            print(f"[{label:16}] validated in {elapsed:.1f}ms - {outcome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from .database import DatabaseConfig
+from .pharmgkb import PharmGKBConfig
 from .theme import Theme
 from .constants import UIConstants
 
-__all__ = ['DatabaseConfig', 'Theme', 'UIConstants']
+__all__ = ['DatabaseConfig', 'PharmGKBConfig', 'Theme', 'UIConstants']
@@ -0,0 +1,51 @@
+import math
+import os
+from dataclasses import dataclass
+
+from .database import _project_root
+
+
+@dataclass
+class PharmGKBConfig:
+    """PharmGKB client settings - reads from .env file (loaded by config.database)"""
+    # API root shared by PharmGKBService (<root>/data/...) and PharmGKBClient;
+    # point it at benchmarks/pharmgkb_stub.py to run against a local stand-in
+    API_URL: str = os.getenv('PHARMGKB_API_URL', 'https://api.pharmgkb.org/v1').rstrip('/')
+
+    # Persistent response cache shared by PharmGKBService and PharmGKBClient
+    CACHE_PATH: str = os.getenv('PHARMGKB_CACHE_PATH', str(_project_root / '.cache' / 'pharmgkb_cache.sqlite3'))
+    CACHE_TTL_HOURS: float = float(os.getenv('PHARMGKB_CACHE_TTL_HOURS', '168'))
+    CACHE_MAX_ENTRIES: int = int(os.getenv('PHARMGKB_CACHE_MAX_ENTRIES', '50000'))
+    # "No data" (404) answers are cached too, but re-checked sooner
+    CACHE_NEGATIVE_TTL_HOURS: float = float(os.getenv('PHARMGKB_CACHE_NEGATIVE_TTL_HOURS', '24'))
+
+    # Shared keep-alive HTTP session: connections kept per host, request timeout in seconds
+    HTTP_POOL_SIZE: int = int(os.getenv('PHARMGKB_HTTP_POOL_SIZE', '10'))
+    HTTP_TIMEOUT: float = float(os.getenv('PHARMGKB_HTTP_TIMEOUT', '10'))
+
+    # Client-side pacing shared by all lookup threads of a process (requests/second,
+    # 0 = unlimited) and burst size; any one second can see up to rate + burst
+    # requests, so keep that at or below the API's published limit
+    RATE_LIMIT: float = float(os.getenv('PHARMGKB_RATE_LIMIT', '2'))
+    RATE_BURST: float = float(os.getenv('PHARMGKB_RATE_BURST', '1'))
+    # Retries of 429/5xx responses and connection errors; backoff doubles from RETRY_BACKOFF seconds
+    MAX_RETRIES: int = int(os.getenv('PHARMGKB_MAX_RETRIES', '5'))
+    RETRY_BACKOFF: float = float(os.getenv('PHARMGKB_RETRY_BACKOFF', '0.5'))
+
+    # Circuit breaker: fail lookups fast for BREAKER_COOLDOWN seconds after
+    # BREAKER_THRESHOLD consecutive connection errors, timeouts or 5xx responses
+    BREAKER_THRESHOLD: int = int(os.getenv('PHARMGKB_BREAKER_THRESHOLD', '5'))
+    BREAKER_COOLDOWN: float = float(os.getenv('PHARMGKB_BREAKER_COOLDOWN', '60'))
+
+    # Variant lookups in flight at once while processing a VCF (1 = sequential).
+    # All threads share the RATE_LIMIT token bucket, so beyond about RATE_LIMIT x
+    # response time (~1 s) they only queue; the default follows the rate limit
+    # and is 8 when unlimited
+    LOOKUP_CONCURRENCY: int = int(os.getenv('PHARMGKB_LOOKUP_CONCURRENCY')
+                                  or (min(8, max(1, math.ceil(RATE_LIMIT))) if RATE_LIMIT > 0 else 8))
+
+    # 'api' queries api.pharmgkb.org; 'local' answers from the offline knowledge
+    # base built by import_pharmgkb_data.py
+    BACKEND: str = os.getenv('PHARMGKB_BACKEND', 'api').lower()
+    KNOWLEDGE_BASE_PATH: str = os.getenv('PHARMGKB_KNOWLEDGE_BASE_PATH',
+                                         str(_project_root / '.cache' / 'pharmgkb_kb.sqlite3'))
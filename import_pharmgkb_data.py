@@ -0,0 +1,41 @@
+"""
+PharmGKB import - build the offline knowledge base from PharmGKB bulk downloads
+
+Loads clinical_annotations.tsv, var_drug_ann.tsv (plus var_pheno_ann /
+var_fa_ann) and drugLabels.tsv - or the clinicalAnnotations.zip,
+variantAnnotations.zip and drugLabels.zip they ship in, from
+https://www.pharmgkb.org/downloads - into the local SQLite knowledge
+base. Set PHARMGKB_BACKEND=local in .env to answer lookups from it.
+
+Usage:
+    python import_pharmgkb_data.py ~/Downloads/pharmgkb
+    python import_pharmgkb_data.py samplefiles/pharmgkb --output /tmp/pharmgkb_kb.sqlite3
+"""
+import argparse
+import time
+
+from config import PharmGKBConfig
+from services.pharmgkb_knowledge_base import PharmGKBKnowledgeBase
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('sources', nargs='+', help="downloaded TSV/zip files or directories holding them")
+    arg_parser.add_argument('--output', default=PharmGKBConfig.KNOWLEDGE_BASE_PATH,
+                            help=f"knowledge base file (default: {PharmGKBConfig.KNOWLEDGE_BASE_PATH})")
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    counts = PharmGKBKnowledgeBase.build(args.output, args.sources)
+    if not any(counts.values()):
+        print("Warning: no annotation or label rows found - check the input files")
+
+    print(f"Loaded {counts['variant_annotations']:,} variant annotations and "
+          f"{counts['gene_labels']:,} gene/drug label pairs in {time.perf_counter() - start:.1f}s")
+    print(f"Knowledge base: {args.output}")
+    if PharmGKBConfig.BACKEND != 'local':
+        print("Set PHARMGKB_BACKEND=local in .env to use it for lookups")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,6 @@ import os
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QFontDatabase
 from PyQt6.QtCore import Qt
-from Login import LoginWindow
-from DataBaseConnection import DatabaseConnection
 from config import Theme, DatabaseConfig
 
 
@@ -26,6 +24,12 @@ def load_fonts():
 
 
 if __name__ == "__main__":
+    # Imported here, not at the top: spawn workers (the VCF parser pool)
+    # re-run this module's top level, and must not load the UI tree or
+    # open a database connection
+    from Login import LoginWindow
+    from DataBaseConnection import DatabaseConnection
+
     app = QApplication(sys.argv)
 
     # Load custom fonts first
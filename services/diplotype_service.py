@@ -0,0 +1,36 @@
+"""Service for calling star-allele diplotypes from stored genetic results"""
+from itertools import groupby
+from typing import Dict, Iterable, Optional
+
+from ui.utils.diplotype_caller import DiplotypeCall, DiplotypeCaller
+
+
+class DiplotypeService:
+    """Service layer for diplotype / metabolizer phenotype calls over final_genetic_info"""
+
+    def __init__(self, db_connection, caller: Optional[DiplotypeCaller] = None):
+        self.db_connection = db_connection
+        self.caller = caller or DiplotypeCaller.load_default()
+
+    def call_patient(self, user_id: int, genes: Optional[Iterable[str]] = None) -> Dict[str, DiplotypeCall]:
+        """Diplotypes for one patient's stored variants"""
+        cursor = self.db_connection.cursor
+        cursor.execute("SELECT variant, genotype FROM final_genetic_info WHERE user_id = %s", (user_id,))
+        return self.caller.call(cursor.fetchall(), genes)
+
+    def rescore_population(self, genes: Optional[Iterable[str]] = None) -> Dict[int, Dict[str, DiplotypeCall]]:
+        """
+        Diplotypes for every patient with stored variants, in one pass
+
+        Rows are read in a single query ordered by patient; identical
+        genotype patterns across patients are only scored once.
+        """
+        cursor = self.db_connection.cursor
+        cursor.execute("""
+            SELECT user_id, variant, genotype
+            FROM final_genetic_info
+            ORDER BY user_id
+        """)
+        rows = cursor.fetchall()
+        patients = ((user_id, list(group)) for user_id, group in groupby(rows, key=lambda row: row['user_id']))
+        return self.caller.call_population(patients, genes)
@@ -0,0 +1,214 @@
+"""Offline PharmGKB knowledge base built from PharmGKB's bulk annotation downloads"""
+import csv
+import io
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from services.pharmgkb_service import PharmGKBService
+
+# Clinical annotation evidence level -> score on the variantAnnotation scale
+# used by PharmGKBService.SCORE_THRESHOLDS (High >= 4, Moderate >= 2)
+LEVEL_SCORES = {'1A': 4, '1B': 4, '2A': 2, '2B': 2, '3': 0, '4': 0}
+
+# Multi-valued cells use ';' (clinical annotations, labels) or ', ' (variant
+# annotations), where a name containing ", " is double-quoted
+_SEMICOLON = re.compile(r'\s*;\s*')
+# A comma not followed by a space is part of a name ("2,4-dinitrophenol")
+_BARE_COMMA = re.compile(r',(?=\S)')
+_COMMA_PLACEHOLDER = '\ue000'
+
+VARIANT_ANNOTATION_FILES = ('var_drug_ann.tsv', 'var_pheno_ann.tsv', 'var_fa_ann.tsv')
+CLINICAL_ANNOTATION_FILE = 'clinical_annotations.tsv'
+DRUG_LABEL_FILE = 'drugLabels.tsv'
+
+
+def _split(cell: Optional[str]) -> List[str]:
+    values = []
+    for part in _SEMICOLON.split(cell or ''):
+        protected = _BARE_COMMA.sub(_COMMA_PLACEHOLDER, part)
+        for value in next(csv.reader([protected], skipinitialspace=True), []):
+            value = value.replace(_COMMA_PLACEHOLDER, ',').strip('" ')
+            if value:
+                values.append(value)
+    return values
+
+
+class PharmGKBKnowledgeBase:
+    """
+    Local, indexed copy of PharmGKB annotations
+
+    Serves the same lookups as PharmGKBService - get_variant_annotations()
+    and get_gene_label_interactions(), with the same return shapes - from
+    a SQLite file, so imports work offline and without rate limits. Build
+    it with build() from the TSVs (or the zips they ship in) at
+    https://www.pharmgkb.org/downloads:
+      - clinical_annotations.tsv - rsID -> drugs, scored by evidence level
+      - var_drug_ann.tsv (and var_pheno/var_fa) - rsID -> drugs with sentence
+      - drugLabels.tsv - gene -> labelled drugs
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"PharmGKB knowledge base not found: {path} (build it with import_pharmgkb_data.py)")
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+
+    @staticmethod
+    def _create_schema(db: sqlite3.Connection):
+        db.executescript("""
+            DROP TABLE IF EXISTS variant_annotations;
+            DROP TABLE IF EXISTS gene_labels;
+            DROP TABLE IF EXISTS metadata;
+            CREATE TABLE variant_annotations (
+                variant TEXT NOT NULL,
+                medication_name TEXT NOT NULL,
+                score REAL NOT NULL,
+                sentence TEXT,
+                url TEXT
+            );
+            CREATE TABLE gene_labels (
+                gene TEXT NOT NULL,
+                medication_name TEXT NOT NULL,
+                PRIMARY KEY (gene, medication_name)
+            ) WITHOUT ROWID;
+            CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    @classmethod
+    def build(cls, path: str, sources: Iterable[str]) -> Dict[str, int]:
+        """
+        (Re)build the knowledge base at path from downloaded files
+
+        Args:
+            sources: TSV files, zips of them, or directories holding either;
+                     unrecognised files are ignored
+
+        Returns:
+            {table: rows loaded}
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        db = sqlite3.connect(tmp_path)
+        cls._create_schema(db)
+        counts = {'variant_annotations': 0, 'gene_labels': 0}
+        for name, f in cls._iter_tables(sources):
+            # Quotes belong to the list syntax inside cells, not to the TSV itself
+            rows = csv.DictReader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+            if name == CLINICAL_ANNOTATION_FILE:
+                records = cls._clinical_annotation_rows(rows)
+            elif name in VARIANT_ANNOTATION_FILES:
+                records = cls._variant_annotation_rows(rows)
+            else:
+                labels = cls._drug_label_rows(rows)
+                before = db.total_changes
+                db.executemany("INSERT OR IGNORE INTO gene_labels VALUES (?, ?)", labels)
+                counts['gene_labels'] += db.total_changes - before
+                continue
+            before = db.total_changes
+            db.executemany("INSERT INTO variant_annotations VALUES (?, ?, ?, ?, ?)", records)
+            counts['variant_annotations'] += db.total_changes - before
+
+        # Index after loading - one sort instead of a b-tree insert per row
+        db.execute("CREATE INDEX idx_variant_annotations_variant ON variant_annotations (variant)")
+        db.execute("INSERT INTO metadata VALUES ('built', ?)", (datetime.now().isoformat(timespec='seconds'),))
+        db.commit()
+        db.close()
+        os.replace(tmp_path, path)
+        return counts
+
+    @staticmethod
+    def _iter_tables(sources: Iterable[str]) -> Iterator[Tuple[str, TextIO]]:
+        """(file name, open text file) for every recognised TSV in sources"""
+        wanted = set(VARIANT_ANNOTATION_FILES) | {CLINICAL_ANNOTATION_FILE, DRUG_LABEL_FILE}
+        for source in sources:
+            if os.path.isdir(source):
+                paths = [os.path.join(source, name) for name in sorted(os.listdir(source))]
+            else:
+                paths = [source]
+
+            for path in paths:
+                name = os.path.basename(path)
+                if zipfile.is_zipfile(path):
+                    with zipfile.ZipFile(path) as archive:
+                        for member in archive.namelist():
+                            if os.path.basename(member) in wanted:
+                                with archive.open(member) as raw:
+                                    yield os.path.basename(member), io.TextIOWrapper(raw, encoding='utf-8')
+                elif name in wanted:
+                    with open(path, 'r', encoding='utf-8', newline='') as f:
+                        yield name, f
+
+    @staticmethod
+    def _clinical_annotation_rows(rows) -> Iterator[Tuple[str, str, float, str, str]]:
+        for row in rows:
+            level = (row.get('Level of Evidence') or '').strip()
+            score = LEVEL_SCORES.get(level, 0)
+            phenotypes = (row.get('Phenotype(s)') or '').strip()
+            category = (row.get('Phenotype Category') or '').strip()
+            sentence = f"Level {level} clinical annotation ({category})"
+            if phenotypes:
+                sentence += f": {phenotypes}"
+            for variant in _split(row.get('Variant/Haplotypes')):
+                for drug in _split(row.get('Drug(s)')):
+                    yield variant.casefold(), drug, score, sentence, row.get('URL', '')
+
+    @staticmethod
+    def _variant_annotation_rows(rows) -> Iterator[Tuple[str, str, float, str, str]]:
+        for row in rows:
+            # Bulk variant annotations carry no score; a significant
+            # association scores Moderate, anything else Low
+            significant = (row.get('Significance') or '').strip().lower() == 'yes'
+            score = 2 if significant else 0
+            annotation_id = (row.get('Variant Annotation ID') or '').strip()
+            url = f"https://www.pharmgkb.org/variantAnnotation/{annotation_id}" if annotation_id else ''
+            for variant in _split(row.get('Variant/Haplotypes')):
+                for drug in _split(row.get('Drug(s)')):
+                    yield variant.casefold(), drug, score, row.get('Sentence', ''), url
+
+    @staticmethod
+    def _drug_label_rows(rows) -> Iterator[Tuple[str, str]]:
+        for row in rows:
+            drugs = _split(row.get('Chemicals'))
+            for gene in _split(row.get('Genes')):
+                for drug in drugs:
+                    yield gene.upper(), drug
+
+    def get_variant_annotations(self, variant_id: str) -> Tuple[List[Dict], bool]:
+        """Local equivalent of PharmGKBService.get_variant_annotations()"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT medication_name, score, sentence, url FROM variant_annotations WHERE variant = ?",
+                (variant_id.strip().casefold(),)
+            ).fetchall()
+
+        return [{
+            "medication_name": medication_name,
+            "risk_level": PharmGKBService._determine_risk_level(score),
+            "score": score,
+            "sentence": sentence,
+            "pgkb_url": url
+        } for medication_name, score, sentence, url in rows], True
+
+    def get_gene_label_interactions(self, gene_symbol: str) -> Tuple[List[str], bool]:
+        """Local equivalent of PharmGKBService.get_gene_label_interactions()"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT medication_name FROM gene_labels WHERE gene = ?", (gene_symbol.strip().upper(),)
+            ).fetchall()
+        return [name for (name,) in rows], True
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            annotations = self._db.execute("SELECT COUNT(*) FROM variant_annotations").fetchone()[0]
+            labels = self._db.execute("SELECT COUNT(*) FROM gene_labels").fetchone()[0]
+            built = self._db.execute("SELECT value FROM metadata WHERE key = 'built'").fetchone()
+        return {'variant_annotations': annotations, 'gene_labels': labels, 'built': built[0] if built else None}
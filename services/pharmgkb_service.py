@@ -1,13 +1,17 @@
 """PharmGKB API integration for drug-gene interaction lookup"""
 import requests
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 from datetime import datetime
 
+from config import PharmGKBConfig
+from ui.utils.pharmgkb_cache import PharmGKBCache, default_cache
+from ui.utils.pharmgkb_http import PharmGKBSession, default_session
+
 
 class PharmGKBService:
     """Service for calling PharmGKB API and processing variant annotations"""
 
-    BASE_URL = "https://api.pharmgkb.org/v1/data"
+    BASE_URL = f"{PharmGKBConfig.API_URL}/data"
     HEADERS = {"accept": "application/json"}
 
     # Score threshold for determining risk level
@@ -17,6 +21,57 @@ class PharmGKBService:
         "Low": 0
     }
 
+    # Response cache; None uses the shared on-disk default_cache()
+    cache: Optional[PharmGKBCache] = None
+
+    # Keep-alive HTTP session; None uses the shared default_session()
+    session: Optional[PharmGKBSession] = None
+
+    # Offline PharmGKBKnowledgeBase answering lookups instead of the API;
+    # opened on first use when PHARMGKB_BACKEND=local, or set directly
+    knowledge_base = None
+
+    @staticmethod
+    def _local_backend():
+        if PharmGKBService.knowledge_base is None and PharmGKBConfig.BACKEND == 'local':
+            # Imported here: the knowledge base module imports this one
+            from services.pharmgkb_knowledge_base import PharmGKBKnowledgeBase
+            PharmGKBService.knowledge_base = PharmGKBKnowledgeBase(PharmGKBConfig.KNOWLEDGE_BASE_PATH)
+        return PharmGKBService.knowledge_base
+
+    @staticmethod
+    def _get_json(url: str, params: Dict) -> Tuple[Optional[Any], int]:
+        """
+        GET a JSON endpoint through the response cache
+
+        Returns (decoded body, status code); body is None unless the status
+        is 200. Successful responses are cached, and 404s as negative
+        entries so known-empty variants are not re-queried.
+        """
+        cache = PharmGKBService.cache or default_cache()
+        entry = cache.lookup(url, params)
+        if entry is not None:
+            return entry
+
+        session = PharmGKBService.session or default_session()
+        response = session.get(url, params=params, headers=PharmGKBService.HEADERS)
+        if response.status_code == 404:
+            cache.put(url, params, None, status=404)
+        if response.status_code != 200:
+            return None, response.status_code
+
+        body = response.json()
+        cache.put(url, params, body)
+        return body, 200
+
+    @staticmethod
+    def lookup_degraded() -> bool:
+        """True while the API circuit breaker is open, i.e. lookups are failing fast"""
+        if PharmGKBService._local_backend() is not None:
+            return False
+        breaker = (PharmGKBService.session or default_session()).breaker
+        return breaker is not None and breaker.state == 'open'
+
     @staticmethod
     def get_variant_annotations(variant_id: str) -> Tuple[List[Dict], bool]:
         """
@@ -28,19 +83,28 @@ class PharmGKBService:
         Returns:
             Tuple of (medication_conflicts, success)
             medication_conflicts: List of dicts with medication name and risk info
-            success: Boolean indicating if API call succeeded
+            success: False if the lookup failed (after the session's retries) -
+                     the variant's annotations are unknown, not absent
         """
-        try:
-            # Construct URL with variant fingerprint
-            url = f"{PharmGKBService.BASE_URL}/variantAnnotation?location.fingerprint={variant_id}&view=full"
+        local = PharmGKBService._local_backend()
+        if local is not None:
+            return local.get_variant_annotations(variant_id)
 
-            response = requests.get(url, headers=PharmGKBService.HEADERS, timeout=10)
-
-            if response.status_code != 200:
-                print(f"PharmGKB API error: {response.status_code}")
+        try:
+            # Query by variant fingerprint (served from the cache when seen before)
+            body, status = PharmGKBService._get_json(
+                f"{PharmGKBService.BASE_URL}/variantAnnotation",
+                {"location.fingerprint": variant_id, "view": "full"}
+            )
+
+            # 404: PharmGKB has no annotations for this variant - an answer, not a failure
+            if status == 404:
+                return [], True
+            if status != 200:
+                print(f"PharmGKB API error: {status}")
                 return [], False
 
-            data = response.json().get("data", [])
+            data = body.get("data", [])
             medication_conflicts = []
 
             # Process each annotation
@@ -84,16 +148,22 @@ class PharmGKBService:
         Returns:
             Tuple of (medication_names, success)
         """
-        try:
-            url = f"{PharmGKBService.BASE_URL}/label?relatedGenes.symbol={gene_symbol}"
+        local = PharmGKBService._local_backend()
+        if local is not None:
+            return local.get_gene_label_interactions(gene_symbol)
 
-            response = requests.get(url, headers=PharmGKBService.HEADERS, timeout=10)
-
-            if response.status_code != 200:
-                print(f"PharmGKB label API error: {response.status_code}")
+        try:
+            body, status = PharmGKBService._get_json(
+                f"{PharmGKBService.BASE_URL}/label", {"relatedGenes.symbol": gene_symbol}
+            )
+
+            if status == 404:
+                return [], True
+            if status != 200:
+                print(f"PharmGKB label API error: {status}")
                 return [], False
 
-            data = response.json().get("data", [])
+            data = body.get("data", [])
             medication_names = set()
 
             for item in data:
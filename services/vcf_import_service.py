@@ -0,0 +1,260 @@
+"""Service for writing parsed VCF variants and drug interactions to the database"""
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ui.utils.diplotype_caller import allele_copies
+from ui.utils.variant import Variant
+
+
+@dataclass
+class VariantDiff:
+    """
+    Delta between a patient's stored genotypes and a re-issued VCF
+
+    Built in one pass over the parsed records: each record is looked up by
+    its storage key (Variant.key - the rsID, plus the ALT for an allele of
+    a split multi-allelic site) in the stored {variant: (genotype,
+    from_vcf)} map and classified as added, changed or unchanged. Records
+    repeating an already seen key are ignored.
+
+    Removal is opt-in: only with prune are the stored VCF rows not seen by
+    the end listed as removed. A second VCF that is simply different (other
+    panel or lab) would otherwise delete everything the first one stored,
+    and a panel-only scan never sees the rows outside the panel regions.
+    """
+    stored: Dict[str, Tuple[Optional[str], bool]]
+    prune: bool = False
+    added: List[Variant] = field(default_factory=list)
+    changed: List[Variant] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    _seen: set = field(default_factory=set, repr=False)
+
+    def add(self, variant: Variant) -> bool:
+        """Classify one record; True if it is new or its genotype changed"""
+        key = variant.key
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+
+        previous = self.stored.get(key)
+        if previous is None:
+            self.added.append(variant)
+            return True
+        if previous[0] != variant.genotype:
+            self.changed.append(variant)
+            return True
+        self.unchanged += 1
+        return False
+
+    def finish(self) -> 'VariantDiff':
+        """Collect stored VCF rows absent from the new file (only when pruning)"""
+        if self.prune:
+            self.removed = [key for key, (_, from_vcf) in self.stored.items()
+                            if from_vcf and key not in self._seen]
+        return self
+
+    def defer(self, rsids: Iterable[str]) -> int:
+        """
+        Leave added variants out of this import; returns how many were dropped
+
+        For new variants whose PharmGKB lookup failed: stored now, the next
+        re-import would see them as unchanged and never look them up. Left
+        out, they are added (and looked up) next time. Changed variants keep
+        the interactions already looked up for their rsID, so they stay.
+        """
+        rsids = set(rsids)
+        before = len(self.added)
+        self.added = [variant for variant in self.added if variant.rsid not in rsids]
+        return before - len(self.added)
+
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.changed)} changed, "
+                f"{len(self.removed)} removed, {self.unchanged} unchanged")
+
+
+class VCFImportService:
+    """Service layer for VCF imports into final_genetic_info / drug_review"""
+
+    def __init__(self, db_connection):
+        self.db_connection = db_connection
+
+    @staticmethod
+    def load_sample_manifest(path: str) -> Dict[str, int]:
+        """
+        Load a sample manifest CSV mapping VCF sample names to patient user_ids
+
+        Expects two columns (sample_id, user_id); a header row is skipped.
+        """
+        manifest = {}
+        with open(path, 'r', newline='') as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[1].strip().isdigit():
+                    continue
+                manifest[row[0].strip()] = int(row[1].strip())
+        return manifest
+
+    def resolve_sample_user_ids(self, sample_names: Iterable[str],
+                                manifest: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        Map VCF sample names to existing patientsinfo.user_id values
+
+        A sample maps through the manifest if listed there, otherwise a purely
+        numeric sample name is taken as the user_id itself. Samples whose
+        user_id does not exist in patientsinfo are left out.
+        """
+        manifest = manifest or {}
+        candidates = {}
+        for name in sample_names:
+            if name in manifest:
+                candidates[name] = manifest[name]
+            elif name.isdigit():
+                candidates[name] = int(name)
+
+        if not candidates:
+            return {}
+
+        user_ids = sorted(set(candidates.values()))
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor = self.db_connection.cursor
+        cursor.execute(f"SELECT user_id FROM patientsinfo WHERE user_id IN ({placeholders})", user_ids)
+        existing = {row['user_id'] for row in cursor.fetchall()}
+
+        return {name: user_id for name, user_id in candidates.items() if user_id in existing}
+
+    def save_variants(self, user_id: int, variants: List[Variant]) -> int:
+        """Upsert parsed Variant records into final_genetic_info (caller commits)"""
+        cursor = self.db_connection.cursor
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        for variant in variants:
+            cursor.execute("""
+                INSERT INTO final_genetic_info
+                (user_id, gene, variant, genotype, date_tested)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE genotype = VALUES(genotype), date_tested = VALUES(date_tested)
+            """, (
+                user_id,
+                variant.gene,
+                variant.key,
+                variant.genotype,
+                today
+            ))
+
+        return len(variants)
+
+    def load_stored_genotypes(self, user_id: int) -> Dict[str, Tuple[Optional[str], bool]]:
+        """
+        A patient's final_genetic_info rows keyed by variant ID
+
+        Returns {variant: (genotype, from_vcf)}; from_vcf marks rows written by
+        a VCF import (no test_result), the only rows a re-import may remove.
+        """
+        cursor = self.db_connection.cursor
+        cursor.execute("""
+            SELECT variant, genotype, test_result
+            FROM final_genetic_info
+            WHERE user_id = %s
+            ORDER BY id
+        """, (user_id,))
+
+        stored = {}
+        for row in cursor.fetchall():
+            if row['variant'] and row['variant'] not in stored:
+                stored[row['variant']] = (row['genotype'], row['test_result'] is None)
+        return stored
+
+    def apply_diff(self, user_id: int, diff: VariantDiff) -> Tuple[int, int, int]:
+        """
+        Write only the delta of a re-import (caller commits)
+
+        Inserts added variants, updates the genotype of changed ones and,
+        for a pruning diff, deletes the stored VCF rows missing from the new
+        file. Returns (added, changed, removed).
+        """
+        cursor = self.db_connection.cursor
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        if diff.added:
+            cursor.executemany("""
+                INSERT INTO final_genetic_info
+                (user_id, gene, variant, genotype, date_tested)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [(user_id, v.gene, v.key, v.genotype, today) for v in diff.added])
+
+        if diff.changed:
+            cursor.executemany("""
+                UPDATE final_genetic_info
+                SET genotype = %s, date_tested = %s
+                WHERE user_id = %s AND variant = %s
+            """, [(v.genotype, today, user_id, v.key) for v in diff.changed])
+
+        if diff.removed:
+            cursor.executemany("""
+                DELETE FROM final_genetic_info
+                WHERE user_id = %s AND variant = %s AND test_result IS NULL
+            """, [(user_id, variant) for variant in diff.removed])
+
+        return len(diff.added), len(diff.changed), len(diff.removed)
+
+    def save_interactions(self, user_id: int, interactions: List[Dict]) -> int:
+        """Upsert drug interaction entries into drug_review (caller commits)"""
+        cursor = self.db_connection.cursor
+
+        for interaction in interactions:
+            # Use SubQuery to get medication_id - matches PharmGKBService approach
+            cursor.execute("""
+                INSERT INTO drug_review
+                (user_id, medication_id, gene, variant, risk_level, notes, status)
+                SELECT %s, m.medication_id, %s, %s, %s, %s, 'active'
+                FROM medications m
+                WHERE m.medication_name = %s
+                ON DUPLICATE KEY UPDATE
+                    risk_level = VALUES(risk_level),
+                    notes = VALUES(notes),
+                    status = 'active'
+            """, (
+                user_id,
+                interaction['gene'],
+                interaction['variant'],
+                interaction['risk_level'],
+                interaction['description'] + " | " + interaction['notes'],
+                interaction['medication_name']
+            ))
+
+        return len(interactions)
+
+    def import_samples(self, sample_variants: Dict[str, List[Variant]], interactions: List[Dict],
+                       sample_user_ids: Dict[str, int]) -> Tuple[int, int, int]:
+        """
+        Import a multi-sample VCF in one transaction
+
+        Each mapped sample receives its own variants plus the interactions for
+        variants it carries (at least one non-reference allele; hom-ref and
+        missing calls get none). Returns (patients, variants, interactions) imported.
+        """
+        interactions_by_variant: Dict[str, List[Dict]] = {}
+        for interaction in interactions:
+            interactions_by_variant.setdefault(interaction['variant'], []).append(interaction)
+
+        patients = imported_variants = imported_interactions = 0
+        try:
+            for sample, variants in sample_variants.items():
+                user_id = sample_user_ids.get(sample)
+                if user_id is None:
+                    continue
+
+                imported_variants += self.save_variants(user_id, variants)
+                carried = [i for v in variants if allele_copies(v.genotype)
+                           for i in interactions_by_variant.get(v.rsid, [])]
+                imported_interactions += self.save_interactions(user_id, carried)
+                patients += 1
+
+            self.db_connection.connection.commit()
+            return patients, imported_variants, imported_interactions
+
+        except Exception:
+            self.db_connection.connection.rollback()
+            raise
@@ -0,0 +1,209 @@
+"""VCF processing pipeline - parse, normalize, look up and call diplotypes for one file"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from config import PharmGKBConfig
+from services.pharmgkb_service import PharmGKBService
+from services.vcf_import_service import VariantDiff
+from ui.utils.diplotype_caller import DiplotypeCaller, allele_copies
+from ui.utils.variant_normalizer import normalize_variants
+from ui.utils.vcf_parser import VCFParser
+from ui.utils.vcf_validator import VCFValidationError, VCFValidator
+
+
+def process_vcf(vcf_file_path: str, panel_only: bool = False, multi_sample: bool = False,
+                workers: int = 1, stored_genotypes: Optional[Dict[str, Tuple[Optional[str], bool]]] = None,
+                progress: Optional[Callable[[str], None]] = None,
+                lookup_concurrency: Optional[int] = None,
+                degraded: Optional[Callable[[str], None]] = None, prune: bool = False) -> Dict:
+    """
+    Parse a VCF and query PharmGKB for its variants
+
+    Shared by the upload dialog's background worker and the headless batch
+    importer; nothing here touches Qt or the database.
+
+    Args:
+        vcf_file_path: Plain, gzip or bgzip VCF
+        panel_only: Restrict to the pharmacogene panel regions
+        multi_sample: Keep every sample column (plate VCFs)
+        workers: Parser processes for full-file scans (1 = sequential mmap scan)
+        stored_genotypes: Patient's existing {variant: (genotype, from_vcf)};
+                          when given only new or changed variants are looked up
+                          and the result carries the VariantDiff
+        progress: Called with human-readable status messages
+        lookup_concurrency: PharmGKB lookups in flight at once (default
+                            PharmGKBConfig.LOOKUP_CONCURRENCY; 1 = sequential)
+        degraded: Called once with a status message if the PharmGKB circuit
+                  breaker opens - the remaining lookups then fail fast
+        prune: List stored VCF variants missing from this file in the diff's
+               removed (ignored with panel_only: rows outside the panel
+               regions are never seen, so nothing can be judged missing)
+
+    Returns:
+        dict with 'variants' (Variant records), 'interactions', 'diplotypes',
+        'failed_lookups' (rsIDs whose lookup failed), 'lookup_degraded',
+        'diff' in re-import mode and, for multi-sample, 'samples' and
+        'sample_diplotypes'
+
+    Raises:
+        VCFValidationError: If the validation pre-pass finds errors
+        ValueError: If the file has no variant records
+    """
+    progress = progress or (lambda message: None)
+
+    # Reject malformed files before any parsing or API calls
+    progress("Validating VCF...")
+    report = VCFValidator().validate(vcf_file_path, multi_sample=multi_sample, panel_only=panel_only)
+    for issue in report.warnings:
+        progress(f"⚠ {issue}")
+    if not report.ok:
+        raise VCFValidationError(report)
+
+    # Stream variants straight from the parser into the lookup stage, so no
+    # raw lines or intermediate dicts pile up; the Variant records themselves
+    # are kept for the Genomics tab, the diplotype calls and the save
+    progress("Parsing VCF file...")
+    parser = VCFParser(vcf_file_path, multi_sample=multi_sample)
+    service = PharmGKBService()
+
+    drug_review_entries = []
+    variant_entries = []
+    sample_entries = {}
+    diff = VariantDiff(stored_genotypes, prune=prune and not panel_only) if stored_genotypes is not None else None
+
+    if panel_only:
+        progress("Extracting pharmacogene panel regions...")
+        variants = parser.iter_panel_variants()
+    elif workers > 1:
+        variants = parser.iter_variants_parallel(
+            workers, progress=lambda done, total: progress(f"Parsed chunk {done}/{total}")
+        )
+    elif not multi_sample and len(report.sample_names) >= VCFParser.MMAP_MIN_SAMPLES:
+        # Wide file, one sample wanted: the mmap scan leaves the other columns unsplit
+        variants = parser.iter_variants_mmap()
+    else:
+        variants = parser.iter_variants()
+
+    # Lookups are network-bound, so they run on a bounded thread pool while
+    # parsing continues; results are drained in submission order, keeping
+    # interactions in file order. The local knowledge base answers in
+    # microseconds and is queried inline.
+    concurrency = lookup_concurrency or PharmGKBConfig.LOOKUP_CONCURRENCY
+    if service._local_backend() is not None:
+        concurrency = 1
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='pharmgkb') if concurrency > 1 else None
+    pending = deque()
+    failed_lookups = []
+    lookup_degraded = False
+
+    def drain(limit: int):
+        nonlocal lookup_degraded
+        while len(pending) > limit:
+            variant, lookup = pending.popleft()
+            conflicts, success = lookup.result() if executor else lookup
+            if not success:
+                failed_lookups.append(variant.rsid)
+                # Say so as soon as the API is known to be down, not when the file is done
+                if not lookup_degraded and service.lookup_degraded():
+                    lookup_degraded = True
+                    message = ("PharmGKB lookup degraded: the API is not responding - continuing without "
+                               "interactions for the remaining variants")
+                    progress(f"⚠ {message}")
+                    if degraded:
+                        degraded(message)
+
+            # Add any interactions found to drug review
+            if success and conflicts:
+                for conflict in conflicts:
+                    drug_review_entries.append({
+                        'medication_name': conflict['medication_name'],
+                        'gene': variant.gene,
+                        'variant': variant.rsid,
+                        'risk_level': conflict['risk_level'],
+                        'description': conflict['sentence'],
+                        'notes': conflict.get('pgkb_url', '')
+                    })
+
+    # Split multi-allelics and canonicalize alleles/chromosomes so
+    # equivalent records share one lookup key
+    looked_up = set()
+    try:
+        for variant in normalize_variants(variants):
+            variant_id = variant.rsid
+
+            # Add all variants to genomics tab (regardless of interactions)
+            variant_entries.append(variant)
+
+            # Per-sample records on a plate VCF: only the variants a sample carries,
+            # as hom-ref and missing calls would flag patients for every site's
+            # interactions. Samples with only hom-ref calls still get an (empty) entry.
+            if multi_sample:
+                for sample, genotype in variant.genotypes.items():
+                    if genotype:
+                        carried = sample_entries.setdefault(sample, [])
+                        if allele_copies(genotype):
+                            carried.append(variant.with_genotype(genotype))
+
+            # Re-import: stored variants with an unchanged genotype were looked up last time
+            if diff is not None and not diff.add(variant):
+                continue
+
+            if not variant_id or variant_id in looked_up:
+                continue
+            looked_up.add(variant_id)
+
+            # Query PharmGKB for this variant
+            progress(f"Querying PharmGKB for {variant_id}...")
+            if executor:
+                pending.append((variant, executor.submit(service.get_variant_annotations, variant_id)))
+                # Keep the pool busy while the oldest lookup is awaited
+                drain(concurrency * 2)
+            else:
+                pending.append((variant, service.get_variant_annotations(variant_id)))
+                drain(0)
+
+        if pending:
+            progress(f"Waiting for {len(pending)} PharmGKB lookups...")
+        drain(0)
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if not variant_entries:
+        raise ValueError("No variants found in VCF file")
+
+    # Star-allele diplotypes from the combined variants (per sample for plate VCFs)
+    caller = DiplotypeCaller.load_default()
+    diplotypes = caller.call(variant_entries)
+    for call in diplotypes.values():
+        progress(f"{call.gene} {call.diplotype}: {call.phenotype}")
+
+    # Combine results: variants + interactions
+    result = {
+        'variants': variant_entries,
+        'interactions': drug_review_entries,
+        'diplotypes': diplotypes,
+        'failed_lookups': failed_lookups,
+        'lookup_degraded': lookup_degraded
+    }
+    if failed_lookups:
+        progress(f"⚠ PharmGKB lookup failed for {len(failed_lookups)} variants after retries "
+                 f"(rate limited or unavailable) - their interactions are missing")
+    if diff is not None:
+        result['diff'] = diff.finish()
+        progress(f"Changes since last import: {diff.summary()}")
+    if multi_sample:
+        result['samples'] = sample_entries
+        result['sample_diplotypes'] = caller.call_population(sample_entries.items())
+
+    summary = f"Found {len(variant_entries)} variants. "
+    if multi_sample:
+        summary += f"{len(sample_entries)} of {len(parser.sample_names)} samples have genotype calls. "
+    if drug_review_entries:
+        summary += f"{len(drug_review_entries)} drug interactions detected."
+    else:
+        summary += "No drug interactions found in PharmGKB."
+
+    progress(f"Processing complete! {summary}")
+    return result
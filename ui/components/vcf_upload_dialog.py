@@ -1,104 +1,47 @@
 """VCF Upload Dialog - Upload and process VCF files for genetic variants"""
+import os
+from typing import Dict, Optional
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox,
-    QFileDialog, QProgressDialog, QTextEdit
+    QFileDialog, QProgressDialog, QTextEdit, QCheckBox
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from ui.utils.vcf_parser import VCFParser
-from services.pharmgkb_service import PharmGKBService
-from datetime import datetime
+from services.vcf_import_service import VCFImportService
+from services.vcf_pipeline import process_vcf
+from ui.utils.vcf_validator import VCFValidator
 
 
 class VCFProcessWorker(QThread):
     """Background worker to process VCF file"""
     progress = pyqtSignal(str)
-    finished = pyqtSignal(dict)  # Emits dict with 'variants' and 'interactions'
+    finished = pyqtSignal(dict)  # Emits dict with 'variants' (Variant records), 'interactions', 'diplotypes', 'diff' in re-import mode and, for multi-sample, 'samples'
     error = pyqtSignal(str)
+    degraded = pyqtSignal(str)  # PharmGKB circuit breaker opened; lookups now fail fast
 
-    def __init__(self, vcf_file_path: str):
+    def __init__(self, vcf_file_path: str, panel_only: bool = False, multi_sample: bool = False,
+                 workers: int = 1, stored_genotypes: Optional[Dict] = None):
         super().__init__()
         self.vcf_file_path = vcf_file_path
+        self.panel_only = panel_only
+        self.multi_sample = multi_sample
+        self.workers = workers
+        # Patient's existing {variant: (genotype, from_vcf)}; when set only the delta is looked up
+        self.stored_genotypes = stored_genotypes
 
     def run(self):
         """Parse VCF and query PharmGKB"""
         try:
-            # Step 1: Parse VCF
-            self.progress.emit("Parsing VCF file...")
-            parser = VCFParser(self.vcf_file_path)
-            variants = parser.parse()
-
-            if not variants:
-                self.error.emit("No variants found in VCF file")
-                return
-
-            self.progress.emit(f"Found {len(variants)} variants. Querying PharmGKB...")
-
-            # Step 2: Query PharmGKB for each variant
-            service = PharmGKBService()
-            all_interactions = []
-
-            for variant in variants:
-                variant_id = variant.get('rsid', '')
-                if not variant_id:
-                    continue
-
-                self.progress.emit(f"Querying PharmGKB for {variant_id}...")
-                conflicts, success = service.get_variant_annotations(variant_id)
-
-                if success and conflicts:
-                    for conflict in conflicts:
-                        interaction = {
-                            'drug_name': conflict['medication_name'],
-                            'gene': variant.get('gene', 'Unknown'),
-                            'variant': variant_id,
-                            'risk_level': conflict['risk_level'],
-                            'clinical_annotation': conflict['sentence'],
-                            'dosing_guideline': conflict.get('pgkb_url', '')
-                        }
-                        all_interactions.append(interaction)
-
-            # Step 3: Prepare drug_review entries AND variant entries
-            self.progress.emit(f"Processing {len(variants)} variants...")
-
-            drug_review_entries = []
-            variant_entries = []
-
-            # Add all variants to genomics tab (regardless of interactions)
-            for variant in variants:
-                variant_entry = {
-                    'gene': variant.get('gene', 'Unknown'),
-                    'variant': variant.get('rsid', ''),
-                    'genotype': variant.get('genotype', 'Unknown'),
-                    'source': 'vcf_upload'
-                }
-                variant_entries.append(variant_entry)
-
-            # Add any interactions found to drug review
-            if all_interactions:
-                for interaction in all_interactions:
-                    entry = {
-                        'medication_name': interaction['drug_name'],
-                        'gene': interaction['gene'],
-                        'variant': interaction['variant'],
-                        'risk_level': interaction['risk_level'],
-                        'description': interaction['clinical_annotation'],
-                        'notes': interaction['dosing_guideline']
-                    }
-                    drug_review_entries.append(entry)
-
-            # Combine results: variants + interactions
-            result = {
-                'variants': variant_entries,
-                'interactions': drug_review_entries
-            }
-
-            summary = f"Found {len(variant_entries)} variants. "
-            if drug_review_entries:
-                summary += f"{len(drug_review_entries)} drug interactions detected."
-            else:
-                summary += "No drug interactions found in PharmGKB."
-
-            self.progress.emit(f"Processing complete! {summary}")
+            result = process_vcf(
+                self.vcf_file_path,
+                panel_only=self.panel_only,
+                multi_sample=self.multi_sample,
+                workers=self.workers,
+                stored_genotypes=self.stored_genotypes,
+                progress=self.progress.emit,
+                degraded=self.degraded.emit,
+                # Removals are listed for review; import_diff() asks before deleting any
+                prune=True
+            )
             self.finished.emit(result)
 
         except Exception as e:
@@ -108,6 +51,10 @@ class VCFProcessWorker(QThread):
 class VCFUploadDialog(QDialog):
     """Dialog for uploading and processing VCF files"""
 
+    # Parser processes for large full-file scans: each is a fresh interpreter
+    # started from the GUI process, so a few rather than one per core
+    MAX_PARSE_WORKERS = 2
+
     def __init__(self, db_connection, user_id: int, parent=None):
         super().__init__(parent)
         self.db_connection = db_connection
@@ -115,6 +62,9 @@ class VCFUploadDialog(QDialog):
         self.vcf_file_path = None
         self.variants = []
         self.drug_interactions = []
+        self.sample_variants = {}
+        self.sample_manifest = {}
+        self.variant_diff = None
         self.worker = None
 
         self.setWindowTitle(f"Upload VCF File - Patient {user_id}")
@@ -137,6 +87,29 @@ class VCFUploadDialog(QDialog):
 
         layout.addLayout(file_layout)
 
+        self.panel_only_check = QCheckBox("Pharmacogene panel only (indexed lookup for bgzipped VCFs)")
+        self.panel_only_check.setChecked(False)
+        layout.addWidget(self.panel_only_check)
+
+        self.diff_check = QCheckBox("Only import changes since the last upload (re-issued VCF)")
+        self.diff_check.setChecked(False)
+        layout.addWidget(self.diff_check)
+
+        # Multi-sample plate import
+        sample_layout = QHBoxLayout()
+        self.multi_sample_check = QCheckBox("Multi-sample VCF (import every sample column)")
+        sample_layout.addWidget(self.multi_sample_check)
+
+        self.manifest_label = QLabel("No sample manifest")
+        sample_layout.addWidget(self.manifest_label)
+
+        manifest_btn = QPushButton("Sample Manifest...")
+        manifest_btn.setProperty("cssClass", "secondary")
+        manifest_btn.clicked.connect(self.browse_manifest)
+        sample_layout.addWidget(manifest_btn)
+
+        layout.addLayout(sample_layout)
+
         # Progress/Output
         self.output_text = QTextEdit()
         self.output_text.setReadOnly(True)
@@ -144,6 +117,13 @@ class VCFUploadDialog(QDialog):
         layout.addWidget(QLabel("Processing Log:"))
         layout.addWidget(self.output_text)
 
+        # PharmGKB availability - shown only when lookups are degraded
+        self.lookup_status_label = QLabel("")
+        self.lookup_status_label.setProperty("cssClass", "badge-warning")
+        self.lookup_status_label.setWordWrap(True)
+        self.lookup_status_label.hide()
+        layout.addWidget(self.lookup_status_label)
+
         # Summary
         self.summary_label = QLabel("")
         layout.addWidget(self.summary_label)
@@ -184,31 +164,102 @@ class VCFUploadDialog(QDialog):
             self.file_label.setText(file_path.split('/')[-1])
             self.output_text.append(f"Selected: {file_path}")
 
+            # Quick structural check so a bad file is flagged before processing
+            report = VCFValidator().validate(file_path)
+            for issue in report.issues:
+                self.output_text.append(f"{'✗' if issue.severity == 'error' else '⚠'} {issue}")
+            if report.ok:
+                self.output_text.append(f"✓ VCF header OK ({report.records_checked} records checked)")
+
+    def browse_manifest(self):
+        """Browse for a CSV mapping VCF sample names to patient user IDs"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Sample Manifest",
+            "",
+            "CSV Files (*.csv);;All Files (*)"
+        )
+
+        if file_path:
+            try:
+                self.sample_manifest = VCFImportService.load_sample_manifest(file_path)
+            except Exception as e:
+                QMessageBox.critical(self, "Manifest Error", f"Failed to read manifest: {e}")
+                return
+            self.manifest_label.setText(f"{len(self.sample_manifest)} samples mapped")
+            self.multi_sample_check.setChecked(True)
+            self.output_text.append(f"Loaded sample manifest: {file_path}")
+
     def process_vcf(self):
         """Process VCF file in background"""
         if not self.vcf_file_path:
             QMessageBox.warning(self, "Error", "Please select a VCF file first")
             return
 
+        # Re-import mode diffs against what this patient already has stored
+        multi_sample = self.multi_sample_check.isChecked()
+        stored_genotypes = None
+        if self.diff_check.isChecked() and not multi_sample:
+            try:
+                stored_genotypes = VCFImportService(self.db_connection).load_stored_genotypes(self.user_id)
+            except Exception as e:
+                QMessageBox.critical(self, "Database Error", f"Failed to load stored variants: {e}")
+                return
+
+        self.lookup_status_label.hide()
+
         # Start background worker
-        self.worker = VCFProcessWorker(self.vcf_file_path)
+        self.worker = VCFProcessWorker(
+            self.vcf_file_path,
+            self.panel_only_check.isChecked(),
+            multi_sample,
+            workers=min(os.cpu_count() or 1, self.MAX_PARSE_WORKERS),
+            stored_genotypes=stored_genotypes
+        )
         self.worker.progress.connect(self.on_progress)
         self.worker.finished.connect(self.on_finished)
         self.worker.error.connect(self.on_error)
+        self.worker.degraded.connect(self.on_lookup_degraded)
         self.worker.start()
 
     def on_progress(self, message: str):
         """Update progress"""
         self.output_text.append(message)
 
+    def on_lookup_degraded(self, message: str):
+        """PharmGKB stopped responding mid-file; processing continues without it"""
+        self.lookup_status_label.setText(f"⚠ {message}")
+        self.lookup_status_label.show()
+
     def on_finished(self, result: dict):
         """VCF processing finished"""
         self.variants = result.get('variants', [])
         self.drug_interactions = result.get('interactions', [])
+        self.sample_variants = result.get('samples', {})
+        self.variant_diff = result.get('diff')
+
+        failed_lookups = result.get('failed_lookups', [])
+        if failed_lookups:
+            self.lookup_status_label.setText(
+                f"⚠ PharmGKB lookup degraded: {len(failed_lookups)} variants could not be checked for "
+                f"drug interactions. Upload the file again once PharmGKB is reachable."
+            )
+            self.lookup_status_label.show()
+            if self.variant_diff:
+                deferred = self.variant_diff.defer(failed_lookups)
+                if deferred:
+                    self.output_text.append(f"ℹ {deferred} new variants without a PharmGKB answer are left out "
+                                            f"of this import and will be picked up by the next upload")
 
         summary = f"✓ Ready to import: {len(self.variants)} variants"
+        if self.variant_diff:
+            summary += f" ({self.variant_diff.summary()})"
+        if self.sample_variants:
+            summary += f" for {len(self.sample_variants)} samples"
         if self.drug_interactions:
             summary += f", {len(self.drug_interactions)} drug interactions"
+        if failed_lookups:
+            summary += f" ({len(failed_lookups)} not checked against PharmGKB)"
 
         self.summary_label.setText(summary)
 
@@ -223,58 +274,26 @@ class VCFUploadDialog(QDialog):
 
     def import_to_patient(self):
         """Import variants and drug interactions to patient profile"""
-        try:
-            cursor = self.db_connection.cursor
-            imported_variants = 0
-            imported_interactions = 0
+        if self.sample_variants:
+            self.import_samples()
+            return
+        if self.variant_diff:
+            self.import_diff()
+            return
 
+        import_service = VCFImportService(self.db_connection)
+        try:
             # Step 1: Import ALL variants to genomics tab
             self.output_text.append(f"Importing {len(self.variants)} variants...")
-            from datetime import datetime
-            today = datetime.now().strftime('%Y-%m-%d')
-
-            for variant in self.variants:
-                cursor.execute("""
-                    INSERT INTO final_genetic_info
-                    (user_id, gene, variant, genotype, date_tested)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE genotype = VALUES(genotype), date_tested = VALUES(date_tested)
-                """, (
-                    self.user_id,
-                    variant['gene'],
-                    variant['variant'],
-                    variant['genotype'],
-                    today
-                ))
-                imported_variants += 1
+            imported_variants = import_service.save_variants(self.user_id, self.variants)
+            imported_interactions = 0
 
             self.output_text.append(f"✓ Imported {imported_variants} variants to Genomics tab")
 
             # Step 2: Import drug interactions to drug_review
             if self.drug_interactions:
                 self.output_text.append(f"Importing {len(self.drug_interactions)} drug interactions...")
-                for interaction in self.drug_interactions:
-                    # Use SubQuery to get medication_id - matches PharmGKBService approach
-                    cursor.execute("""
-                        INSERT INTO drug_review
-                        (user_id, medication_id, gene, variant, risk_level, notes, status)
-                        SELECT %s, m.medication_id, %s, %s, %s, %s, 'active'
-                        FROM medications m
-                        WHERE m.medication_name = %s
-                        ON DUPLICATE KEY UPDATE
-                            risk_level = VALUES(risk_level),
-                            notes = VALUES(notes),
-                            status = 'active'
-                    """, (
-                        self.user_id,
-                        interaction['gene'],
-                        interaction['variant'],
-                        interaction['risk_level'],
-                        interaction['description'] + " | " + interaction['notes'],
-                        interaction['medication_name']
-                    ))
-                    imported_interactions += 1
-
+                imported_interactions = import_service.save_interactions(self.user_id, self.drug_interactions)
                 self.output_text.append(f"✓ Imported {imported_interactions} drug interactions to Drug Review tab")
             else:
                 self.output_text.append("ℹ No drug interactions found - variants stored for future reference")
@@ -293,3 +312,77 @@ class VCFUploadDialog(QDialog):
         except Exception as e:
             self.db_connection.connection.rollback()
             QMessageBox.critical(self, "Import Error", f"Failed to import: {e}")
+
+    def import_diff(self):
+        """Write only the variants that changed since the patient's last import"""
+        # A different (not re-issued) VCF would lose every variant only the earlier upload had
+        if self.variant_diff.removed:
+            answer = QMessageBox.question(
+                self, "Remove Variants?",
+                f"{len(self.variant_diff.removed)} variants from earlier VCF uploads are not in this file.\n"
+                f"Remove them from the patient's Genomics tab?\n\n"
+                f"Choose No if this file is from another panel or lab rather than a re-issue.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                self.variant_diff.removed = []
+
+        import_service = VCFImportService(self.db_connection)
+        try:
+            self.output_text.append(f"Applying changes: {self.variant_diff.summary()}...")
+            added, changed, removed = import_service.apply_diff(self.user_id, self.variant_diff)
+            imported_interactions = 0
+            if self.drug_interactions:
+                imported_interactions = import_service.save_interactions(self.user_id, self.drug_interactions)
+
+            self.db_connection.connection.commit()
+
+            QMessageBox.information(
+                self, "Success",
+                f"Import complete!\n"
+                f"✓ {added} variants added, {changed} updated, {removed} removed\n"
+                f"✓ {imported_interactions} drug interactions added to Drug Review tab"
+            )
+
+            self.accept()
+
+        except Exception as e:
+            self.db_connection.connection.rollback()
+            QMessageBox.critical(self, "Import Error", f"Failed to import: {e}")
+
+    def import_samples(self):
+        """Import every sample of a multi-sample VCF to its mapped patient"""
+        import_service = VCFImportService(self.db_connection)
+        try:
+            sample_user_ids = import_service.resolve_sample_user_ids(self.sample_variants, self.sample_manifest)
+            unmapped = sorted(set(self.sample_variants) - set(sample_user_ids))
+            if unmapped:
+                self.output_text.append(
+                    f"⚠ Skipping {len(unmapped)} samples with no matching patient: {', '.join(unmapped)}"
+                )
+            if not sample_user_ids:
+                QMessageBox.warning(
+                    self, "No Patients Matched",
+                    "No sample names matched a patient user ID.\n"
+                    "Load a sample manifest (sample_id,user_id) and try again."
+                )
+                return
+
+            self.output_text.append(f"Importing {len(sample_user_ids)} samples...")
+            patients, imported_variants, imported_interactions = import_service.import_samples(
+                self.sample_variants, self.drug_interactions, sample_user_ids
+            )
+
+            QMessageBox.information(
+                self, "Success",
+                f"Import complete!\n"
+                f"✓ {patients} patients updated\n"
+                f"✓ {imported_variants} variants added to Genomics tabs\n"
+                f"✓ {imported_interactions} drug interactions added to Drug Review tabs"
+            )
+
+            self.accept()
+
+        except Exception as e:
+            QMessageBox.critical(self, "Import Error", f"Failed to import: {e}")
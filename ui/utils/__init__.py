@@ -1,5 +1,10 @@
 """Utility modules for the UI"""
 from .vcf_parser import VCFParser
+from .variant import Variant
+from .gene_panel import GenePanel
+from .diplotype_caller import DiplotypeCaller
+from .risk_classifier import RiskClassifier
+from .vcf_validator import VCFValidator
 from .pharmgkb_api import PharmGKBClient
 
-__all__ = ['VCFParser', 'PharmGKBClient']
+__all__ = ['VCFParser', 'Variant', 'GenePanel', 'DiplotypeCaller', 'RiskClassifier', 'VCFValidator', 'PharmGKBClient']
@@ -0,0 +1,196 @@
+"""BGZF block I/O - random access into bgzip-compressed files via virtual offsets"""
+import gzip
+import shutil
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+# Largest uncompressed payload bgzip puts in a single block
+MAX_BLOCK_INPUT = 0xff00
+
+# gzip header with the FEXTRA flag set and the 'BC' subfield holding BSIZE
+_BLOCK_HEADER = struct.Struct('<BBBBIBBHBBHH')
+_BLOCK_HEADER_SIZE = _BLOCK_HEADER.size
+
+# Empty block bgzip appends as an end-of-file marker
+EOF_BLOCK = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+
+def is_bgzf(path: str) -> bool:
+    """Return True if the file starts with a BGZF block header"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_BLOCK_HEADER_SIZE)
+    except OSError:
+        return False
+
+    if len(header) < _BLOCK_HEADER_SIZE:
+        return False
+
+    id1, id2, cm, flg, _, _, _, xlen, si1, si2, slen, _ = _BLOCK_HEADER.unpack(header)
+    return (id1, id2, cm) == (31, 139, 8) and flg & 4 and xlen >= 6 and (si1, si2, slen) == (66, 67, 2)
+
+
+class BGZFReader:
+    """
+    Line reader over a BGZF file that can seek to tabix virtual offsets
+
+    A virtual offset is (compressed block offset << 16) | offset within the
+    uncompressed block, which is what .tbi/.csi chunks point at.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._block_offset = 0
+        self._block_size = 0
+        self._buffer = b''
+        self._within = 0
+        self._load_block(0)
+
+    def _load_block(self, offset: int):
+        """Read and inflate the block starting at compressed offset"""
+        self._file.seek(offset)
+        header = self._file.read(_BLOCK_HEADER_SIZE)
+        self._block_offset = offset
+        self._within = 0
+
+        if len(header) < _BLOCK_HEADER_SIZE:
+            self._block_size = 0
+            self._buffer = b''
+            return
+
+        *_, xlen, si1, si2, _, bsize = _BLOCK_HEADER.unpack(header)
+        if (si1, si2) != (66, 67):
+            raise ValueError(f"Not a BGZF block at offset {offset}")
+
+        # Skip any extra subfields after BC, then the deflate payload + CRC32/ISIZE
+        remaining = self._file.read(bsize + 1 - _BLOCK_HEADER_SIZE)
+        extra_tail = xlen - 6
+        self._block_size = bsize + 1
+        self._buffer = zlib.decompress(remaining[extra_tail:-8], -15)
+
+    def seek(self, virtual_offset: int):
+        """Position the reader at a virtual offset"""
+        block_offset = virtual_offset >> 16
+        if block_offset != self._block_offset or not self._block_size:
+            self._load_block(block_offset)
+        self._within = virtual_offset & 0xffff
+
+    def tell(self) -> int:
+        """Current virtual offset"""
+        return (self._block_offset << 16) | self._within
+
+    def readline(self) -> bytes:
+        """Read one line (including newline), crossing block boundaries as needed"""
+        parts = []
+        while True:
+            if self._within >= len(self._buffer):
+                if not self._block_size:
+                    break
+                self._load_block(self._block_offset + self._block_size)
+                continue
+
+            newline = self._buffer.find(b'\n', self._within)
+            if newline >= 0:
+                parts.append(self._buffer[self._within:newline + 1])
+                self._within = newline + 1
+                break
+
+            parts.append(self._buffer[self._within:])
+            self._within = len(self._buffer)
+
+        # Like htslib, step past an exhausted block so tell() reports the
+        # next line's start as (next block << 16), never as end-of-block
+        if self._within >= len(self._buffer) and self._block_size:
+            self._load_block(self._block_offset + self._block_size)
+
+        return b''.join(parts)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BGZFWriter:
+    """Write data as a sequence of BGZF blocks terminated by the EOF marker"""
+
+    def __init__(self, path: str, compresslevel: int = 6):
+        self._file = open(path, 'wb')
+        self._compresslevel = compresslevel
+        self._buffer = bytearray()
+
+    def write(self, data: bytes):
+        self._buffer += data
+        while len(self._buffer) >= MAX_BLOCK_INPUT:
+            self._write_block(bytes(self._buffer[:MAX_BLOCK_INPUT]))
+            del self._buffer[:MAX_BLOCK_INPUT]
+
+    def _write_block(self, data: bytes):
+        compressor = zlib.compressobj(self._compresslevel, zlib.DEFLATED, -15)
+        payload = compressor.compress(data) + compressor.flush()
+        bsize = _BLOCK_HEADER_SIZE + len(payload) + 8
+        self._file.write(_BLOCK_HEADER.pack(31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, bsize - 1))
+        self._file.write(payload)
+        self._file.write(struct.pack('<II', zlib.crc32(data), len(data)))
+
+    def close(self):
+        if self._buffer:
+            self._write_block(bytes(self._buffer))
+            self._buffer.clear()
+        self._file.write(EOF_BLOCK)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def block_offsets(path: str) -> List[Tuple[int, int]]:
+    """
+    List (compressed offset, uncompressed size) of every non-empty block
+
+    Only block headers and ISIZE footers are read, so this is cheap even on
+    multi-gigabyte files.
+    """
+    blocks = []
+    with open(path, 'rb') as f:
+        offset = 0
+        while True:
+            header = f.read(_BLOCK_HEADER_SIZE)
+            if len(header) < _BLOCK_HEADER_SIZE:
+                break
+            bsize = _BLOCK_HEADER.unpack(header)[-1] + 1
+            f.seek(offset + bsize - 4)
+            isize, = struct.unpack('<I', f.read(4))
+            if isize:
+                blocks.append((offset, isize))
+            offset += bsize
+            f.seek(offset)
+    return blocks
+
+
+def bgzip_file(src_path: str, dest_path: Optional[str] = None) -> str:
+    """
+    Recompress a plain or gzip VCF as BGZF so it can be indexed
+
+    Returns the path written (defaults to src_path + '.gz', or src_path with
+    a '.bgz.gz' suffix if the source is already gzip-compressed).
+    """
+    with open(src_path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+
+    if dest_path is None:
+        dest_path = src_path[:-3] + '.bgz.gz' if compressed and src_path.endswith('.gz') else src_path + '.gz'
+
+    opener = gzip.open if compressed else open
+    with opener(src_path, 'rb') as src, BGZFWriter(dest_path) as dest:
+        shutil.copyfileobj(src, dest, MAX_BLOCK_INPUT)
+
+    return dest_path
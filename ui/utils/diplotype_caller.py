@@ -0,0 +1,233 @@
+"""Diplotype Caller - star-allele diplotypes and metabolizer phenotypes from parsed variants"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .variant import rsid_from_key
+
+DEFAULT_DEFINITIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'allele_definitions.json')
+
+
+def allele_copies(genotype: Optional[str]) -> int:
+    """
+    Number of non-reference alleles in a genotype
+
+    VCF-style GT strings ('0/1', '1|1', '0/2') are counted; anything else,
+    including a missing genotype from a sites-only VCF, is taken as one copy.
+    """
+    if not genotype:
+        return 1
+    alleles = genotype.replace('|', '/').split('/')
+    if not all(allele.isdigit() or allele == '.' for allele in alleles):
+        return 1
+    return sum(1 for allele in alleles if allele not in ('0', '.'))
+
+
+def allele_code(ref: Optional[str], alt: Optional[str]) -> Optional[str]:
+    """
+    ALT as written in allele definitions: the ALT itself for substitutions,
+    del<N>/ins<N> for indels, whose VCF ALT depends on the anchor base
+    """
+    if not ref or not alt or len(ref) == len(alt):
+        return alt
+    if len(alt) < len(ref):
+        return f"del{len(ref) - len(alt)}"
+    return f"ins{len(alt) - len(ref)}"
+
+
+@dataclass(frozen=True)
+class DiplotypeCall:
+    """Diplotype and phenotype for one gene"""
+    gene: str
+    diplotype: str
+    activity_score: float
+    phenotype: str
+    # Observed defining variants no allele in the call accounts for
+    unexplained: Tuple[str, ...] = ()
+
+
+class _Allele:
+    __slots__ = ('name', 'function', 'activity', 'core', 'tags')
+
+    def __init__(self, name: str, function: str, activity: float, core: int, tags: int):
+        self.name = name
+        self.function = function
+        self.activity = activity
+        self.core = core
+        self.tags = tags
+
+
+class _GeneTable:
+    """
+    One gene's allele definitions as bitsets
+
+    Every defining variant (<rsID>:<ALT>) used by the gene gets a bit; an
+    allele is a core mask (all required) and a tag mask (absorbed if observed). A patient is two masks -
+    variants present, and variants homozygous - so fitting a diplotype is a
+    handful of integer operations.
+    """
+
+    def __init__(self, gene: str, spec: Dict):
+        self.gene = gene
+        self.bits: Dict[str, int] = {}
+        self.keys: List[str] = []
+
+        def mask(keys: Iterable[str]) -> int:
+            value = 0
+            for key in keys:
+                if key not in self.bits:
+                    self.bits[key] = 1 << len(self.keys)
+                    self.keys.append(key)
+                value |= self.bits[key]
+            return value
+
+        self.reference = _Allele(spec['reference'], spec.get('reference_function', 'Normal function'),
+                                 spec.get('reference_activity', 1), 0, 0)
+        self.alleles = [self.reference] + [
+            _Allele(a['allele'], a['function'], a['activity'], mask(a['core']), mask(a.get('tags', ())))
+            for a in spec['alleles']
+        ]
+        self.phenotypes = sorted(((p['min'], p['phenotype']) for p in spec['phenotypes']), reverse=True)
+
+    def call(self, present: int, hom: int) -> DiplotypeCall:
+        """
+        Best-fitting diplotype for the observed present/homozygous masks
+
+        Pairs are ranked by the number of observed variant copies they
+        explain, then by fewest non-reference alleles (parsimony), then by
+        table order. A pair is only valid if its core variants need no more
+        copies than were observed.
+        """
+        candidates = [a for a in self.alleles if not a.core & ~present]
+
+        best = None
+        for i, first in enumerate(candidates):
+            for second in candidates[i:]:
+                shared = first.core & second.core
+                if shared & ~hom:
+                    continue
+
+                # Copies left after the cores: one where a core took one of
+                # two copies (or none of one), two where no core touched a hom
+                covered = first.core | second.core
+                left_one = (present & ~covered) | (hom & (first.core ^ second.core))
+                left_two = hom & ~covered
+                tags_one = first.tags | second.tags
+                tags_two = first.tags & second.tags
+
+                explained = (first.core.bit_count() + second.core.bit_count()
+                             + (left_one & tags_one).bit_count() + (left_two & tags_two).bit_count())
+                non_reference = (first is not self.reference) + (second is not self.reference)
+                rank = (-explained, non_reference)
+                if best is None or rank < best[0]:
+                    unexplained = (left_one & ~tags_one) | (left_two & ~tags_two)
+                    best = (rank, first, second, unexplained)
+
+        _, first, second, unexplained = best
+        score = float(first.activity + second.activity)
+        return DiplotypeCall(
+            gene=self.gene,
+            diplotype=f"{first.name}/{second.name}",
+            activity_score=score,
+            phenotype=self.phenotype(score),
+            unexplained=tuple(key for key in self.keys if unexplained & self.bits[key])
+        )
+
+    def phenotype(self, score: float) -> str:
+        for minimum, phenotype in self.phenotypes:
+            if score >= minimum:
+                return phenotype
+        return "Indeterminate"
+
+
+class DiplotypeCaller:
+    """
+    Call star-allele diplotypes from a patient's variants
+
+    Variants are matched to allele definitions by rsID and ALT through a
+    single (rsID, ALT) -> (gene, bit) index, so another ALT at a defining
+    site is not taken for the star allele. Stored rows under a plain rsID
+    carry no ALT and match the rsID's (first) defined allele. Calls are memoized on the per-gene masks, and
+    since most patients share a few common genotype patterns, rescoring a
+    whole population is mostly dictionary lookups.
+    """
+
+    def __init__(self, definitions: Dict[str, Dict]):
+        self.genes = {gene: _GeneTable(gene, spec) for gene, spec in definitions.items() if not gene.startswith('_')}
+        self._index: Dict[Tuple[str, str], Tuple[_GeneTable, int]] = {}
+        self._by_rsid: Dict[str, Tuple[_GeneTable, int]] = {}
+        for table in self.genes.values():
+            for key, bit in table.bits.items():
+                rsid, alt = key.split(':', 1)
+                self._index[(rsid, alt)] = (table, bit)
+                self._by_rsid.setdefault(rsid, (table, bit))
+        self._cache: Dict[Tuple[str, int, int], DiplotypeCall] = {}
+
+    @classmethod
+    def from_json(cls, path: str) -> 'DiplotypeCaller':
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def load_default(cls) -> 'DiplotypeCaller':
+        """Caller over the bundled CPIC allele definitions"""
+        return cls.from_json(DEFAULT_DEFINITIONS_PATH)
+
+    def call(self, variants: Iterable, genes: Optional[Iterable[str]] = None) -> Dict[str, DiplotypeCall]:
+        """
+        Diplotypes for one patient
+
+        Args:
+            variants: Variant records, or final_genetic_info rows with
+                      'variant' (stored ID, see Variant.key) and 'genotype' keys
+            genes: Genes known to be covered by the test; these are called
+                   (as reference if nothing was found) even without any
+                   observed defining variant. Other genes are only called
+                   when at least one of their variants was observed.
+
+        Returns:
+            {gene: DiplotypeCall}
+        """
+        masks: Dict[str, List[int]] = {gene: [0, 0] for gene in genes or () if gene in self.genes}
+        for variant in variants:
+            hit = self._lookup(variant)
+            if hit is None:
+                continue
+            copies = allele_copies(variant.get('genotype'))
+            if not copies:
+                continue
+
+            table, bit = hit
+            gene_masks = masks.setdefault(table.gene, [0, 0])
+            gene_masks[0] |= bit
+            if copies > 1:
+                gene_masks[1] |= bit
+
+        return {gene: self._call_gene(gene, present, hom) for gene, (present, hom) in masks.items()}
+
+    def call_population(self, patients: Iterable[Tuple[object, Iterable]],
+                        genes: Optional[Iterable[str]] = None) -> Dict[object, Dict[str, DiplotypeCall]]:
+        """Call every (patient id, variants) pair; returns {patient id: {gene: call}}"""
+        genes = tuple(genes) if genes is not None else None
+        return {patient_id: self.call(variants, genes) for patient_id, variants in patients}
+
+    def _lookup(self, variant) -> Optional[Tuple[_GeneTable, int]]:
+        """Definition bit of a Variant record or a stored (variant, genotype) row"""
+        rsid = variant.get('rsid')
+        if rsid:
+            alt = allele_code(variant.get('ref'), variant.get('alt'))
+        else:
+            key = variant.get('variant')
+            rsid = rsid_from_key(key)
+            alt = key.split(':', 1)[1] if key and key != rsid else None
+        if alt is None:
+            return self._by_rsid.get(rsid)
+        return self._index.get((rsid, alt))
+
+    def _call_gene(self, gene: str, present: int, hom: int) -> DiplotypeCall:
+        key = (gene, present, hom)
+        call = self._cache.get(key)
+        if call is None:
+            call = self._cache[key] = self.genes[gene].call(present, hom)
+        return call
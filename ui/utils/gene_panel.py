@@ -0,0 +1,98 @@
+"""Gene Panel - BED-style set of genomic regions used to restrict VCF parsing"""
+import os
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PANEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pharmacogene_panel.bed')
+
+
+def canonical_chrom(chrom: str) -> str:
+    """Normalize chromosome names so 'chr10', 'CHR10' and '10' compare equal"""
+    if chrom[:3].lower() == 'chr':
+        chrom = chrom[3:]
+    return 'MT' if chrom == 'M' else chrom
+
+
+class GenePanel:
+    """Collection of named regions loaded from a BED file"""
+
+    def __init__(self, regions: List[Tuple[str, int, int, str]]):
+        """
+        Args:
+            regions: (chrom, start, end, name) tuples with 0-based, end-exclusive
+                     coordinates as in BED
+        """
+        self._regions: Dict[str, List[Tuple[int, int, str]]] = {}
+        for chrom, start, end, name in regions:
+            self._regions.setdefault(canonical_chrom(chrom), []).append((start, end, name))
+        for intervals in self._regions.values():
+            intervals.sort()
+
+        # Per chromosome, merged non-overlapping intervals as two sorted arrays
+        # so a position lookup is one binary search
+        self._starts: Dict[str, List[int]] = {}
+        self._ends: Dict[str, List[int]] = {}
+        for chrom, intervals in self._regions.items():
+            starts, ends = [], []
+            for start, end, _ in intervals:
+                if ends and start <= ends[-1]:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[chrom] = starts
+            self._ends[chrom] = ends
+
+        # Raw VCF chromosome names seen so far -> canonical name (or None if off-panel)
+        self._chrom_cache: Dict[str, str] = {}
+
+    @classmethod
+    def from_bed(cls, path: str) -> 'GenePanel':
+        """Load a panel from a BED file (chrom, start, end, optional name)"""
+        regions = []
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip() or line.startswith(('#', 'track', 'browser')):
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                name = fields[3] if len(fields) > 3 else f"{fields[0]}:{fields[1]}-{fields[2]}"
+                regions.append((fields[0], int(fields[1]), int(fields[2]), name))
+        return cls(regions)
+
+    @classmethod
+    def load_default(cls) -> 'GenePanel':
+        """Load the bundled pharmacogene panel"""
+        return cls.from_bed(DEFAULT_PANEL_PATH)
+
+    def regions(self) -> Iterator[Tuple[str, int, int, str]]:
+        """Yield (canonical chrom, start, end, name) for every region"""
+        for chrom, intervals in self._regions.items():
+            for start, end, name in intervals:
+                yield chrom, start, end, name
+
+    def overlaps(self, chrom: str, pos: int, end: Optional[int] = None) -> bool:
+        """
+        True if 1-based VCF positions pos..end (inclusive) on chrom touch a region
+
+        end defaults to pos; pass pos + len(REF) - 1 so a deletion starting
+        before a region but spanning into it counts, as in a tabix query.
+        """
+        try:
+            key = self._chrom_cache[chrom]
+        except KeyError:
+            key = canonical_chrom(chrom)
+            key = self._chrom_cache[chrom] = key if key in self._starts else None
+
+        if key is None:
+            return False
+
+        # Last merged interval starting at or before the record's last base
+        i = bisect_right(self._starts[key], (end or pos) - 1) - 1
+        return i >= 0 and pos - 1 < self._ends[key][i]
+
+    @property
+    def genes(self) -> List[str]:
+        return sorted({name for intervals in self._regions.values() for _, _, name in intervals})
+
+    def __len__(self) -> int:
+        return sum(len(intervals) for intervals in self._regions.values())
@@ -0,0 +1,203 @@
+"""Parallel VCF parsing - split a file into record-aligned chunks parsed by a process pool"""
+import gc
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .bgzf import BGZFReader, block_offsets, is_bgzf
+from .variant import Variant
+
+# Chunks handed out per worker - several each keeps every core busy when
+# some chunks are denser than others
+CHUNKS_PER_WORKER = 4
+
+# Below this file size, starting the worker processes costs more than it saves
+MIN_PARALLEL_BYTES = 8 * 1024 * 1024
+
+# Called with (chunks done, total chunks)
+ProgressCallback = Callable[[int, int], None]
+
+# (start, end, skip_partial): a chunk owns every line that *starts* in
+# [start, end). With skip_partial, start sits one byte before the boundary
+# and the first readline() only discards the line already owned by the
+# previous chunk (or just its terminating newline).
+Chunk = Tuple[int, int, bool]
+
+
+def plain_chunks(path: str, data_start: int, n_chunks: int) -> List[Chunk]:
+    """Split an uncompressed file's record section into ~equal byte ranges"""
+    size = os.path.getsize(path)
+    step = max(1, -(-(size - data_start) // n_chunks))
+    return [(start - 1, min(start + step, size), True) if start > data_start else (start, start + step, False)
+            for start in range(data_start, size, step)]
+
+
+def bgzf_chunks(path: str, data_start: int, n_chunks: int) -> List[Chunk]:
+    """
+    Split a BGZF file's record section at block boundaries
+
+    Offsets are virtual offsets; each boundary is the start of a block, so
+    workers only ever inflate their own blocks (plus one to find the first
+    line break).
+    """
+    blocks = [block for block in block_offsets(path) if block[0] > data_start >> 16]
+    if not blocks:
+        return [(data_start, 1 << 63, False)]
+
+    step = max(1, -(-len(blocks) // n_chunks))
+    boundaries = list(range(step, len(blocks), step))
+    chunks = []
+    start = data_start
+    skip = False
+    for i in boundaries:
+        end = blocks[i][0] << 16
+        chunks.append((start, end, skip))
+        # One byte before the boundary: the last byte of the previous block
+        previous_offset, previous_size = blocks[i - 1]
+        start, skip = (previous_offset << 16) | (previous_size - 1), True
+    chunks.append((start, 1 << 63, skip))
+    return chunks
+
+
+# Variant fields shipped back from workers, one tab-joined string per field
+_PACKED_FIELDS = ('chrom', 'ref', 'alt', 'rsid', 'gene', 'genotype', 'qual', 'impact')
+
+
+def _pack(records: List[Variant], samples: Optional[List[str]]) -> Tuple[str, ...]:
+    """
+    Flatten records into one string per column for the trip back to the parent
+
+    Pickling a list of objects costs about as much as parsing the lines did;
+    a handful of large strings crosses the process boundary almost for free.
+    Missing genotypes travel as '' (VCF fields are never empty).
+    """
+    columns = ['\t'.join(getattr(v, name) or '' for v in records) for name in _PACKED_FIELDS]
+    columns.append('\t'.join(str(v.pos) for v in records))
+    for sample in samples or ():
+        columns.append('\t'.join(v.genotypes[sample] or '' for v in records))
+    return tuple(columns)
+
+
+def _unpack(columns: Tuple[str, ...], count: int, samples: Optional[List[str]]) -> List[Variant]:
+    """Rebuild Variant records from _pack() output"""
+    if not count:
+        return []
+
+    chrom, ref, alt, rsid, gene, genotype, qual, impact, pos, *per_sample = [c.split('\t') for c in columns]
+    genotype = [gt or None for gt in genotype]
+    if samples is None:
+        genotypes = [None] * count
+    elif samples:
+        per_sample = [[gt or None for gt in column] for column in per_sample]
+        genotypes = [dict(zip(samples, calls)) for calls in zip(*per_sample)]
+    else:
+        genotypes = [{} for _ in range(count)]
+
+    # Allocating a whole chunk of records at once triggers repeated cyclic GC
+    # passes over everything parsed so far; none of these objects can form
+    # cycles, so collection is paused while they are built.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return list(map(Variant, chrom, map(int, pos), ref, alt, rsid, gene, genotype, qual, impact, genotypes))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _parse_chunk(task) -> Tuple[int, Tuple[str, ...]]:
+    """Worker entry point: parse every record starting inside one chunk"""
+    parser, sample_index, panel, bgzf, (start, end, skip_partial) = task
+    if not bgzf:
+        records = _scan_plain_chunk(parser, sample_index, panel, start, end, skip_partial)
+        return len(records), _pack(records, _samples(parser))
+
+    records = []
+    with BGZFReader(parser.vcf_file_path) as reader:
+        reader.seek(start)
+        if skip_partial:
+            reader.readline()
+
+        while reader.tell() < end:
+            line = reader.readline()
+            if not line:
+                break
+            variant = parser._parse_record(line.decode(), sample_index, panel)
+            if variant:
+                records.append(variant)
+    return len(records), _pack(records, _samples(parser))
+
+
+def _scan_plain_chunk(parser, sample_index, panel, start: int, end: int, skip_partial: bool) -> List[Variant]:
+    """Parse one chunk of an uncompressed file through the parser's mmap scanner"""
+    with open(parser.vcf_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        if skip_partial:
+            newline = buffer.find(b'\n', start)
+            start = len(buffer) if newline < 0 else newline + 1
+        return list(parser._scan_buffer(buffer, start, end, sample_index, panel))
+
+
+def _samples(parser) -> Optional[List[str]]:
+    """Sample names carried in each record's genotypes dict (None without multi_sample)"""
+    return [name for name, _ in parser._sample_columns] if parser.multi_sample else None
+
+
+def _iter_sequential(parser, panel, compressed: bool) -> Iterator:
+    """In-process parse: the mmap scan only for plain files wide enough to gain from it"""
+    if not compressed and not parser.multi_sample:
+        with open(parser.vcf_file_path, 'rb') as raw:
+            parser._read_header(raw)
+        if len(parser.sample_names) >= parser.MMAP_MIN_SAMPLES:
+            return parser.iter_variants_mmap(panel)
+    return parser.iter_variants(panel)
+
+
+def iter_parallel(parser, workers: Optional[int] = None, panel=None,
+                  progress: Optional[ProgressCallback] = None) -> Iterator:
+    """
+    Yield parser's records in file order, parsing chunks in worker processes
+
+    The header is read once here so workers inherit the sample columns and
+    ANN/CSQ layout through the pickled parser. At most two chunks per worker
+    are in flight, so finished-but-unconsumed results stay bounded.
+    """
+    workers = workers or os.cpu_count() or 1
+    path = parser.vcf_file_path
+
+    with open(path, 'rb') as raw:
+        compressed = raw.read(2) == b'\x1f\x8b'
+    bgzf = compressed and is_bgzf(path)
+
+    # A plain gzip stream can only be inflated from the start
+    if workers <= 1 or (compressed and not bgzf) or os.path.getsize(path) < MIN_PARALLEL_BYTES:
+        yield from _iter_sequential(parser, panel, compressed)
+        if progress:
+            progress(1, 1)
+        return
+
+    reader = BGZFReader(path) if bgzf else open(path, 'rb')
+    with reader:
+        sample_index, data_start = parser._read_header(reader)
+
+    samples = _samples(parser)
+    n_chunks = workers * CHUNKS_PER_WORKER
+    chunks = bgzf_chunks(path, data_start, n_chunks) if bgzf else plain_chunks(path, data_start, n_chunks)
+    tasks = iter([(parser, sample_index, panel, bgzf, chunk) for chunk in chunks])
+
+    # spawn rather than fork: the caller is usually a QThread in a Qt process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        pending = deque(pool.submit(_parse_chunk, task) for _, task in zip(range(workers * 2), tasks))
+        done = 0
+        while pending:
+            count, columns = pending.popleft().result()
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(pool.submit(_parse_chunk, task))
+
+            done += 1
+            if progress:
+                progress(done, len(chunks))
+            yield from _unpack(columns, count, samples)
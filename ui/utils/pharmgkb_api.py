@@ -1,14 +1,20 @@
 """PharmGKB API Client - Query drug-gene interactions"""
 import requests
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
+
+from config import PharmGKBConfig
+
+from .pharmgkb_cache import PharmGKBCache, default_cache
+from .pharmgkb_http import PharmGKBSession, default_session
+from .risk_classifier import RiskClassifier
 
 
 class PharmGKBClient:
     """Client for querying PharmGKB API for drug-gene interactions"""
 
-    BASE_URL = "https://api.pharmgkb.org/v1"
+    BASE_URL = PharmGKBConfig.API_URL
 
-    # Risk level mapping
+    # Risk level mapping; keyword rules live in risk_keywords.json
     RISK_LEVEL_MAP = {
         'high': 'High',
         'moderate': 'Moderate',
@@ -16,8 +22,33 @@ class PharmGKBClient:
         'unknown': 'Unknown'
     }
 
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, cache: Optional[PharmGKBCache] = None,
+                 session: Optional[PharmGKBSession] = None):
+        """
+        Args:
+            timeout: Per-request timeout in seconds
+            cache: Response cache; defaults to the shared on-disk cache
+            session: HTTP session; defaults to the shared keep-alive session
+        """
         self.timeout = timeout
+        self.cache = cache or default_cache()
+        self.session = session or default_session()
+        self.risk_classifier = RiskClassifier.load_default()
+
+    def _get_json(self, url: str, params: Dict) -> Any:
+        """GET a JSON endpoint through the response cache; {} for a 404, raises on other HTTP errors"""
+        entry = self.cache.lookup(url, params)
+        if entry is not None:
+            return entry[0] if entry[1] == 200 else {}
+
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        if response.status_code == 404:
+            self.cache.put(url, params, None, status=404)
+            return {}
+        response.raise_for_status()
+        body = response.json()
+        self.cache.put(url, params, body)
+        return body
 
     def query_gene_drug_interactions(self, gene_name: str, variant: str = None, impact: str = None) -> List[Dict]:
         """
@@ -38,49 +69,47 @@ class PharmGKBClient:
                 'dosing_guideline': str
             }
         """
-        interactions = []
-
         try:
             # Try querying by rsID first (more specific)
+            variant_drugs = []
             if variant and variant.startswith('rs'):
                 print(f"[PharmGKB] Querying by variant rsID: {variant}")
                 variant_drugs = self._query_variant(variant)
-                if variant_drugs:
-                    for drug_info in variant_drugs:
-                        interaction = {
-                            'drug_name': drug_info.get('name', 'Unknown'),
-                            'gene': gene_name,
-                            'variant': variant,
-                            'risk_level': self._determine_risk_level(drug_info, impact),
-                            'clinical_annotation': drug_info.get('summary', '') or impact or '',
-                            'dosing_guideline': drug_info.get('dosing_guideline', '')
-                        }
-                        interactions.append(interaction)
 
             # Also query by gene name for comprehensive results
             print(f"[PharmGKB] Querying by gene: {gene_name}")
             gene_drugs = self._query_genes(gene_name)
             if not gene_drugs:
                 print(f"[PharmGKB] No genes found for {gene_name}")
-                return interactions
-
-            for drug_info in gene_drugs:
-                interaction = {
-                    'drug_name': drug_info.get('name', 'Unknown'),
-                    'gene': gene_name,
-                    'variant': variant or '',
-                    'risk_level': self._determine_risk_level(drug_info, impact),
-                    'clinical_annotation': drug_info.get('summary', '') or impact or '',
-                    'dosing_guideline': drug_info.get('dosing_guideline', '')
-                }
-                interactions.append(interaction)
 
-            return interactions
+            return self._build_interactions(gene_name, variant, variant_drugs, gene_drugs, impact)
 
         except Exception as e:
             print(f"Error querying PharmGKB for {gene_name}/{variant}: {e}")
             return []
 
+    def _build_interactions(self, gene_name: str, variant: Optional[str], variant_drugs: List[Dict],
+                            gene_drugs: List[Dict], impact: str = None) -> List[Dict]:
+        """Interaction dicts for one variant from its rsID and gene query results"""
+        drugs = variant_drugs + gene_drugs
+        risk_levels = self.risk_classifier.classify_many(
+            [drug_info.get('summary', '') for drug_info in drugs], [impact] * len(drugs)
+        )
+
+        interactions = []
+        for index, (drug_info, risk_level) in enumerate(zip(drugs, risk_levels)):
+            interactions.append({
+                'drug_name': drug_info.get('name', 'Unknown'),
+                'gene': gene_name,
+                # rsID hits carry the variant as given; gene hits '' when there is none
+                'variant': variant if index < len(variant_drugs) else variant or '',
+                'risk_level': risk_level,
+                'clinical_annotation': drug_info.get('summary', '') or impact or '',
+                'dosing_guideline': drug_info.get('dosing_guideline', '')
+            })
+
+        return interactions
+
     def _query_genes(self, gene_name: str) -> List[Dict]:
         """Query PharmGKB for genes"""
         try:
@@ -92,11 +121,8 @@ class PharmGKBClient:
             }
 
             print(f"[PharmGKB API] Requesting: {url} with query={gene_name}")
-            response = requests.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-
-            data = response.json()
-            print(f"[PharmGKB API] Response status: {response.status_code}, data keys: {data.keys() if data else 'empty'}")
+            data = self._get_json(url, params)
+            print(f"[PharmGKB API] Response data keys: {data.keys() if data else 'empty'}")
 
             if data.get('data'):
                 gene_data = data['data'][0] if data['data'] else {}
@@ -105,7 +131,7 @@ class PharmGKBClient:
                 print(f"[PharmGKB API] Extracted {len(result)} interactions from gene data")
                 return result
 
-            print(f"[PharmGKB API] No data returned from API")
+            print("[PharmGKB API] No data returned from API")
             return []
 
         except requests.exceptions.RequestException as e:
@@ -159,11 +185,7 @@ class PharmGKBClient:
             }
 
             print(f"[PharmGKB API] Requesting: {url} with query={rsid}")
-            response = requests.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-
-            data = response.json()
-            print(f"[PharmGKB API] Variant response status: {response.status_code}")
+            data = self._get_json(url, params)
 
             if data.get('data'):
                 variant_data = data['data'][0] if data['data'] else {}
@@ -197,65 +219,61 @@ class PharmGKBClient:
         return drugs
 
     def _determine_risk_level(self, drug_info: Dict, impact: str = None) -> str:
-        """Determine risk level from drug info"""
-        # Check impact field first (from VCF annotation)
-        if impact:
-            impact_lower = impact.lower()
-            if any(word in impact_lower for word in ['loss of function', 'contraindicated', 'avoid']):
-                return 'High'
-            elif any(word in impact_lower for word in ['decreased', 'reduced', 'impaired', 'myopathy', 'increased risk']):
-                return 'Moderate'
-            elif any(word in impact_lower for word in ['increased', 'enhanced']):
-                return 'Low'
-
-        # Fall back to summary text
-        summary = drug_info.get('summary', '').lower()
-
-        if any(word in summary for word in ['contraindicated', 'avoid', 'high risk', 'significant']):
-            return 'High'
-        elif any(word in summary for word in ['moderate', 'consider', 'caution']):
-            return 'Moderate'
-        elif any(word in summary for word in ['minimal', 'no evidence', 'low risk']):
-            return 'Low'
-        else:
-            return 'Unknown'
+        """Determine risk level from drug info (impact keywords first, then the summary)"""
+        return self.risk_classifier.classify(drug_info.get('summary', ''), impact)
 
     def batch_query(self, variants: List[Dict]) -> List[Dict]:
         """
-        Query multiple variants in succession
+        Query multiple variants, issuing each distinct gene and rsID query once
+
+        Variants are grouped by gene; every gene search and rsID lookup runs
+        once per batch and the results are fanned back out per variant, in
+        input order - the same interactions as calling
+        query_gene_drug_interactions() for each variant.
 
         Args:
-            variants: List of variant dicts with 'gene' and 'variant' keys
+            variants: List of variant dicts with 'gene' and 'rsid' keys
 
         Returns:
             Combined list of all drug interactions found
         """
-        all_interactions = []
-
         print(f"[PharmGKB] batch_query called with {len(variants)} variants")
 
         if not variants:
-            print(f"[PharmGKB] No variants provided!")
+            print("[PharmGKB] No variants provided!")
             return []
 
+        # Plan: (gene, rsid) per usable variant, and gene -> distinct rsIDs
+        queries = []
+        plan: Dict[str, Dict[str, None]] = {}
         for idx, variant in enumerate(variants):
-            print(f"[PharmGKB] Variant {idx}: {variant}")
-
             gene = variant.get('gene', 'Unknown')
             variant_id = variant.get('rsid', '')
 
-            print(f"[PharmGKB] Processing variant - gene={gene}, rsid={variant_id}")
-
             if gene == 'Unknown':
-                print(f"[PharmGKB] Skipping - gene is Unknown")
+                print(f"[PharmGKB] Skipping variant {idx} - gene is Unknown")
                 continue
 
-            print(f"[PharmGKB] Querying gene: {gene}, variant: {variant_id}")
+            queries.append((gene, variant_id))
+            plan.setdefault(gene, {})[variant_id] = None
 
-            # Query PharmGKB
-            interactions = self.query_gene_drug_interactions(gene, variant_id)
+        gene_drugs = {}
+        variant_drugs = {}
+        for gene, variant_ids in plan.items():
+            print(f"[PharmGKB] Querying gene: {gene} ({len(variant_ids)} distinct variants)")
+            gene_drugs[gene] = self._query_genes(gene)
+            for variant_id in variant_ids:
+                if variant_id and variant_id.startswith('rs') and variant_id not in variant_drugs:
+                    variant_drugs[variant_id] = self._query_variant(variant_id)
 
-            print(f"[PharmGKB] Found {len(interactions)} interactions for {gene}")
+        print(f"[PharmGKB] {len(gene_drugs)} gene and {len(variant_drugs)} rsID queries "
+              f"for {len(queries)} variants")
+
+        # Fan the shared results back out per variant
+        all_interactions = []
+        for gene, variant_id in queries:
+            interactions = self._build_interactions(gene, variant_id, variant_drugs.get(variant_id, []),
+                                                    gene_drugs[gene])
             all_interactions.extend(interactions)
 
         print(f"[PharmGKB] Total interactions found: {len(all_interactions)}")
@@ -0,0 +1,148 @@
+"""PharmGKB Cache - persistent SQLite cache of PharmGKB API responses"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from config import PharmGKBConfig
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    """
+    Key for a request: URL plus its parameters sorted and normalized
+
+    Values are stripped and case-folded, so 'RS4149056 ' and 'rs4149056', or
+    'slco1b1' and 'SLCO1B1', share one entry.
+    """
+    if not params:
+        return url
+    items = sorted((str(name), str(value).strip().casefold()) for name, value in params.items())
+    return f"{url}?{urlencode(items)}"
+
+
+class PharmGKBCache:
+    """
+    On-disk cache of decoded JSON responses, keyed by cache_key()
+
+    Entries expire ttl_hours after they were fetched. "No data" answers
+    (404 - e.g. an rsID PharmGKB has no annotations for) are cached as
+    negative entries with no body, expiring after negative_ttl_hours so
+    newly curated variants are picked up sooner. Once more than
+    max_entries are stored, the least recently read ones are evicted. The
+    database is opened in WAL mode, so the GUI, its worker threads and
+    batch-import processes can share one file. hits/misses count this
+    instance's lookups (expired entries count as misses).
+    """
+
+    def __init__(self, path: str, ttl_hours: float = 168, max_entries: int = 50_000,
+                 negative_ttl_hours: float = 24):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                accessed REAL NOT NULL,
+                status INTEGER NOT NULL DEFAULT 200
+            )
+        """)
+        # Cache files written before negative entries existed
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+        if 'status' not in columns:
+            self._db.execute("ALTER TABLE responses ADD COLUMN status INTEGER NOT NULL DEFAULT 200")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    def lookup(self, url: str, params: Optional[Dict] = None) -> Optional[Tuple[Any, int]]:
+        """(body, status) of a live entry - (None, 404) for a negative one - or None on a miss"""
+        key = cache_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, fetched, status FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > (self.ttl if row[2] == 200 else self.negative_ttl):
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0]), row[2]
+
+    def get(self, url: str, params: Optional[Dict] = None) -> Optional[Any]:
+        """Cached response body for the request, or None on a miss or negative entry"""
+        entry = self.lookup(url, params)
+        return entry[0] if entry is not None else None
+
+    def put(self, url: str, params: Optional[Dict], body: Any, status: int = 200):
+        """Store a decoded response body, or a negative entry (body None, status 404)"""
+        key = cache_key(url, params)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, fetched, accessed, status) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(body), now, now, status)
+            )
+            # Counting rows on every put would dominate small writes
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= max(self.max_entries // 100, 1):
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently read ones beyond max_entries"""
+        self._puts_since_evict = 0
+        now = time.time()
+        self._db.execute("DELETE FROM responses WHERE fetched < ? OR (status != 200 AND fetched < ?)",
+                         (now - self.ttl, now - self.negative_ttl))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._db.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed LIMIT ?
+                )
+            """, (excess,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this instance and the number of stored (and negative) entries"""
+        with self._lock:
+            entries, negative = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status != 200), 0) FROM responses"
+            ).fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'negative_entries': negative}
+
+
+_default_cache: Optional[PharmGKBCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> PharmGKBCache:
+    """Process-wide cache at PharmGKBConfig.CACHE_PATH, opened on first use"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PharmGKBCache(PharmGKBConfig.CACHE_PATH, PharmGKBConfig.CACHE_TTL_HOURS,
+                                           PharmGKBConfig.CACHE_MAX_ENTRIES, PharmGKBConfig.CACHE_NEGATIVE_TTL_HOURS)
+    return _default_cache
@@ -0,0 +1,290 @@
+"""PharmGKB HTTP - shared keep-alive, rate-limited session with a circuit breaker for PharmGKB API requests"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import PharmGKBConfig
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter counting the sockets its pools actually open"""
+
+    def __init__(self, *args, **kwargs):
+        self.connections_opened = 0
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        def counting(pool_cls):
+            class CountingConnection(pool_cls.ConnectionCls):
+                def connect(self):
+                    with adapter._count_lock:
+                        adapter.connections_opened += 1
+                    super().connect()
+
+            return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': CountingConnection})
+
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting(pool_cls) for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: rate tokens per second, at most burst banked
+
+    acquire() blocks until a token is free. pause() stops issuing tokens
+    for a while (a server-side Retry-After) for every thread sharing the
+    bucket, and restarts from an empty bucket so paused threads don't
+    burst into the limit again.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(burst or rate, 1)
+        self.waited = 0.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token; returns the seconds spent waiting for it"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now > self._updated:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited += waited
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._tokens = 0
+                self._updated = until
+
+
+class PharmGKBUnavailable(requests.exceptions.ConnectionError):
+    """Raised without sending a request while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Closed, requests go through. After threshold consecutive failures
+    (connection errors, timeouts, 5xx) it opens and allow() refuses every
+    request for cooldown seconds, so callers fail immediately instead of
+    each waiting out its timeout. Then it is half-open: one trial request
+    is let through, and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.trips = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'open' if time.monotonic() - self._opened_at < self.cooldown else 'half-open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or (self._opened_at is None and self.failures >= self.threshold):
+                self._opened_at = time.monotonic()
+                self.trips += 1
+            self._trial_in_flight = False
+
+
+class PharmGKBSession(requests.Session):
+    """
+    requests.Session with a sized connection pool, default headers and a default timeout
+
+    Connections to api.pharmgkb.org are kept alive and reused, so only the
+    first request per pooled connection pays the TCP + TLS handshake. One
+    instance is shared by PharmGKBService, PharmGKBClient and the
+    concurrent lookup threads; pool_size should be at least the number of
+    threads issuing requests, or surplus connections are closed after use.
+
+    Requests are paced by a token bucket shared by all those threads, and
+    429/502/503/504 responses and connection errors are retried with
+    exponential backoff and full jitter, or after the server's Retry-After
+    (which also pauses the bucket). Only when max_retries is exhausted does
+    the caller see the error response. While the circuit breaker is open,
+    requests raise PharmGKBUnavailable at once.
+    """
+
+    DEFAULT_HEADERS = {"accept": "application/json"}
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(self, pool_size: int = 10, timeout: float = 10, headers: Optional[Dict[str, str]] = None,
+                 rate_limit: float = 0, burst: Optional[float] = None, max_retries: int = 0,
+                 backoff: float = 0.5, max_backoff: float = 30, breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            pool_size: Connections kept alive per host
+            timeout: Seconds, used when a request passes no timeout
+            headers: Sent with every request, on top of DEFAULT_HEADERS
+            rate_limit: Requests per second (0 = unlimited)
+            burst: Requests allowed back to back (default rate_limit)
+            max_retries: Retries per request after a retryable failure
+            backoff: First backoff ceiling in seconds, doubled per retry
+            max_backoff: Cap on any single wait, Retry-After included
+            breaker: Fails requests fast during an outage (None = never)
+        """
+        super().__init__()
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker
+        self.requests_sent = 0
+        self.retries = 0
+        self.throttled = 0
+        self._count_lock = threading.Lock()
+        self.headers.update(self.DEFAULT_HEADERS)
+        self.headers.update(headers or {})
+
+        self._adapter = _CountingAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount('https://', self._adapter)
+        self.mount('http://', self._adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            if self.breaker and not self.breaker.allow():
+                raise PharmGKBUnavailable(f"PharmGKB API unavailable ({self.breaker.failures} consecutive "
+                                          f"failures) - not retrying for {self.breaker.cooldown:g}s")
+            if self.limiter:
+                self.limiter.acquire()
+            with self._count_lock:
+                self.requests_sent += 1
+
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if self.breaker:
+                    self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                if self.breaker:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                retry_after = self._retry_after(response)
+                delay = min(retry_after, self.max_backoff) if retry_after is not None else self._backoff_delay(attempt)
+                if response.status_code == 429:
+                    with self._count_lock:
+                        self.throttled += 1
+                    # Every thread sharing the limit slows down, not just this one
+                    if self.limiter:
+                        self.limiter.pause(delay)
+                response.close()
+
+            with self._count_lock:
+                self.retries += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter: uniform up to backoff * 2^attempt, capped at max_backoff"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        """Seconds from a Retry-After header (delta-seconds or HTTP-date), if any"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Connection reuse and retry counters
+
+        'requests' sent, 'connections' opened (sockets, including
+        reconnects after the server closed one) and 'reused' - requests
+        that went over an already open connection - plus 'retries',
+        'throttled' (429 responses), the seconds spent waiting on the
+        rate limiter and the circuit breaker state.
+        """
+        connections = self._adapter.connections_opened
+        return {'requests': self.requests_sent, 'connections': connections,
+                'reused': max(self.requests_sent - connections, 0),
+                'retries': self.retries, 'throttled': self.throttled,
+                'rate_limited_seconds': round(self.limiter.waited, 2) if self.limiter else 0,
+                'breaker': self.breaker.state if self.breaker else 'none'}
+
+
+_default_session: Optional[PharmGKBSession] = None
+_default_lock = threading.Lock()
+
+
+def default_session() -> PharmGKBSession:
+    """Process-wide session sized by PharmGKBConfig, created on first use"""
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = PharmGKBSession(
+                PharmGKBConfig.HTTP_POOL_SIZE, PharmGKBConfig.HTTP_TIMEOUT,
+                rate_limit=PharmGKBConfig.RATE_LIMIT, burst=PharmGKBConfig.RATE_BURST,
+                max_retries=PharmGKBConfig.MAX_RETRIES, backoff=PharmGKBConfig.RETRY_BACKOFF,
+                breaker=CircuitBreaker(PharmGKBConfig.BREAKER_THRESHOLD, PharmGKBConfig.BREAKER_COOLDOWN)
+            )
+    return _default_session
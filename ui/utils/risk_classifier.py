@@ -0,0 +1,98 @@
+"""Risk Classifier - keyword rules mapping impact/summary text to a risk level"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk_keywords.json')
+
+
+class _KeywordTable:
+    """
+    Prioritized keyword levels for one text field, compiled into one regex
+
+    The pattern has one alternative per level, in priority order, each
+    scanning the whole text for any of that level's keywords; matched from
+    the start of the text, the first alternative that succeeds is the
+    highest level with a keyword anywhere in it - the same answer as
+    checking each level's keywords in turn, overlapping keywords included.
+    Results are memoized, since the same summaries recur across variants.
+    """
+
+    MEMO_SIZE = 4096
+
+    def __init__(self, levels: List[Dict]):
+        self.levels = [level['risk'] for level in levels]
+        alternatives = [
+            f"(?P<level{rank}>.*?(?:{'|'.join(re.escape(keyword.lower()) for keyword in level['keywords'])}))"
+            for rank, level in enumerate(levels) if level['keywords']
+        ]
+        self.pattern = re.compile('|'.join(alternatives), re.DOTALL) if alternatives else None
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def match(self, text: Optional[str]) -> Optional[str]:
+        """Highest-priority level with a keyword in text, or None"""
+        if not text or self.pattern is None:
+            return None
+        try:
+            return self._memo[text]
+        except KeyError:
+            pass
+
+        found = self.pattern.match(text.lower())
+        level = self.levels[int(found.lastgroup[len('level'):])] if found else None
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[text] = level
+        return level
+
+    def match_many(self, texts: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """match() for each text, matching each distinct text once"""
+        levels = {text: self.match(text) for text in dict.fromkeys(texts)}
+        return [levels[text] for text in texts]
+
+
+class RiskClassifier:
+    """
+    Risk level from a variant's impact annotation and a PharmGKB summary
+
+    Rules are data (risk_keywords.json): per field, levels in priority
+    order with their keywords. The impact is checked first; if it matches
+    nothing the summary decides, and if that matches nothing either the
+    default level is returned.
+    """
+
+    def __init__(self, rules: Dict):
+        self.impact = _KeywordTable(rules.get('impact', []))
+        self.summary = _KeywordTable(rules.get('summary', []))
+        self.default = rules.get('default', 'Unknown')
+
+    @classmethod
+    def from_json(cls, path: str) -> 'RiskClassifier':
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def load_default(cls) -> 'RiskClassifier':
+        """Classifier over the bundled keyword rules"""
+        return cls.from_json(DEFAULT_RULES_PATH)
+
+    def classify(self, summary: Optional[str], impact: Optional[str] = None) -> str:
+        return self.impact.match(impact) or self.summary.match(summary) or self.default
+
+    def classify_many(self, summaries: Sequence[Optional[str]],
+                      impacts: Optional[Iterable[Optional[str]]] = None) -> List[str]:
+        """
+        classify() for many texts at once
+
+        Args:
+            summaries: Summary text per item
+            impacts: Impact text per item (same length), or None for none
+        """
+        summary_levels = self.summary.match_many(summaries)
+        if impacts is None:
+            return [level or self.default for level in summary_levels]
+
+        impact_levels = self.impact.match_many(list(impacts))
+        return [impact_level or summary_level or self.default
+                for impact_level, summary_level in zip(impact_levels, summary_levels)]
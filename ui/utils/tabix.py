@@ -0,0 +1,306 @@
+"""Tabix/CSI index support - region queries into BGZF-compressed VCFs"""
+import gzip
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .bgzf import BGZFReader, BGZFWriter
+from .gene_panel import canonical_chrom
+
+# Binning scheme used by .tbi files (CSI stores its own)
+TBI_MIN_SHIFT = 14
+TBI_DEPTH = 5
+
+# Tabix preset for VCF: format, seq/begin/end columns, comment char, skip lines
+_VCF_PRESET = (2, 1, 2, 0, ord('#'), 0)
+
+
+def reg2bin(beg: int, end: int, min_shift: int = TBI_MIN_SHIFT, depth: int = TBI_DEPTH) -> int:
+    """Smallest bin fully containing the 0-based half-open interval [beg, end)"""
+    end -= 1
+    shift = min_shift
+    offset = ((1 << depth * 3) - 1) // 7
+    for level in range(depth, 0, -1):
+        if beg >> shift == end >> shift:
+            return offset + (beg >> shift)
+        shift += 3
+        offset -= 1 << (level - 1) * 3
+    return 0
+
+
+def reg2bins(beg: int, end: int, min_shift: int = TBI_MIN_SHIFT, depth: int = TBI_DEPTH) -> List[int]:
+    """All bins that may hold records overlapping [beg, end)"""
+    bins = []
+    end -= 1
+    shift = min_shift + depth * 3
+    offset = 0
+    for level in range(depth + 1):
+        bins.extend(range(offset + (beg >> shift), offset + (end >> shift) + 1))
+        shift -= 3
+        offset += 1 << level * 3
+    return bins
+
+
+def find_index(vcf_path: str) -> Optional[str]:
+    """Return the .tbi or .csi index sitting next to vcf_path, if any"""
+    for suffix in ('.tbi', '.csi'):
+        if os.path.exists(vcf_path + suffix):
+            return vcf_path + suffix
+    return None
+
+
+class TabixIndex:
+    """
+    View of a .tbi or .csi index
+
+    Only the sequence boundaries are located up front; bins and linear
+    offsets for a sequence are decoded the first time it is queried, so a
+    panel touching a handful of chromosomes never parses the rest.
+    """
+
+    def __init__(self, data: bytes, names: List[str], ref_offsets: List[int],
+                 min_shift: int, depth: int, csi: bool):
+        self._data = data
+        self.names = names
+        self._ref_offsets = ref_offsets
+        self._refs: Dict[int, Tuple[Dict[int, Tuple[int, List[int]]], List[int]]] = {}
+        self.min_shift = min_shift
+        self.depth = depth
+        self._csi = csi
+        self._max_bin = ((1 << (depth + 1) * 3) - 1) // 7
+        self._name_to_id = {}
+        for ref_id, name in enumerate(names):
+            self._name_to_id[name] = ref_id
+            self._name_to_id.setdefault(canonical_chrom(name), ref_id)
+
+    @classmethod
+    def load(cls, index_path: str) -> 'TabixIndex':
+        """Load a .tbi or .csi index (both are BGZF-compressed)"""
+        with gzip.open(index_path, 'rb') as f:
+            data = f.read()
+
+        magic = data[:4]
+        if magic == b'TBI\x01':
+            n_ref, = struct.unpack_from('<i', data, 4)
+            names, pos = cls._parse_names(data, 8)
+            return cls(data, names, cls._locate_refs(data, pos, n_ref, False),
+                       TBI_MIN_SHIFT, TBI_DEPTH, csi=False)
+
+        if magic == b'CSI\x01':
+            min_shift, depth, l_aux = struct.unpack_from('<iii', data, 4)
+            names = cls._parse_names(data, 16)[0] if l_aux >= 28 else []
+            pos = 16 + l_aux
+            n_ref, = struct.unpack_from('<i', data, pos)
+            return cls(data, names, cls._locate_refs(data, pos + 4, n_ref, True),
+                       min_shift, depth, csi=True)
+
+        raise ValueError(f"Unrecognised index format: {index_path}")
+
+    @staticmethod
+    def _parse_names(data: bytes, pos: int) -> Tuple[List[str], int]:
+        """Parse the tabix header block (preset + names), returning names and new pos"""
+        l_nm, = struct.unpack_from('<i', data, pos + 24)
+        pos += 28
+        names = data[pos:pos + l_nm].rstrip(b'\x00').split(b'\x00')
+        return [n.decode() for n in names if n], pos + l_nm
+
+    @staticmethod
+    def _locate_refs(data: bytes, pos: int, n_ref: int, csi: bool) -> List[int]:
+        """Walk the index once, recording where each sequence's bins start"""
+        offsets = []
+        bin_header = 16 if csi else 8
+        for _ in range(n_ref):
+            offsets.append(pos)
+            n_bin, = struct.unpack_from('<i', data, pos)
+            pos += 4
+            for _ in range(n_bin):
+                n_chunk, = struct.unpack_from('<i', data, pos + bin_header - 4)
+                pos += bin_header + 16 * n_chunk
+            if not csi:
+                n_intv, = struct.unpack_from('<i', data, pos)
+                pos += 4 + 8 * n_intv
+        return offsets
+
+    def _ref(self, ref_id: int):
+        """Decode (bins, linear) for one sequence, caching the result"""
+        if ref_id in self._refs:
+            return self._refs[ref_id]
+
+        data = self._data
+        pos = self._ref_offsets[ref_id]
+        n_bin, = struct.unpack_from('<i', data, pos)
+        pos += 4
+        bins = {}
+        for _ in range(n_bin):
+            if self._csi:
+                bin_no, loffset, n_chunk = struct.unpack_from('<IQi', data, pos)
+                pos += 16
+            else:
+                bin_no, n_chunk = struct.unpack_from('<Ii', data, pos)
+                loffset = 0
+                pos += 8
+            bins[bin_no] = (loffset, list(struct.unpack_from(f'<{2 * n_chunk}Q', data, pos)))
+            pos += 16 * n_chunk
+
+        linear = []
+        if not self._csi:
+            n_intv, = struct.unpack_from('<i', data, pos)
+            linear = list(struct.unpack_from(f'<{n_intv}Q', data, pos + 4))
+
+        self._refs[ref_id] = (bins, linear)
+        return bins, linear
+
+    def chunks(self, chrom: str, beg: int, end: int) -> List[Tuple[int, int]]:
+        """Merged virtual-offset chunks that may hold records overlapping [beg, end)"""
+        ref_id = self._name_to_id.get(chrom, self._name_to_id.get(canonical_chrom(chrom)))
+        if ref_id is None:
+            return []
+
+        bins, linear = self._ref(ref_id)
+        min_offset = self._min_offset(bins, linear, beg)
+        candidates = []
+        for bin_no in reg2bins(beg, end, self.min_shift, self.depth):
+            if bin_no in bins and bin_no < self._max_bin:
+                flat = bins[bin_no][1]
+                candidates.extend((flat[i], flat[i + 1]) for i in range(0, len(flat), 2)
+                                  if flat[i + 1] > min_offset)
+
+        merged = []
+        for chunk_beg, chunk_end in sorted(candidates):
+            if merged and chunk_beg <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], chunk_end)
+            else:
+                merged.append([max(chunk_beg, min_offset), chunk_end])
+        return [tuple(c) for c in merged]
+
+    def _min_offset(self, bins: dict, linear: List[int], beg: int) -> int:
+        """Lowest virtual offset a record overlapping beg can start at"""
+        if linear:
+            return linear[min(beg >> TBI_MIN_SHIFT, len(linear) - 1)]
+
+        # CSI: use the loffset of the finest bin covering beg that exists
+        shift = self.min_shift
+        offset = ((1 << self.depth * 3) - 1) // 7
+        for level in range(self.depth, -1, -1):
+            bin_no = offset + (beg >> shift)
+            if bin_no in bins:
+                return bins[bin_no][0]
+            if level:
+                shift += 3
+                offset -= 1 << (level - 1) * 3
+        return 0
+
+    def fetch(self, reader: BGZFReader, chrom: str, beg: int, end: int) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (virtual offset, line) for records overlapping [beg, end)
+
+        Assumes a coordinate-sorted VCF, as tabix itself does.
+        """
+        wanted = canonical_chrom(chrom)
+        for chunk_beg, chunk_end in self.chunks(chrom, beg, end):
+            reader.seek(chunk_beg)
+            while reader.tell() < chunk_end:
+                offset = reader.tell()
+                line = reader.readline()
+                if not line:
+                    break
+                if line.startswith(b'#'):
+                    continue
+
+                fields = line.split(b'\t', 4)
+                if canonical_chrom(fields[0].decode()) != wanted:
+                    continue
+                record_beg = int(fields[1]) - 1
+                if record_beg >= end:
+                    break
+                if record_beg + max(len(fields[3]), 1) > beg:
+                    yield offset, line
+
+
+def build_tabix_index(vcf_path: str, index_path: Optional[str] = None) -> str:
+    """
+    Build a .tbi index for a coordinate-sorted BGZF VCF
+
+    Produces the same layout as `tabix -p vcf`, so the index can also be used
+    by htslib-based tools. Returns the path written (defaults to vcf_path + '.tbi').
+    """
+    index_path = index_path or vcf_path + '.tbi'
+    names: List[str] = []
+    refs: List[dict] = []
+    n_no_coor = 0
+
+    with BGZFReader(vcf_path) as reader:
+        current = None
+        last_beg = -1
+        while True:
+            start = reader.tell()
+            line = reader.readline()
+            if not line:
+                break
+            if line.startswith(b'#'):
+                continue
+            end_offset = reader.tell()
+
+            fields = line.split(b'\t', 4)
+            if len(fields) < 4:
+                n_no_coor += 1
+                continue
+            chrom = fields[0].decode()
+            beg = int(fields[1]) - 1
+            end = beg + max(len(fields[3]), 1)
+
+            if current is None or names[-1] != chrom:
+                if chrom in names:
+                    raise ValueError(f"VCF is not sorted: {chrom} appears in more than one block")
+                names.append(chrom)
+                current = {'bins': {}, 'linear': [], 'off_beg': start, 'off_end': end_offset, 'n_mapped': 0}
+                refs.append(current)
+                last_beg = -1
+            if beg < last_beg:
+                raise ValueError(f"VCF is not sorted: {chrom}:{beg + 1} follows {chrom}:{last_beg + 1}")
+            last_beg = beg
+
+            chunks = current['bins'].setdefault(reg2bin(beg, end), [])
+            if chunks and chunks[-1][1] == start:
+                chunks[-1][1] = end_offset
+            else:
+                chunks.append([start, end_offset])
+
+            linear = current['linear']
+            last_window = (end - 1) >> TBI_MIN_SHIFT
+            while len(linear) <= last_window:
+                linear.append(None)
+            for window in range(beg >> TBI_MIN_SHIFT, last_window + 1):
+                if linear[window] is None:
+                    linear[window] = start
+
+            current['off_end'] = end_offset
+            current['n_mapped'] += 1
+
+    packed_names = b''.join(name.encode() + b'\x00' for name in names)
+    out = [b'TBI\x01', struct.pack('<i', len(names)),
+           struct.pack('<6i', *_VCF_PRESET), struct.pack('<i', len(packed_names)), packed_names]
+
+    pseudo_bin = ((1 << (TBI_DEPTH + 1) * 3) - 1) // 7 + 1
+    for ref in refs:
+        bins = ref['bins']
+        out.append(struct.pack('<i', len(bins) + 1))
+        for bin_no in sorted(bins):
+            out.append(struct.pack('<Ii', bin_no, len(bins[bin_no])))
+            out.extend(struct.pack('<QQ', *chunk) for chunk in bins[bin_no])
+        # htslib-style pseudo-bin carrying per-sequence offsets and record counts
+        out.append(struct.pack('<Ii', pseudo_bin, 2))
+        out.append(struct.pack('<QQQQ', ref['off_beg'], ref['off_end'], ref['n_mapped'], 0))
+
+        # Empty windows inherit the previous offset so lookups stay conservative
+        linear, previous = [], 0
+        for offset in ref['linear']:
+            previous = offset if offset is not None else previous
+            linear.append(previous)
+        out.append(struct.pack(f'<i{len(linear)}Q', len(linear), *linear))
+
+    out.append(struct.pack('<Q', n_no_coor))
+
+    with BGZFWriter(index_path) as writer:
+        writer.write(b''.join(out))
+    return index_path
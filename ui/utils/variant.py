@@ -0,0 +1,83 @@
+"""Variant - compact record type for parsed VCF lines"""
+from sys import intern
+from typing import Dict, Optional
+
+
+def rsid_from_key(key: Optional[str]) -> Optional[str]:
+    """The rsID of a stored variant ID, dropping the ':<ALT>' of a split allele (see Variant.key)"""
+    if key and key.startswith('rs') and ':' in key:
+        return key.split(':', 1)[0]
+    return key
+
+
+class Variant:
+    """
+    One parsed VCF record
+
+    Uses __slots__ instead of a per-record dict, and interns the highly
+    repetitive chrom/gene/genotype/impact strings so millions of records
+    share a handful of string objects. Dict-style get()/[] access is kept
+    for code written against the older dict records.
+
+    split marks one ALT of a multi-allelic site whose records share an ID;
+    key then carries the ALT so the alleles are stored as separate rows,
+    while rsid stays the PharmGKB lookup key.
+    """
+
+    __slots__ = ('chrom', 'pos', 'ref', 'alt', 'rsid', 'gene', 'genotype', 'qual', 'impact', 'genotypes', 'split')
+
+    def __init__(self, chrom: str, pos: int, ref: str, alt: str, rsid: str, gene: str,
+                 genotype: Optional[str], qual: str, impact: str,
+                 genotypes: Optional[Dict[str, Optional[str]]] = None, split: bool = False):
+        self.chrom = intern(chrom)
+        self.pos = pos
+        self.ref = ref
+        self.alt = alt
+        self.rsid = rsid
+        self.gene = intern(gene)
+        self.genotype = intern(genotype) if genotype else genotype
+        self.qual = qual
+        self.impact = intern(impact)
+        self.genotypes = genotypes
+        self.split = split
+
+    @property
+    def key(self) -> str:
+        """Stored variant ID (final_genetic_info.variant): the rsID, plus ':<ALT>' for a split allele"""
+        return f"{self.rsid}:{self.alt}" if self.split else self.rsid
+
+    def get(self, key: str, default=None):
+        """dict.get() equivalent over the record's fields"""
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def with_genotype(self, genotype: Optional[str]) -> 'Variant':
+        """Copy of this record carrying a single sample's genotype"""
+        return Variant(self.chrom, self.pos, self.ref, self.alt, self.rsid,
+                       self.gene, genotype, self.qual, self.impact, split=self.split)
+
+    def to_dict(self) -> Dict:
+        """Plain dict form, omitting genotypes unless present and split unless set"""
+        record = {name: getattr(self, name) for name in self.__slots__}
+        if record['genotypes'] is None:
+            del record['genotypes']
+        if not record['split']:
+            del record['split']
+        return record
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Variant):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"Variant({self.chrom}:{self.pos} {self.ref}>{self.alt} {self.rsid} "
+                f"gene={self.gene} gt={self.genotype})")
@@ -0,0 +1,207 @@
+"""Variant Batch - columnar, NumPy-backed storage for chunks of parsed VCF records"""
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional - only needed for columnar batches
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Columnar variant batches require numpy (pip install numpy)")
+
+
+class StringPool:
+    """Immutable array of strings stored as one joined string plus offsets"""
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, values: List[str]):
+        _require_numpy()
+        self.data = ''.join(values)
+        self.offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(v) for v in values], out=self.offsets[1:])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def take(self, indexes) -> 'StringPool':
+        return StringPool([self[int(i)] for i in indexes])
+
+
+class Categorical:
+    """Integer codes into a small list of distinct values (code -1 means None)"""
+
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        code = self.codes[i]
+        return self.categories[code] if code >= 0 else None
+
+    def take(self, indexes) -> 'Categorical':
+        return Categorical(self.codes[indexes], self.categories)
+
+    def counts(self) -> Dict[str, int]:
+        """Occurrences of each category (None excluded)"""
+        valid = self.codes[self.codes >= 0]
+        counts = np.bincount(valid, minlength=len(self.categories))
+        return {category: int(n) for category, n in zip(self.categories, counts) if n}
+
+
+class VariantBatch:
+    """
+    A fixed-size chunk of variants stored column by column
+
+    pos/qual/split are NumPy arrays, chrom/gene/genotype/impact are
+    categorical codes, and rsid/ref/alt live in string pools, so a batch
+    costs a few bytes per record instead of a nine-key dict each. QUAL is
+    float64 so values read back exactly as the VCF gave them.
+    """
+
+    CATEGORICAL_FIELDS = ('chrom', 'gene', 'genotype', 'impact')
+    POOLED_FIELDS = ('rsid', 'ref', 'alt')
+
+    def __init__(self, pos, qual, split, categoricals: Dict[str, Categorical], pools: Dict[str, StringPool]):
+        self.pos = pos
+        self.qual = qual
+        self.split = split
+        self.chrom = categoricals['chrom']
+        self.gene = categoricals['gene']
+        self.genotype = categoricals['genotype']
+        self.impact = categoricals['impact']
+        self.rsid = pools['rsid']
+        self.ref = pools['ref']
+        self.alt = pools['alt']
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def row(self, i: int) -> Dict:
+        """Record i as a dict with the fields of a Variant record"""
+        qual = self.qual[i]
+        record = {
+            'chrom': self.chrom[i],
+            'pos': int(self.pos[i]),
+            'ref': self.ref[i],
+            'alt': self.alt[i],
+            'rsid': self.rsid[i],
+            'gene': self.gene[i],
+            'genotype': self.genotype[i],
+            'qual': '.' if np.isnan(qual) else np.format_float_positional(qual, trim='-'),
+            'impact': self.impact[i]
+        }
+        # Like Variant.to_dict(), split only appears when set
+        if self.split[i]:
+            record['split'] = True
+        return record
+
+    def to_dicts(self) -> List[Dict]:
+        """Convert back to the list-of-dicts form used by the existing UI"""
+        return [self.row(i) for i in range(len(self))]
+
+    def take(self, mask_or_indexes) -> 'VariantBatch':
+        """New batch with only the selected rows (boolean mask or index array)"""
+        indexes = np.flatnonzero(mask_or_indexes) if getattr(mask_or_indexes, 'dtype', None) == bool \
+            else np.asarray(mask_or_indexes)
+        return VariantBatch(
+            self.pos[indexes],
+            self.qual[indexes],
+            self.split[indexes],
+            {name: getattr(self, name).take(indexes) for name in self.CATEGORICAL_FIELDS},
+            {name: getattr(self, name).take(indexes) for name in self.POOLED_FIELDS}
+        )
+
+    def gene_counts(self) -> Dict[str, int]:
+        """Number of variants per gene"""
+        return self.gene.counts()
+
+
+class VariantBatchBuilder:
+    """
+    Accumulates Variant records (or equivalent dicts) and emits VariantBatch chunks
+
+    Category codes are shared across every batch from the same builder, so
+    codes from different chunks of one file are directly comparable.
+    """
+
+    def __init__(self, batch_size: int = 100_000):
+        _require_numpy()
+        self.batch_size = batch_size
+        self._levels: Dict[str, Dict[str, int]] = {name: {} for name in VariantBatch.CATEGORICAL_FIELDS}
+        self._reset()
+
+    def _reset(self):
+        self._pos: List[int] = []
+        self._qual: List[float] = []
+        self._split: List[bool] = []
+        self._codes: Dict[str, List[int]] = {name: [] for name in VariantBatch.CATEGORICAL_FIELDS}
+        self._strings: Dict[str, List[str]] = {name: [] for name in VariantBatch.POOLED_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def append(self, variant: Dict) -> Optional[VariantBatch]:
+        """Add one record; returns a full batch once batch_size is reached"""
+        self._pos.append(int(variant['pos']))
+        qual = variant.get('qual')
+        try:
+            self._qual.append(float(qual))
+        except (TypeError, ValueError):
+            self._qual.append(float('nan'))
+        self._split.append(bool(variant.get('split')))
+
+        for name in VariantBatch.CATEGORICAL_FIELDS:
+            value = variant.get(name)
+            if value is None:
+                self._codes[name].append(-1)
+            else:
+                levels = self._levels[name]
+                self._codes[name].append(levels.setdefault(value, len(levels)))
+
+        for name in VariantBatch.POOLED_FIELDS:
+            self._strings[name].append(variant.get(name) or '')
+
+        if len(self._pos) >= self.batch_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[VariantBatch]:
+        """Emit whatever has been accumulated as a (possibly short) batch"""
+        if not self._pos:
+            return None
+
+        categoricals = {
+            name: Categorical(np.array(self._codes[name], dtype=np.int32), list(self._levels[name]))
+            for name in VariantBatch.CATEGORICAL_FIELDS
+        }
+        pools = {name: StringPool(self._strings[name]) for name in VariantBatch.POOLED_FIELDS}
+        batch = VariantBatch(
+            np.array(self._pos, dtype=np.int64),
+            np.array(self._qual, dtype=np.float64),
+            np.array(self._split, dtype=bool),
+            categoricals,
+            pools
+        )
+        self._reset()
+        return batch
+
+
+def iter_batches(variants: Iterable[Dict], batch_size: int = 100_000) -> Iterable[VariantBatch]:
+    """Group a stream of Variant records into VariantBatch chunks"""
+    builder = VariantBatchBuilder(batch_size)
+    for variant in variants:
+        batch = builder.append(variant)
+        if batch is not None:
+            yield batch
+
+    batch = builder.flush()
+    if batch is not None:
+        yield batch
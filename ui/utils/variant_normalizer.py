@@ -0,0 +1,130 @@
+"""Variant Normalizer - split multi-allelic records and put alleles in a canonical form"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .gene_panel import canonical_chrom
+from .variant import Variant
+
+# ALT values that are not plain sequence and are passed through untouched
+# ('.' = no ALT, '*' = spanning deletion, '<DEL>' etc. = symbolic, breakends)
+_SEQUENCE_BASES = frozenset('ACGTN')
+
+
+def _is_sequence(allele: str) -> bool:
+    return bool(allele) and all(base in _SEQUENCE_BASES for base in allele)
+
+
+def trim_alleles(pos: int, ref: str, alt: str) -> Tuple[int, str, str]:
+    """
+    Reduce a REF/ALT pair to its parsimonious form
+
+    Shared trailing bases are removed first, then shared leading bases
+    (moving pos right), always keeping at least one base per allele. Without
+    a reference sequence an indel can only be shifted left within the bases
+    the record itself carries, so 'CAA>CA' becomes 'CA>C' but an indel in a
+    longer repeat is not moved past the start of its REF.
+    """
+    ref = ref.upper()
+    alt = alt.upper()
+    if not (_is_sequence(ref) and _is_sequence(alt)):
+        return pos, ref, alt
+
+    end = 0
+    limit = min(len(ref), len(alt)) - 1
+    while end < limit and ref[-1 - end] == alt[-1 - end]:
+        end += 1
+    if end:
+        ref, alt = ref[:-end], alt[:-end]
+
+    start = 0
+    limit = min(len(ref), len(alt)) - 1
+    while start < limit and ref[start] == alt[start]:
+        start += 1
+    return pos + start, ref[start:], alt[start:]
+
+
+def split_genotype(genotype: Optional[str], allele: int) -> Optional[str]:
+    """
+    Recode a genotype for the biallelic record of ALT number `allele`
+
+    That ALT becomes 1, every other ALT becomes 0 (as `bcftools norm -m-`),
+    missing alleles and the phasing separator are kept.
+    """
+    if not genotype:
+        return genotype
+    wanted = str(allele)
+    recoded = []
+    token = ''
+    for char in genotype + '/':
+        if char in '/|':
+            if not token.isdigit():
+                recoded.append(token)
+            else:
+                recoded.append('1' if token == wanted else '0')
+            recoded.append(char)
+            token = ''
+        else:
+            token += char
+    return ''.join(recoded[:-1])
+
+
+def normalize_variants(variants: Iterable[Variant]) -> Iterator[Variant]:
+    """
+    Streaming normalization stage between parsing and lookup
+
+    - Multi-allelic records are split into one record per ALT with
+      genotypes recoded; spanning-deletion ('*') ALTs are dropped
+    - REF/ALT are upper-cased and trimmed to their parsimonious form
+    - Chromosome names are canonical ('chr10' -> '10', 'chrM' -> 'MT')
+    - Records without an ID get their chr:pos key rebuilt from the
+      normalized chromosome and position, so 'chr10' and '10' files
+      produce the same key
+
+    An ID list ('rs1;rs2') matching the ALTs one to one is split alongside
+    them; otherwise every split record keeps the record's ID and is marked
+    split, so its storage key (Variant.key) carries the ALT. Records that
+    are already normalized are yielded as-is without being copied.
+    """
+    chroms: Dict[str, str] = {}
+
+    for variant in variants:
+        chrom = chroms.get(variant.chrom)
+        if chrom is None:
+            chrom = chroms[variant.chrom] = canonical_chrom(variant.chrom)
+
+        ref, alt = variant.ref, variant.alt
+        if ',' not in alt:
+            # Biallelic: only the alleles, chromosome and stand-in ID can change
+            if len(ref) == 1 and len(alt) == 1 and ref.isupper() and alt.isupper():
+                pos = variant.pos
+            else:
+                pos, ref, alt = trim_alleles(variant.pos, ref, alt)
+            if chrom == variant.chrom and pos == variant.pos and ref == variant.ref and alt == variant.alt:
+                yield variant
+                continue
+            rsid = variant.rsid
+            if rsid == f"chr{variant.chrom}:{variant.pos}":
+                rsid = f"chr{chrom}:{pos}"
+            yield Variant(chrom, pos, ref, alt, rsid, variant.gene, variant.genotype,
+                          variant.qual, variant.impact, variant.genotypes, variant.split)
+            continue
+
+        # The parser stands in 'chr<CHROM>:<POS>' for a missing ID
+        synthetic_id = variant.rsid == f"chr{variant.chrom}:{variant.pos}"
+        alts = alt.split(',')
+        ids: List[str] = variant.rsid.split(';')
+        shared_id = len(ids) != len(alts)
+        if shared_id:
+            ids = [variant.rsid] * len(alts)
+
+        for number, (alt, rsid) in enumerate(zip(alts, ids), start=1):
+            if alt == '*':
+                continue
+            pos, ref, alt = trim_alleles(variant.pos, variant.ref, alt)
+            if synthetic_id:
+                rsid = f"chr{chrom}:{pos}"
+
+            genotypes = variant.genotypes
+            if genotypes is not None:
+                genotypes = {sample: split_genotype(gt, number) for sample, gt in genotypes.items()}
+            yield Variant(chrom, pos, ref, alt, rsid, variant.gene, split_genotype(variant.genotype, number),
+                          variant.qual, variant.impact, genotypes, split=shared_id)
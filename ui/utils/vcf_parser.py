@@ -1,20 +1,99 @@
 """VCF File Parser - Extracts genetic variants from VCF files"""
+import gzip
+import mmap
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator, TextIO, Optional, Iterable
+
+from .bgzf import BGZFReader, is_bgzf
+from .gene_panel import GenePanel
+from .parallel_parser import ProgressCallback, iter_parallel
+from .tabix import TabixIndex, build_tabix_index, find_index
+from .variant import Variant
+from .variant_batch import VariantBatch, iter_batches
+
+# First two bytes of any gzip stream (BGZF is a series of gzip members)
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _mmap_lines(buffer: mmap.mmap, pos: int, end: int) -> Iterator[bytes]:
+    """Lines of buffer that start in [pos, end), read without an intermediate file buffer"""
+    buffer.seek(pos)
+    if end >= len(buffer):
+        yield from iter(buffer.readline, b'')
+        return
+
+    while buffer.tell() < end:
+        line = buffer.readline()
+        if not line:
+            break
+        yield line
+
+
+class InfoTokenizer:
+    """
+    Single-pass extractor for a fixed set of INFO keys
+
+    One precompiled pattern pulls every requested key out of the INFO
+    column in a single scan, so GENE, IMPACT, ANN and CSQ no longer cost a
+    separate search each. Keys that are not requested are never materialized.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(keys)
+        alternatives = '|'.join(re.escape(key) for key in self.keys)
+        self._pattern = re.compile(rf'(?:^|;)({alternatives})(?:=([^;]*))?(?=;|$)')
+
+    def tokenize(self, info: str) -> Dict[str, str]:
+        """Map each requested key present in info to its value ('' for flags)"""
+        return dict(self._pattern.findall(info))
 
 
 class VCFParser:
     """Parse VCF files and extract gene/variant/genotype information"""
 
-    def __init__(self, vcf_file_path: str):
+    # INFO keys read per record - extend to expose more annotation fields
+    INFO_KEYS = ('GENE', 'IMPACT', 'ANN', 'CSQ')
+
+    # Sub-field names holding gene symbol / impact in SnpEff ANN and VEP CSQ
+    ANNOTATION_FIELDS = {
+        'ANN': {'gene': 'Gene_Name', 'impact': 'Annotation_Impact'},
+        'CSQ': {'gene': 'SYMBOL', 'impact': 'IMPACT'},
+    }
+
+    # Column layout assumed when the file has no ##INFO header for ANN/CSQ
+    # (SnpEff ANN spec and VEP's default --vcf output)
+    DEFAULT_ANNOTATION_FORMATS = {
+        'ANN': ['Allele', 'Annotation', 'Annotation_Impact', 'Gene_Name', 'Gene_ID'],
+        'CSQ': ['Allele', 'Consequence', 'IMPACT', 'SYMBOL', 'Gene'],
+    }
+
+    # Sample columns from which the mmap scan beats text-mode parsing of a single
+    # sample; below that per-record parsing dominates and iter_variants() is faster
+    MMAP_MIN_SAMPLES = 8
+
+    def __init__(self, vcf_file_path: str, multi_sample: bool = False,
+                 samples: Optional[Iterable[str]] = None):
+        """
+        Args:
+            vcf_file_path: Path to a plain, gzip or BGZF VCF
+            multi_sample: Add a 'genotypes' {sample name: genotype} dict to every
+                          record, covering all sample columns
+            samples: Restrict 'genotypes' to these sample names (implies multi_sample)
+        """
         self.vcf_file_path = vcf_file_path
         self.variants = []
         self.sample_name = None
+        self.sample_names: List[str] = []
+        self.selected_samples = list(samples) if samples is not None else None
+        self.multi_sample = multi_sample or samples is not None
+        self._sample_columns: List[Tuple[str, int]] = []
+        self.info_tokenizer = InfoTokenizer(self.INFO_KEYS)
+        self.annotation_columns = self._build_annotation_columns(self.DEFAULT_ANNOTATION_FORMATS)
 
-    def parse(self) -> List[Dict]:
+    def parse(self) -> List[Variant]:
         """
         Parse VCF file and extract variants
-        Returns list of dicts with: {
+        Returns list of Variant records with: {
             'chrom': str,
             'pos': int,
             'ref': str,
@@ -22,47 +101,304 @@ class VCFParser:
             'rsid': str,
             'gene': str,
             'genotype': str,
-            'qual': str
+            'qual': str,
+            'impact': str
         }
+
+        Loads every record into memory - prefer iter_variants() for large files
+        """
+        self.variants = list(self.iter_variants())
+        return self.variants
+
+    def iter_variants(self, panel: Optional[GenePanel] = None) -> Iterator[Variant]:
+        """
+        Stream variants from the VCF file one record at a time
+
+        Yields the same records as parse() without retaining them, so memory
+        stays flat regardless of file size. sample_name is set once the
+        #CHROM header line has been read.
+
+        Args:
+            panel: Optional gene panel; records whose REF span lies outside it are
+                   skipped after reading only CHROM/POS/REF, before INFO/genotype parsing
         """
         try:
-            with open(self.vcf_file_path, 'r') as f:
-                header_line = None
+            with self._open() as f:
                 sample_index = None
 
                 for line in f:
-                    # Skip comments
+                    # Meta-information lines (only ANN/CSQ definitions matter)
                     if line.startswith('##'):
+                        self._parse_meta_line(line)
                         continue
 
                     # Parse header line
                     if line.startswith('#'):
-                        header_line = line.strip().split('\t')
-                        # Find sample column (after FORMAT)
-                        if 'FORMAT' in header_line:
-                            sample_index = header_line.index('FORMAT') + 1
-                            if sample_index < len(header_line):
-                                self.sample_name = header_line[sample_index]
+                        sample_index = self._parse_header_line(line)
                         continue
 
                     # Parse variant lines
-                    if not line.startswith('#'):
-                        variant = self._parse_variant_line(line, sample_index)
+                    variant = self._parse_record(line, sample_index, panel)
+                    if variant:
+                        yield variant
+
+        except FileNotFoundError:
+            raise Exception(f"VCF file not found: {self.vcf_file_path}")
+        except Exception as e:
+            raise Exception(f"Error parsing VCF file: {e}")
+
+    def iter_variants_mmap(self, panel: Optional[GenePanel] = None) -> Iterator[Variant]:
+        """
+        Stream variants from an uncompressed VCF by scanning a memory map
+
+        Yields the same records as iter_variants(), but lines are read from
+        the mapped pages without a file buffer or TextIOWrapper, and only the
+        columns up to the first sample (CHROM..INFO, FORMAT, GT) are split
+        out - on wide multi-sample files the per-sample columns are never
+        turned into separate strings. That only pays off on wide files: each
+        line is still decoded whole, and with a handful of sample columns
+        iter_variants() is faster. Compressed files fall back to iter_variants().
+        """
+        with open(self.vcf_file_path, 'rb') as f:
+            if f.read(2) == GZIP_MAGIC:
+                yield from self.iter_variants(panel)
+                return
+
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                return
+
+            with buffer:
+                sample_index, data_start = self._read_header(buffer)
+                yield from self._scan_buffer(buffer, data_start, len(buffer), sample_index, panel)
+
+    def iter_batches(self, batch_size: int = 100_000,
+                     panel: Optional[GenePanel] = None) -> Iterator[VariantBatch]:
+        """
+        Stream variants as columnar VariantBatch chunks (requires numpy)
+
+        Each batch holds up to batch_size records as NumPy arrays and string
+        pools; use VariantBatch.to_dicts() where the UI needs dicts.
+        """
+        return iter_batches(self.iter_variants(panel), batch_size)
+
+    def iter_panel_variants(self, panel: Optional[GenePanel] = None,
+                            build_index: bool = True) -> Iterator[Variant]:
+        """
+        Stream only the variants that fall inside a gene panel
+
+        For BGZF files the .tbi/.csi index next to the VCF is used to seek
+        straight to each region; if none exists and build_index is True a
+        .tbi is built once and reused on later imports. Other files fall
+        back to a linear scan that drops off-panel records before parsing them.
+
+        Args:
+            panel: Regions to extract (defaults to the bundled pharmacogene panel)
+            build_index: Build a missing index for BGZF files instead of scanning
+        """
+        panel = panel or GenePanel.load_default()
+
+        index_path = find_index(self.vcf_file_path) if is_bgzf(self.vcf_file_path) else None
+        if index_path is None:
+            if not build_index or not is_bgzf(self.vcf_file_path):
+                yield from self.iter_variants(panel)
+                return
+            try:
+                index_path = build_tabix_index(self.vcf_file_path)
+            except (OSError, ValueError) as e:
+                # Read-only location or unsorted file - scanning still works
+                print(f"[VCF] Could not build index, scanning instead: {e}")
+                yield from self.iter_variants(panel)
+                return
+
+        try:
+            index = TabixIndex.load(index_path)
+            with BGZFReader(self.vcf_file_path) as reader:
+                sample_index, _ = self._read_header(reader)
+                seen = set()
+
+                for chrom, start, end, _gene in panel.regions():
+                    for offset, line in index.fetch(reader, chrom, start, end):
+                        # Overlapping panel regions can return the same record twice
+                        if offset in seen:
+                            continue
+                        seen.add(offset)
+
+                        variant = self._parse_variant_line(line.decode(), sample_index)
                         if variant:
-                            self.variants.append(variant)
+                            yield variant
+
+        except Exception as e:
+            raise Exception(f"Error reading indexed VCF file: {e}")
+
+    def iter_variants_parallel(self, workers: Optional[int] = None, panel: Optional[GenePanel] = None,
+                               progress: Optional[ProgressCallback] = None) -> Iterator[Variant]:
+        """
+        Parse the file across a pool of worker processes
 
-            return self.variants
+        Plain files are split at newline-aligned byte offsets and BGZF files at
+        block boundaries; records come back in file order, a few chunks at a
+        time. Plain gzip cannot be split and is parsed sequentially.
 
+        Args:
+            workers: Worker processes (defaults to the CPU count)
+            panel: Optional gene panel applied inside the workers
+            progress: Called with (chunks done, total chunks) as chunks complete
+        """
+        try:
+            yield from iter_parallel(self, workers, panel, progress)
         except FileNotFoundError:
             raise Exception(f"VCF file not found: {self.vcf_file_path}")
         except Exception as e:
             raise Exception(f"Error parsing VCF file: {e}")
 
-    def _parse_variant_line(self, line: str, sample_index: int = None) -> Dict:
+    def _read_header(self, reader) -> Tuple[Optional[int], int]:
+        """
+        Read header lines from a binary reader (file or BGZFReader)
+
+        Returns the sample column and the offset (virtual offset for BGZF)
+        of the first record.
+        """
+        sample_index = None
+        reader.seek(0)
+        while True:
+            offset = reader.tell()
+            line = reader.readline()
+            if not line.startswith(b'#'):
+                return sample_index, offset
+            if line.startswith(b'##'):
+                self._parse_meta_line(line.decode())
+            else:
+                sample_index = self._parse_header_line(line.decode())
+
+    def _parse_meta_line(self, line: str):
+        """
+        Pick up the sub-field layout of ANN/CSQ from their ##INFO definitions
+
+        VEP writes 'Format: Allele|Consequence|...' and SnpEff writes
+        'Functional annotations: 'Allele | Annotation | ...'' in the
+        Description, so both are reduced to a pipe-separated column list.
+        """
+        for key in self.ANNOTATION_FIELDS:
+            if line.startswith(f'##INFO=<ID={key},'):
+                break
+        else:
+            return
+
+        match = re.search(r"Format:\s*([^\"']+)", line) or re.search(r"'([^']+)'", line)
+        if match:
+            columns = [column.strip() for column in match.group(1).split('|')]
+            self.annotation_columns.update(self._build_annotation_columns({key: columns}))
+
+    @classmethod
+    def _build_annotation_columns(cls, formats: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """Resolve ANNOTATION_FIELDS names to column indexes for each annotation key"""
+        columns = {}
+        for key, names in formats.items():
+            positions = {name: i for i, name in enumerate(names)}
+            columns[key] = {
+                field: positions[name]
+                for field, name in cls.ANNOTATION_FIELDS[key].items()
+                if name in positions
+            }
+        return columns
+
+    def _annotation_value(self, value: str, key: str, field: str) -> Optional[str]:
+        """Value of a sub-field of the first ANN/CSQ annotation, by header-derived index"""
+        index = self.annotation_columns[key].get(field)
+        if not value or index is None:
+            return None
+
+        # Only split as far as the column we need on the first annotation
+        parts = value.partition(',')[0].split('|', index + 1)
+        if index < len(parts) and parts[index] not in ('', '.'):
+            return parts[index]
+        return None
+
+    def _parse_header_line(self, line: str) -> Optional[int]:
+        """Parse the #CHROM header line, returning the sample column index"""
+        header_line = line.strip().split('\t')
+        sample_index = None
+        # Find sample column (after FORMAT)
+        if 'FORMAT' in header_line:
+            sample_index = header_line.index('FORMAT') + 1
+            if sample_index < len(header_line):
+                self.sample_name = header_line[sample_index]
+            self.sample_names = header_line[sample_index:]
+
+            columns = {name: sample_index + i for i, name in enumerate(self.sample_names)}
+            wanted = self.selected_samples if self.selected_samples is not None else self.sample_names
+            missing = [name for name in wanted if name not in columns]
+            if missing:
+                raise ValueError(f"Samples not found in VCF header: {', '.join(missing)}")
+            self._sample_columns = [(name, columns[name]) for name in wanted]
+        return sample_index
+
+    def _open(self) -> TextIO:
+        """
+        Open the VCF for text reading, decompressing on the fly if needed
+
+        Compression is detected from the gzip magic bytes rather than the
+        extension. BGZF files are valid multi-member gzip streams, so both
+        plain .gz and bgzip output are read block by block without a temp file.
+        """
+        with open(self.vcf_file_path, 'rb') as raw:
+            magic = raw.read(2)
+
+        if magic == GZIP_MAGIC:
+            return gzip.open(self.vcf_file_path, 'rt')
+        return open(self.vcf_file_path, 'r')
+
+    def _parse_record(self, line: str, sample_index: Optional[int],
+                      panel: Optional[GenePanel] = None) -> Optional[Variant]:
+        """Parse a record line, rejecting off-panel records from CHROM/POS/REF alone"""
+        if panel is not None:
+            fields = line.split('\t', 4)
+            if len(fields) < 5 or not fields[1].isdigit() or not self._in_panel(panel, fields):
+                return None
+        return self._parse_variant_line(line, sample_index)
+
+    @staticmethod
+    def _in_panel(panel: GenePanel, fields: List[str]) -> bool:
+        """Panel test over the whole REF span, matching the tabix query of iter_panel_variants()"""
+        pos = int(fields[1])
+        return panel.overlaps(fields[0], pos, pos + max(len(fields[3]), 1) - 1)
+
+    def _scan_buffer(self, buffer: mmap.mmap, pos: int, end: int, sample_index: Optional[int],
+                     panel: Optional[GenePanel] = None) -> Iterator[Variant]:
+        """
+        Parse every record line starting in buffer[pos:end]
+
+        Lines come straight off the map via mmap.readline(), and each is only
+        split as far as the first sample column: without multi_sample the
+        remaining sample columns stay one unsplit tail instead of thousands
+        of strings per line.
+        """
+        maxsplit = -1 if self.multi_sample else (sample_index if sample_index is not None else 8)
+        for line in _mmap_lines(buffer, pos, end):
+            if line.startswith(b'#'):
+                continue
+
+            fields = line.decode().strip().split('\t', maxsplit)
+            if panel is not None:
+                if len(fields) < 5 or not fields[1].isdigit() or not self._in_panel(panel, fields):
+                    continue
+            if maxsplit > 8 and len(fields) > maxsplit:
+                fields[maxsplit] = fields[maxsplit].partition('\t')[0]
+
+            variant = self._variant_from_fields(fields, sample_index)
+            if variant:
+                yield variant
+
+    def _parse_variant_line(self, line: str, sample_index: int = None) -> Optional[Variant]:
         """Parse a single variant line from VCF"""
-        fields = line.strip().split('\t')
+        return self._variant_from_fields(line.strip().split('\t'), sample_index)
 
-        if len(fields) < 8:
+    def _variant_from_fields(self, fields: List[str], sample_index: Optional[int]) -> Optional[Variant]:
+        """Build a Variant from a record's tab-separated columns"""
+        if len(fields) < 8 or not fields[1].isdigit():
             return None
 
         chrom = fields[0]
@@ -71,7 +407,7 @@ class VCFParser:
         ref = fields[3]
         alt = fields[4]
         qual = fields[5]
-        info = fields[7]
+        info = self.info_tokenizer.tokenize(fields[7])
 
         # Extract gene name from INFO field (GENE=, ANN or CSQ)
         gene = self._extract_gene_from_info(info)
@@ -84,65 +420,51 @@ class VCFParser:
         if sample_index is not None and sample_index < len(fields):
             genotype = self._extract_genotype(fields, sample_index)
 
-        return {
-            'chrom': chrom,
-            'pos': pos,
-            'ref': ref,
-            'alt': alt,
-            'rsid': rsid,
-            'gene': gene,
-            'genotype': genotype,
-            'qual': qual,
-            'impact': impact
-        }
+        # All (or selected) samples from the same split of the line
+        genotypes = self._extract_genotypes(fields) if self.multi_sample else None
+
+        return Variant(chrom, int(pos), ref, alt, rsid, gene, genotype, qual, impact, genotypes)
 
-    def _extract_impact_from_info(self, info_field: str) -> str:
+    def _extract_impact_from_info(self, info: Dict[str, str]) -> str:
         """
         Extract impact/clinical significance from INFO field
-        Looks for IMPACT= or CSQ fields with impact information
+        Looks for IMPACT=, then the impact column of SnpEff ANN / VEP CSQ
         """
         # Try custom IMPACT= format first
-        impact_match = re.search(r'IMPACT=([^;]+)', info_field)
-        if impact_match:
-            impact = impact_match.group(1).strip()
+        impact = info.get('IMPACT')
+        if impact:
+            impact = impact.strip()
             if impact and impact != '.':
                 return impact
 
+        for key in ('ANN', 'CSQ'):
+            if key in info:
+                impact = self._annotation_value(info[key], key, 'impact')
+                if impact:
+                    return impact
+
         # Default
         return "Unknown"
 
-    def _extract_gene_from_info(self, info_field: str) -> str:
+    def _extract_gene_from_info(self, info: Dict[str, str]) -> str:
         """
         Extract gene name from INFO field
         Supports custom GENE=, SnpEff (ANN) and VEP (CSQ) formats
         """
         # Try custom GENE= format first: GENE=SLCO1B1;...
-        gene_match = re.search(r'GENE=([^;]+)', info_field)
-        if gene_match:
-            gene = gene_match.group(1).strip()
+        gene = info.get('GENE')
+        if gene:
+            gene = gene.strip()
             if gene and gene != '.':
                 return gene
 
-        # Try SnpEff ANN format: ANN=A|missense_variant|...|SLCO1B1|...
-        ann_match = re.search(r'ANN=([^;]*)', info_field)
-        if ann_match:
-            ann_value = ann_match.group(1).split(',')[0]  # Get first annotation
-            parts = ann_value.split('|')
-            if len(parts) > 4:
-                gene = parts[4]  # Gene name is at position 4
-                if gene and gene != '.':
+        # SnpEff ANN (Gene_Name) then VEP CSQ (SYMBOL), at the column the header declares
+        for key in ('ANN', 'CSQ'):
+            if key in info:
+                gene = self._annotation_value(info[key], key, 'gene')
+                if gene:
                     return gene
 
-        # Try VEP CSQ format: CSQ=...|GENE|...
-        csq_match = re.search(r'CSQ=([^;]*)', info_field)
-        if csq_match:
-            csq_value = csq_match.group(1).split(',')[0]  # Get first consequence
-            parts = csq_value.split('|')
-            # Gene position varies, but often around index 3-4
-            for part in parts:
-                if part and not part.isdigit() and len(part) < 50 and part != '.':  # Likely a gene name
-                    return part
-
         return "Unknown"
 
     def _extract_genotype(self, fields: List[str], sample_index: int) -> str:
@@ -168,6 +490,20 @@ class VCFParser:
 
         return None
 
+    def _extract_genotypes(self, fields: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Extract the genotype of every selected sample column
+        Returns {sample name: genotype}, with None for missing calls
+        """
+        if len(fields) <= 8 or not fields[8].startswith('GT'):
+            return {name: None for name, _ in self._sample_columns}
+
+        genotypes = {}
+        for name, column in self._sample_columns:
+            genotype = fields[column].partition(':')[0] if column < len(fields) else '.'
+            genotypes[name] = genotype if genotype != '.' else None
+        return genotypes
+
     def get_variants_summary(self) -> str:
         """Return human-readable summary of parsed variants"""
         if not self.variants:
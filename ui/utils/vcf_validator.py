@@ -0,0 +1,247 @@
+"""VCF Validator - fast pre-pass that rejects malformed VCFs before parsing and lookup"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .bgzf import EOF_BLOCK, is_bgzf
+from .vcf_parser import VCFParser
+
+MANDATORY_COLUMNS = ['#CHROM', 'POS', 'ID', 'REF', 'ALT', 'QUAL', 'FILTER', 'INFO']
+
+# chr1 length identifies the build when ##contig lines carry no assembly
+_CHR1_LENGTHS = {248956422: 'GRCh38', 249250621: 'GRCh37'}
+_BUILD_NAMES = (
+    (re.compile(r'grch38|hg38|hs38|b38', re.I), 'GRCh38'),
+    (re.compile(r'grch37|hg19|hs37|b37|human_g1k_v37', re.I), 'GRCh37'),
+)
+
+_SEQUENCE = re.compile(r'[ACGTNacgtn]+')
+# '.', spanning deletion, symbolic (<DEL>) and breakend (G]17:198982]) ALTs
+_ALT = re.compile(r'\.|\*|<[^>]+>|[ACGTNacgtn]*[\[\]][^\[\]]+[\[\]][ACGTNacgtn]*|[ACGTNacgtn.]+')
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    """One problem found in the file; line 0 means the file as a whole"""
+    line: int
+    message: str
+    severity: str = 'error'
+
+    def __str__(self) -> str:
+        where = f"line {self.line}" if self.line else "file"
+        return f"{where}: {self.message}"
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of a validation pre-pass"""
+    path: str
+    issues: List[ValidationIssue] = field(default_factory=list)
+    sample_names: List[str] = field(default_factory=list)
+    build: Optional[str] = None
+    records_checked: int = 0
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == 'error']
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == 'warning']
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def format_errors(self) -> str:
+        name = os.path.basename(self.path)
+        return f"Invalid VCF {name}:\n" + "\n".join(f"  {issue}" for issue in self.errors)
+
+
+class VCFValidationError(ValueError):
+    """Raised when a VCF fails validation; carries the full report"""
+
+    def __init__(self, report: ValidationReport):
+        super().__init__(report.format_errors())
+        self.report = report
+
+    def __reduce__(self):
+        # Rebuilt from the report, not the message, when pickled back from a worker process
+        return type(self), (self.report,)
+
+
+class VCFValidator:
+    """
+    Cheap structural checks over the header and the first records
+
+    Reads only the header and up to max_records records (streamed, so a
+    gzip file is never fully decompressed) and stops at max_errors errors,
+    so a bad upload is rejected in milliseconds rather than after a full
+    parse and a PharmGKB query per variant.
+    """
+
+    def __init__(self, max_records: int = 1000, max_errors: int = 20, expected_build: str = 'GRCh38'):
+        self.max_records = max_records
+        self.max_errors = max_errors
+        self.expected_build = expected_build
+
+    def validate(self, vcf_file_path: str, multi_sample: bool = False,
+                 panel_only: bool = False) -> ValidationReport:
+        """
+        Validate a VCF
+
+        Args:
+            multi_sample: The import needs sample columns (plate VCF)
+            panel_only: The import uses panel coordinates - a build other
+                        than expected_build or unsorted records are errors
+                        rather than warnings
+        """
+        report = ValidationReport(vcf_file_path)
+
+        def add(line: int, message: str, severity: str = 'error') -> bool:
+            """Record an issue; True once enough errors were found to stop"""
+            report.issues.append(ValidationIssue(line, message, severity))
+            return len(report.errors) >= self.max_errors
+
+        if not os.path.isfile(vcf_file_path):
+            add(0, "file not found")
+            return report
+        if os.path.getsize(vcf_file_path) == 0:
+            add(0, "file is empty")
+            return report
+        if is_bgzf(vcf_file_path):
+            with open(vcf_file_path, 'rb') as f:
+                f.seek(-len(EOF_BLOCK), os.SEEK_END)
+                if f.read() != EOF_BLOCK:
+                    add(0, "BGZF end-of-file marker missing - file is truncated")
+
+        try:
+            with VCFParser(vcf_file_path)._open() as f:
+                self._check(f, report, add, multi_sample, panel_only)
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            add(0, f"unreadable ({e})")
+        return report
+
+    def _check(self, f, report: ValidationReport, add, multi_sample: bool, panel_only: bool):
+        header: Optional[List[str]] = None
+        contigs: Dict[str, int] = {}
+        format_warned = unsorted = False
+        last_chrom, last_pos = None, 0
+        finished_chroms = set()
+        line_number = 0
+
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip('\r\n')
+
+            if line_number == 1 and not line.startswith('##fileformat=VCF'):
+                if add(1, "missing ##fileformat=VCF first line - not a VCF file"):
+                    return
+
+            if line.startswith('##'):
+                if report.build is None:
+                    report.build = self._build_from_meta(line, contigs)
+                continue
+
+            if line.startswith('#'):
+                header = line.split('\t')
+                if header[:8] != MANDATORY_COLUMNS:
+                    if add(line_number, "header must start with " + ' '.join(MANDATORY_COLUMNS)):
+                        return
+                self._check_samples(header, line_number, report, add, multi_sample)
+                if report.build is None:
+                    report.build = _CHR1_LENGTHS.get(contigs.get('1'))
+                if report.build and report.build != self.expected_build:
+                    add(line_number, f"reference build looks like {report.build}, expected {self.expected_build}",
+                        'error' if panel_only else 'warning')
+                continue
+
+            if not line:
+                continue
+            if header is None:
+                add(line_number, "record before the #CHROM header line")
+                return
+
+            report.records_checked += 1
+            fields = line.split('\t')
+            if len(fields) < len(MANDATORY_COLUMNS):
+                stop = add(line_number, f"{len(fields)} columns, a record needs at least {len(MANDATORY_COLUMNS)}")
+            elif len(fields) != len(header):
+                stop = add(line_number, f"{len(fields)} columns, header has {len(header)}")
+            else:
+                stop = self._check_record(fields, line_number, add)
+                if not format_warned and len(fields) > 8 and not fields[8].startswith('GT'):
+                    add(line_number, "FORMAT does not start with GT - genotypes will be missing", 'warning')
+                    format_warned = True
+
+                chrom, pos = fields[0], fields[1]
+                if pos.isdigit() and not unsorted:
+                    if chrom != last_chrom:
+                        unsorted = chrom in finished_chroms
+                        finished_chroms.add(last_chrom)
+                        last_chrom, last_pos = chrom, 0
+                    unsorted = unsorted or int(pos) < last_pos
+                    last_pos = int(pos)
+                    if unsorted:
+                        add(line_number, "records are not coordinate-sorted",
+                            'error' if panel_only else 'warning')
+
+            if stop or report.records_checked >= self.max_records:
+                return
+
+        if header is None:
+            add(line_number, "no #CHROM header line")
+        elif not report.records_checked:
+            add(line_number, "no variant records")
+
+    def _check_samples(self, header: List[str], line_number: int, report: ValidationReport, add,
+                       multi_sample: bool):
+        if len(header) <= 8:
+            if multi_sample:
+                add(line_number, "no FORMAT/sample columns - cannot import samples")
+            else:
+                add(line_number, "sites-only VCF (no sample column) - genotypes will be missing", 'warning')
+            return
+        if header[8] != 'FORMAT':
+            add(line_number, f"column 9 is '{header[8]}', expected FORMAT")
+            return
+
+        report.sample_names = header[9:]
+        if not report.sample_names:
+            add(line_number, "FORMAT column without any sample column")
+        if any(not name.strip() for name in report.sample_names):
+            add(line_number, "empty sample name")
+        duplicates = sorted({name for name in report.sample_names if report.sample_names.count(name) > 1})
+        if duplicates:
+            add(line_number, f"duplicate sample names: {', '.join(duplicates)}")
+
+    @staticmethod
+    def _check_record(fields: List[str], line_number: int, add) -> bool:
+        stop = False
+        if not fields[0]:
+            stop = add(line_number, "empty CHROM") or stop
+        if not fields[1].isdigit():
+            stop = add(line_number, f"POS '{fields[1]}' is not an integer") or stop
+        if not _SEQUENCE.fullmatch(fields[3]):
+            stop = add(line_number, f"REF '{fields[3]}' is not a base sequence") or stop
+        if not all(_ALT.fullmatch(alt) for alt in fields[4].split(',')):
+            stop = add(line_number, f"invalid ALT '{fields[4]}'") or stop
+        return stop
+
+    @staticmethod
+    def _build_from_meta(line: str, contigs: Dict[str, int]) -> Optional[str]:
+        """Build named by ##reference / ##contig assembly; records chr1 length on the way"""
+        if line.startswith('##contig='):
+            contig = re.search(r'ID=(?:chr)?([^,>]+)', line)
+            length = re.search(r'length=(\d+)', line)
+            if contig and length:
+                contigs[contig.group(1)] = int(length.group(1))
+            assembly = re.search(r'assembly=([^,>]+)', line)
+            line = assembly.group(1) if assembly else ''
+        elif not line.startswith('##reference='):
+            return None
+
+        for pattern, build in _BUILD_NAMES:
+            if pattern.search(line):
+                return build
+        return None
@@ -6,6 +6,7 @@ from PyQt6.QtCore import Qt
 from services.pharmgkb_service import PharmGKBService
 from services.contact_service import ContactService
 from ui.components.vcf_upload_dialog import VCFUploadDialog
+from ui.utils.variant import rsid_from_key
 
 
 class GenomicsTab(QWidget):
@@ -260,14 +261,15 @@ class GenomicsTab(QWidget):
                 genotype = result.get('genotype', '')
                 date_tested = str(result.get('date_tested', ''))
 
-                # Get at-risk medications for this variant
+                # Get at-risk medications for this variant; drug_review is keyed
+                # by rsID, also for split alleles stored as <rsID>:<ALT>
                 risk_query = """
                     SELECT DISTINCT dr.medication_id, m.medication_name, dr.risk_level
                     FROM drug_review dr
                     JOIN medications m ON dr.medication_id = m.medication_id
                     WHERE dr.user_id = %s AND dr.variant = %s AND dr.status = 'active'
                 """
-                self.db_connection.cursor.execute(risk_query, (self.user_id, variant))
+                self.db_connection.cursor.execute(risk_query, (self.user_id, rsid_from_key(variant)))
                 risks = self.db_connection.cursor.fetchall()
 
                 # Format at-risk medications